@@ -9,13 +9,12 @@ from pm4py.visualization.petri_net.common import visualize
 from .test_net import Variants
 
 
-from hammocks_repair.conformance_analysis import bad_pairs_selection
+from hammocks_repair.conformance_analysis import bad_pairs_selection, log_alignments
 from hammocks_repair.hammocks_covering import algorithm as hammocks_covering_algo
 
 from pm4py.objects.petri_net.utils import petri_utils
 from pm4py.util import exec_utils
 from pm4py.algo.discovery.inductive import algorithm as inductive_miner
-from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
 
 import hammocks_repair.net_repair.hammocks_replacement.algorithm as hammocks_replacement
 import hammocks_repair.net_repair.naive_log_only.algorithm as naive_log_only
@@ -51,26 +50,29 @@ def visualize_naive_log_repair(net, init_marking, final_marking, log, parameters
     return rep_net, rep_init_marking, rep_final_marking
 
 
-def calc_alignments_stats(alignments):
+def calc_alignments_stats(aligned_variants):
     '''
+    :param aligned_variants:
+        pairs (alignment, count) as returned by log_alignments.apply_variants()
     :return:
-        'model_only'
+        'log_only', 'model_only', 'replay_fallback' (number of traces with replay-based pseudo-alignments)
     '''
     log_only_moves_cnt = 0
     model_only_moves_cnt = 0
 
-    for alignment_info in alignments:
+    for alignment_info, cnt in aligned_variants:
         alignment = alignment_info['alignment']
 
         for move in alignment:
             (log_name, model_name), (log_label, model_label) = move
             if model_label == '>>':  # log.xes-only move
-                log_only_moves_cnt += 1
+                log_only_moves_cnt += cnt
             elif log_label == '>>' and model_label is not None:  # model-only move (excluding hidden transitions)
-                model_only_moves_cnt += 1
+                model_only_moves_cnt += cnt
 
     return {'log_only': log_only_moves_cnt,
-            'model_only': model_only_moves_cnt}
+            'model_only': model_only_moves_cnt,
+            'replay_fallback': log_alignments.count_fallbacks(aligned_variants)}
 
 
 def visualize_hammocks_replacement_repair(net, init_marking, final_marking, log, alignments=None,
@@ -90,6 +92,8 @@ def visualize_hammocks_replacement_repair(net, init_marking, final_marking, log,
         'alignments': {
             'log_only_before_prerepair': ,
             'model_only_after_prerepair': ,
+            'replay_fallback_traces_before_prerepair': ,
+            'replay_fallback_traces_after_prerepair': ,
         },
         'time': {
             'alignments': ---,
@@ -113,27 +117,27 @@ def visualize_hammocks_replacement_repair(net, init_marking, final_marking, log,
     }
     stats['alignments'] = {}
 
-    alignments_parameters = {
-        alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True
-    }
     # alignments
-    wall_time, alignments = timeit(alignments_algo.apply_log)(log, net, init_marking, final_marking,
-                                                              parameters=alignments_parameters)
+    wall_time, aligned_variants = timeit(log_alignments.apply_variants)(log, net, init_marking, final_marking,
+                                                                        parameters=parameters)
     stats['time']['alignments'] += wall_time
 
-    alignment_stats = calc_alignments_stats(alignments)
+    alignment_stats = calc_alignments_stats(aligned_variants)
     stats['alignments']['log_only_moves_before_prerepair'] = alignment_stats['log_only']
     stats['alignments']['model_only_moves_before_prerepair'] = alignment_stats['model_only']
+    stats['alignments']['replay_fallback_traces_before_prerepair'] = alignment_stats['replay_fallback']
     #
 
     # prerepair
     prerepair_variant = exec_utils.get_param_value(
         hammocks_replacement.Parameters.PREREPAIR_VARIANT, parameters,
         hammocks_replacement.DEFAULT_PREREPAIR_VARIANT)
+    transitions_names = {trans.name for trans in net.transitions}
     if prerepair_variant is not None:
         prerepair_func = visualization_variants[prerepair_variant]
         wall_time, (net, init_marking, final_marking) = timeit(prerepair_func)(net, init_marking, final_marking, log,
-                                                                             parameters, alignments,
+                                                                             parameters,
+                                                                             [alignment for alignment, _ in aligned_variants],
                                                                              prerepaired_net_filename)
         stats['time']['prerepair'] += wall_time
 
@@ -141,20 +145,21 @@ def visualize_hammocks_replacement_repair(net, init_marking, final_marking, log,
     if prerepair_variant == hammocks_replacement.PrerepairVariants.NAIVE_LOG_ONLY.value:
         if parameters.get(hammocks_replacement.naive_log_only_algo.Parameters.ALIGNMENTS_MODIFICATION_MODE,
                           hammocks_replacement.naive_log_only_algo.DEFAULT_MODIFY_ALIGNMENTS_MODE) == hammocks_replacement.naive_log_only_algo.AlignmentsModificationMode.NONE:
-            alignments = None
-
-    if alignments is None:
-        print('alignments were recalculated')
-        wall_time, alignments = timeit(alignments_algo.apply_log)(log, net, init_marking, final_marking,
-                                                                  parameters=alignments_parameters)
-        stats['time']['alignments'] += wall_time
-
-    alignment_stats = calc_alignments_stats(alignments)
+            added_labels = {trans.label for trans in net.transitions
+                            if trans.name not in transitions_names and trans.label is not None}
+            print('alignments were recalculated for variants with activities', added_labels)
+            wall_time, aligned_variants = timeit(log_alignments.realign_variants)(net, init_marking, final_marking,
+                                                                                  aligned_variants, added_labels,
+                                                                                  parameters=parameters)
+            stats['time']['alignments'] += wall_time
+
+    alignment_stats = calc_alignments_stats(aligned_variants)
     stats['alignments']['log_only_moves_after_prerepair'] = alignment_stats['log_only']
     stats['alignments']['model_only_moves_after_prerepair'] = alignment_stats['model_only']
+    stats['alignments']['replay_fallback_traces_after_prerepair'] = alignment_stats['replay_fallback']
 
     # bad pairs
-    wall_time, bad_pairs = timeit(bad_pairs_selection.apply)(net, init_marking, final_marking, alignments)
+    wall_time, bad_pairs = timeit(bad_pairs_selection.apply_variants)(net, init_marking, final_marking, aligned_variants, parameters)
     stats['time']['hammocks_replacement'] += wall_time
 
     # find covering hammocks
@@ -2,6 +2,7 @@ from .metrics import graph_edit_similarity, graph_edit_similarity_prom
 from . import utils
 
 from examples import bad_pairs_hammocks_covering
+from hammocks_repair.conformance_analysis import log_alignments
 
 #
 from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
@@ -9,6 +10,7 @@ from pm4py.objects.conversion.log import converter
 #
 
 from pm4py.algo.evaluation.precision import algorithm as precision_evaluator
+from pm4py.algo.evaluation.replay_fitness.variants import alignment_based as alignment_based_fitness
 from pm4py.algo.discovery.inductive import algorithm as inductive_miner
 from pm4py.algo.discovery.footprints import algorithm as footprints_discovery
 # from pm4py.algo.evaluation.replay_fitness import algorithm as replay_fitness_evaluator
@@ -87,7 +89,16 @@ def add_data_to_grade_info(test_dir, method_name, data):
     dump_grade_info(test_dir, grade_info)
 
 
-def log_fitness(log, net, initial_marking, final_marking, debug=False):
+def log_fitness(log, net, initial_marking, final_marking, debug=False, alignments_cache=None):
+    '''
+    :param alignments_cache:
+        AlignmentsCache (or path to its file) to reuse alignments from, None if alignments should be calculated from scratch
+    '''
+    if alignments_cache is not None and not debug:
+        alignments = log_alignments.apply(log, net, initial_marking, final_marking,
+                                          parameters={log_alignments.Parameters.ALIGNMENTS_CACHE: alignments_cache})
+        return alignment_based_fitness.evaluate(alignments)
+
     if debug:  # for monitoring deviations
         df_log = converter.apply(log, variant=converter.Variants.TO_DATA_FRAME)
 
@@ -176,7 +187,8 @@ def get_net_stats(net):
     return stats
 
 
-def grade(test_dirs: List[str], forced_grade=False, metrics_used: Set[Metrics] = DEFAULT_METRICS_USED, graded_methods: Set[str] = None):
+def grade(test_dirs: List[str], forced_grade=False, metrics_used: Set[Metrics] = DEFAULT_METRICS_USED, graded_methods: Set[str] = None,
+          alignments_cache=None):
     """
     Grade repair results in directories by creating grade_info.json in each directory
 
@@ -191,6 +203,8 @@ def grade(test_dirs: List[str], forced_grade=False, metrics_used: Set[Metrics] =
         set of metrics to be used
     graded_methods
         set of names of repaired nets (in repaired_nets subdirectory) to be analysed
+    alignments_cache
+        AlignmentsCache (or path to its file) to reuse alignments for calculating fitness
     """
     for test_dir in test_dirs:
         prev_grade_info = load_grade_info(test_dir)
@@ -254,7 +268,7 @@ def grade(test_dirs: List[str], forced_grade=False, metrics_used: Set[Metrics] =
             # fitness (token-based replay)
             if Metrics.FITNESS in metrics_used:
                 logging.info('Calculating fitness...')
-                fitness = log_fitness(log, rep_net, rep_im, rep_fm)
+                fitness = log_fitness(log, rep_net, rep_im, rep_fm, alignments_cache=alignments_cache)
                 stats['fitness'] = {}
                 stats['fitness']['perc_fit_traces'] = fitness['percentage_of_fitting_traces']
                 stats['fitness']['avg_trace_fitness'] = fitness['average_trace_fitness']
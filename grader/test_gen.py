@@ -1,8 +1,9 @@
 from . import grader
 import examples.bad_pairs_hammocks_covering as bad_pairs_hammocks_covering
 import hammocks_repair.hammocks_covering.algorithm as hammocks_covering_algo
+from hammocks_repair.hammocks_covering.variants import decomposition_tree
 import hammocks_repair.net_repair.hammocks_replacement.algorithm as hammocks_replacement_algo
-from hammocks_repair.utils import net_helpers
+from hammocks_repair.utils import net_helpers, net_analysis
 
 from pm4py.util import exec_utils
 from pm4py.objects.conversion.log import converter
@@ -12,7 +13,7 @@ from pm4py.objects.petri_net.exporter import exporter as pnml_exporter
 from pm4py.objects.log.importer.xes import importer as xes_importer
 from pm4py.objects.log.exporter.xes import exporter as xes_exporter
 from pm4py.algo.discovery.inductive import algorithm as inductive_miner
-from pm4py.objects.petri_net.utils import check_soundness, petri_utils
+from pm4py.objects.petri_net.utils import petri_utils
 from pm4py.objects.log.obj import EventLog
 from pm4py.objects.petri_net.obj import PetriNet, Marking
 from pm4py.visualization.petri_net import visualizer as pn_visualizer
@@ -26,6 +27,7 @@ NodeTypes = hammocks_covering_algo.NodeTypes
 import pm4py
 
 from typing import Union, List, Dict, Tuple, Set
+import heapq
 import numpy as np
 import os
 import pandas as pd
@@ -289,6 +291,36 @@ def _nodes_on_dist(node, dist) -> Set[Union[PetriNet.Place, PetriNet.Transition]
     return used
 
 
+def _candidate_hammocks(tree: 'decomposition_tree.HammockTree', min_hammock_size) -> List[Hammock]:
+    '''
+    :return:
+        the hammocks of the decomposition `tree` (except the root) and the shortest runs of consecutive hammocks
+        of its sequences that contain >= `min_hammock_size` visible transitions, in a deterministic order
+    '''
+    candidates = set()
+    for tree_node in tree.tree_nodes:
+        if tree_node is not tree.root and tree_node.size >= min_hammock_size:
+            candidates.add(tree_node.hammock())
+
+        for sequence in tree.sequences(tree_node):
+            for i, first_piece in enumerate(sequence):
+                run_size = first_piece.size
+                j = i
+                while run_size < min_hammock_size and j + 1 < len(sequence):
+                    j += 1
+                    run_size += sequence[j].size
+                    shared_node = sequence[j].source
+                    if isinstance(shared_node, PetriNet.Transition) and shared_node.label is not None:
+                        run_size -= 1  # counted in both pieces
+                if i < j and run_size >= min_hammock_size:
+                    candidates.add(Hammock(first_piece.source, sequence[j].sink,
+                                           frozenset().union(*(piece.nodes for piece in sequence[i:j + 1]))))
+
+    candidates.discard(tree.root.hammock())
+    return sorted(candidates, key=lambda ham: (ham.size(), len(ham.nodes), ham.source.name, ham.sink.name,
+                                               sorted(node.name for node in ham.nodes)))
+
+
 def get_disjoint_hammocks(net: PetriNet, min_hammock_size=2, start_end_offset=2, hammocks_dist=2) -> List[Hammock]:
     '''
     start_end_offset
@@ -299,54 +331,50 @@ def get_disjoint_hammocks(net: PetriNet, min_hammock_size=2, start_end_offset=2,
     :return:
         some disjoint hammocks from the `net` that contain >= `min_hammock_size` visible transitions
 
-    naive implementation, could be done better, but I think that's enough for testing purposes
+    The candidates are taken from one decomposition tree of the net and chosen greedily from the smallest ones,
+    hammocks of the same size are chosen in random order (reproducible with random.seed())
     '''
-    if not check_soundness.check_wfnet(net):
+    if not net_analysis.check_wfnet(net):
         raise RuntimeError("Not a WF-net")
-    net_src = check_soundness.check_source_place_presence(net)
-    net_sink = check_soundness.check_sink_place_presence(net)
-
-    blocked_nodes = _nodes_on_dist(net_src, start_end_offset)
-    blocked_nodes.update(_nodes_on_dist(net_sink, start_end_offset))
-
-    min_hammock_parameters = {
-        hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
-        hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
-    }
-
-    min_hammocks = set()
-    for node in list(net.places) + list(net.transitions):
-        for out_arc in node.out_arcs:
-            hammock = hammocks_covering_algo.apply(net, [node, out_arc.target])
-            while hammock.size() < min_hammock_size:
-                if blocked_nodes.intersection(hammock.nodes):
-                    break
-                new_node = random.choice(list(hammock.source.in_arcs)).source
-                hammock = hammocks_covering_algo.apply(net, [new_node, hammock.sink], parameters=min_hammock_parameters)
-
-            if hammock.size() >= min_hammock_size:
-                min_hammocks.add(hammock)
+    net_src, net_sink = net_analysis.get_source_and_sink(net)
+
+    permitted_node_type = NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE
+    tree = decomposition_tree.HammockTree(net_src, net_sink, permitted_node_type, permitted_node_type)
+    candidates = _candidate_hammocks(tree, min_hammock_size)
+
+    # priority queue by size, random keys break the ties
+    queue = [(ham.size(), random.random(), i) for i, ham in enumerate(candidates)]
+    heapq.heapify(queue)
+
+    # candidates containing each node, a candidate is dropped as soon as one of its nodes is blocked
+    candidates_by_node = {}
+    for i, ham in enumerate(candidates):
+        for node in ham.nodes:
+            candidates_by_node.setdefault(node, []).append(i)
+    is_blocked = [False] * len(candidates)
+    blocked_nodes = set()
+
+    def block(nodes):
+        for node in nodes:
+            if node not in blocked_nodes:
+                blocked_nodes.add(node)
+                for i in candidates_by_node.get(node, []):
+                    is_blocked[i] = True
+
+    block(_nodes_on_dist(net_src, start_end_offset))
+    block(_nodes_on_dist(net_sink, start_end_offset))
 
     chosen_hammocks = []
-    while True:
-        for ham in copy(min_hammocks):
-            if len(ham.nodes & blocked_nodes) > 0:
-                min_hammocks.remove(ham)
-
-        if not min_hammocks:
-            break
-
-        cur_hammock = None
-        for ham in min_hammocks:
-            if cur_hammock is None or ham.size() < cur_hammock.size():
-                cur_hammock = ham
-        hammocks_with_min_sz = [ham for ham in min_hammocks if ham.size() == cur_hammock.size()]
-        cur_hammock = random.choice(hammocks_with_min_sz)
+    while queue:
+        _, _, i = heapq.heappop(queue)
+        if is_blocked[i]:
+            continue
+        cur_hammock = candidates[i]
         chosen_hammocks.append(cur_hammock)
 
-        blocked_nodes.update(cur_hammock.nodes)
-        blocked_nodes.update(_nodes_on_dist(cur_hammock.source, hammocks_dist))
-        blocked_nodes.update(_nodes_on_dist(cur_hammock.sink, hammocks_dist))
+        block(cur_hammock.nodes)
+        block(_nodes_on_dist(cur_hammock.source, hammocks_dist))
+        block(_nodes_on_dist(cur_hammock.sink, hammocks_dist))
 
     return chosen_hammocks
 
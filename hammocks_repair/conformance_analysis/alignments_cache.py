@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sqlite3
+from typing import Optional, Dict, Sequence, Tuple, Iterable
+
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.util import typing
+
+
+def net_fingerprint(net: PetriNet, initial_marking: Marking, final_marking: Marking) -> str:
+    """
+    Canonical fingerprint of a net: it doesn't depend on the order of nodes and arcs in the net
+
+    Names of nodes are taken into account since the alignments refer to transitions by their names
+
+    Returns
+    ------------
+    fingerprint
+        hex digest of the canonical representation of the net
+    """
+    canonical_net = {
+        'places': sorted(place.name for place in net.places),
+        'transitions': sorted([trans.name, trans.label] for trans in net.transitions),
+        'arcs': sorted([arc.source.name, arc.target.name, arc.weight] for arc in net.arcs),
+        'initial_marking': sorted([place.name, cnt] for place, cnt in initial_marking.items()),
+        'final_marking': sorted([place.name, cnt] for place, cnt in final_marking.items()),
+    }
+    canonical_repr = json.dumps(canonical_net, sort_keys=True, default=str)
+    return hashlib.sha256(canonical_repr.encode('utf-8')).hexdigest()
+
+
+def _json_default(obj):
+    if hasattr(obj, 'item'):  # numpy scalars
+        return obj.item()
+    return str(obj)
+
+
+def _encode_aligned_trace(aligned_trace: typing.AlignmentResult) -> str:
+    return json.dumps(aligned_trace, default=_json_default)
+
+
+def _decode_aligned_trace(encoded_aligned_trace: str) -> typing.AlignmentResult:
+    aligned_trace = json.loads(encoded_aligned_trace)
+    # json has no tuples: restore moves ( (log_name, model_name), (log_label, model_label) )
+    aligned_trace['alignment'] = [(tuple(names), tuple(labels)) for names, labels in aligned_trace['alignment']]
+    return aligned_trace
+
+
+class AlignmentsCache(object):
+    """
+    On-disk (SQLite) cache of alignments keyed by a net fingerprint and a trace variant
+
+    Alignments are expected to be calculated with PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE set to True
+    and the same cost functions for all entries of the cache
+    """
+    def __init__(self, filepath: str):
+        """
+        Parameters
+        ------------
+        filepath
+            path to the SQLite database file, created if doesn't exist
+        """
+        self.filepath = filepath
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS alignments ('
+                                 'net_fingerprint TEXT NOT NULL, '
+                                 'variant TEXT NOT NULL, '
+                                 'aligned_trace TEXT NOT NULL, '
+                                 'PRIMARY KEY (net_fingerprint, variant))')
+        self._connection.commit()
+
+    @staticmethod
+    def _encode_variant(variant: Sequence[str]) -> str:
+        return json.dumps(list(variant))
+
+    def get(self, fingerprint: str, variant: Sequence[str]) -> Optional[typing.AlignmentResult]:
+        """
+        Parameters
+        ------------
+        fingerprint
+            fingerprint of the net obtained via net_fingerprint()
+        variant
+            sequence of activities of a trace
+
+        Returns
+        ------------
+        aligned_trace
+            the cached alignment of the variant, None if it's absent in the cache
+        """
+        row = self._connection.execute('SELECT aligned_trace FROM alignments WHERE net_fingerprint = ? AND variant = ?',
+                                       (fingerprint, self._encode_variant(variant))).fetchone()
+        if row is None:
+            return None
+        return _decode_aligned_trace(row[0])
+
+    def get_many(self, fingerprint: str, variants: Iterable[Sequence[str]]) -> Dict[Tuple[str, ...], typing.AlignmentResult]:
+        """
+        Returns
+        ------------
+        aligned_traces
+            {variant: aligned_trace} for the variants present in the cache
+        """
+        aligned_traces = {}
+        for variant in variants:
+            aligned_trace = self.get(fingerprint, variant)
+            if aligned_trace is not None:
+                aligned_traces[tuple(variant)] = aligned_trace
+        return aligned_traces
+
+    def put(self, fingerprint: str, variant: Sequence[str], aligned_trace: typing.AlignmentResult):
+        self.put_many(fingerprint, [(variant, aligned_trace)])
+
+    def put_many(self, fingerprint: str, aligned_variants: Iterable[Tuple[Sequence[str], typing.AlignmentResult]]):
+        """
+        Parameters
+        ------------
+        aligned_variants
+            pairs (variant, aligned_trace), alignments that weren't found (None) are not stored
+        """
+        rows = [(fingerprint, self._encode_variant(variant), _encode_aligned_trace(aligned_trace))
+                for variant, aligned_trace in aligned_variants if aligned_trace is not None]
+        self._connection.executemany('INSERT OR REPLACE INTO alignments (net_fingerprint, variant, aligned_trace) VALUES (?, ?, ?)', rows)
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,13 +1,35 @@
-from typing import Union, Dict, Tuple, Sequence
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import repeat
+from typing import Union, Dict, Tuple, Sequence, Optional, Any, Iterable
 from copy import copy
 
 from pm4py.objects.petri_net.obj import PetriNet, Marking
 from pm4py.objects.petri_net.utils import petri_utils
-from pm4py.util import typing
+from pm4py.util import exec_utils, typing
 
 from hammocks_repair.utils.pn_typing import NetNode
 
 
+class Engines(Enum):
+    TOKENS = 'tokens'           # replay with token objects directly on the net
+    COMPILED = 'compiled'       # replay on the integer-indexed net with ancestors stored as bitsets
+
+
+class Parameters(Enum):
+    GROUP_BY_VARIANTS = 'bad_pairs_group_by_variants'  # replay each distinct alignment only once
+    ENGINE = 'bad_pairs_engine'  # from Engines
+    N_JOBS = 'bad_pairs_n_jobs'  # number of worker processes
+    EXECUTOR = 'bad_pairs_executor'  # concurrent.futures.Executor to replay alignments in
+
+
+DEFAULT_GROUP_BY_VARIANTS = True
+DEFAULT_ENGINE = Engines.COMPILED
+DEFAULT_N_JOBS = 1
+CHUNKS_PER_JOB = 4  # alignments are split into more chunks than workers for better load balancing
+
+
 def _format_alignment(alignment: Sequence[Tuple[Tuple[str, str], Tuple[str, str]]]) -> Dict[str, Sequence[Union[str, Tuple[str, str]]]]:
     """
     Convert the alignment to dict (for convenience of further use)
@@ -108,7 +130,225 @@ def _select_bad_pairs(net: PetriNet, alignment, initial_marking, final_marking):
     return bad_pairs
 
 
-def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking, aligned_traces: Union[typing.AlignmentResult, typing.ListAlignments]) -> Dict[Tuple[NetNode, NetNode], int]:
+class _CompiledNet(object):
+    """
+    The net converted once into integer-indexed arrays for replaying alignments
+
+    Nodes are referred to by their indices in the list given to the constructor (places must precede transitions in it),
+    green/red ancestors of a token are stored as bitsets over these indices
+    """
+    def __init__(self, nodes: Sequence[NetNode], initial_marking: Marking, final_marking: Marking):
+        node_index = {node: i for i, node in enumerate(nodes)}
+
+        self.places_cnt = sum(isinstance(node, PetriNet.Place) for node in nodes)
+        self.transition_index = {}  # name -> index
+        self.preset = {}  # transition index -> [place indices]
+        self.postset = {}  # transition index -> [place indices]
+        for i, node in enumerate(nodes):
+            if isinstance(node, PetriNet.Transition):
+                self.transition_index[node.name] = i
+                self.preset[i] = [node_index[in_arc.source] for in_arc in node.in_arcs]
+                self.postset[i] = [node_index[out_arc.target] for out_arc in node.out_arcs]
+
+        self.initial_marking = [(node_index[place], cnt) for place, cnt in initial_marking.items()]
+        self.initial_green = 0
+        for place in initial_marking.keys():
+            self.initial_green |= 1 << node_index[place]
+        self.end_places = [node_index[place] for place in final_marking.keys()]
+
+
+def _iter_bits(bitset: int):
+    while bitset:
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
+
+
+def _select_bad_pairs_compiled(compiled_net: _CompiledNet, alignment: Sequence[Tuple[Tuple[str, str], Tuple[str, str]]]) -> Dict[Tuple[int, int], int]:
+    """
+    The same as _select_bad_pairs() but on the compiled net
+
+    Parameters
+    ------------
+    alignment
+        one aligned trace as a sequence of tuples ( (log_name, model_name), (log_label, model_label) )
+
+    Returns
+    ------------
+    bad_pairs
+        {(i, j): count}, where i, j are indices of nodes in the compiled net
+    """
+    bad_pairs = {}  # pair: cnt
+
+    marking = [deque() for _ in range(compiled_net.places_cnt)]  # place index: FIFO of tokens (green, red)
+    init_token = (compiled_net.initial_green, 0)
+    for place, cnt in compiled_net.initial_marking:
+        marking[place].extend([init_token] * cnt)
+
+    for (_, model_name), (log_label, model_label) in alignment:
+        if model_label == '>>':  # log-only move
+            continue
+
+        fired_transition = compiled_net.transition_index.get(model_name)
+        if fired_transition is None:
+            raise RuntimeError(f"No transition with name {model_name}: incorrect alignments")
+
+        # consume tokens and unite sets
+        united_green = united_red = 0
+        for in_plc in compiled_net.preset[fired_transition]:
+            green, red = marking[in_plc].popleft()
+            united_green |= green
+            united_red |= red
+
+        if log_label == '>>':  # model-only move
+            if model_label is None:  # hidden transition
+                prod_token = (united_green, united_red)
+            else:
+                prod_token = (0, united_green | united_red)
+        else:  # sync move
+            for red_ancestor in _iter_bits(united_red):  # add a bad pair
+                pair = (red_ancestor, fired_transition)
+                bad_pairs[pair] = bad_pairs.get(pair, 0) + 1
+            prod_token = (1 << fired_transition, 0)
+
+        # produce tokens
+        for out_plc in compiled_net.postset[fired_transition]:
+            marking[out_plc].append(prod_token)
+
+    for tokens in marking:
+        for _, red in tokens:
+            for red_anc in _iter_bits(red):
+                for end_plc in compiled_net.end_places:
+                    pair = (red_anc, end_plc)
+                    bad_pairs[pair] = bad_pairs.get(pair, 0) + 1
+
+    return bad_pairs
+
+
+def _select_bad_pairs_chunk(compiled_net: _CompiledNet, variants: Sequence[Tuple[Tuple, int]]) -> Dict[Tuple[int, int], int]:
+    """
+    Executed in worker processes, only picklable objects are used: the compiled net and alignments with names of nodes
+
+    Parameters
+    ------------
+    variants
+        [(alignment as a tuple of moves, count), ...]
+
+    Returns
+    ------------
+    bad_pairs
+        {(i, j): count}, where i, j are indices of nodes in the compiled net
+    """
+    bad_pairs = Counter()
+    for variant, variant_cnt in variants:
+        for pair, cnt in _select_bad_pairs_compiled(compiled_net, variant).items():
+            bad_pairs[pair] += cnt * variant_cnt
+    return dict(bad_pairs)
+
+
+class BadPairsAccumulator(object):
+    """
+    Accumulates bad pairs over aligned traces that are added one by one,
+    so the whole alignments result doesn't have to be kept in memory
+
+    Accumulators built on the same net can be merged, e.g. after processing different parts of the log
+    """
+    def __init__(self, net: PetriNet, initial_marking: Marking, final_marking: Marking, parameters: Optional[Dict[Any, Any]] = None):
+        """
+        Parameters
+        ------------
+        net, initial_marking, final_marking
+            A WF-net to be analyzed
+        parameters
+            the same as for apply()
+        """
+        self._net = net
+        self._initial_marking = initial_marking
+        self._final_marking = final_marking
+        self._group_by_variants = exec_utils.get_param_value(Parameters.GROUP_BY_VARIANTS, parameters, DEFAULT_GROUP_BY_VARIANTS)
+        self._engine = exec_utils.get_param_value(Parameters.ENGINE, parameters, DEFAULT_ENGINE)
+        self._n_jobs = exec_utils.get_param_value(Parameters.N_JOBS, parameters, DEFAULT_N_JOBS)
+        self._executor = exec_utils.get_param_value(Parameters.EXECUTOR, parameters, None)
+
+        self._is_parallel = self._executor is not None or self._n_jobs > 1
+        if self._is_parallel:  # only the compiled net can be sent to worker processes
+            self._engine = Engines.COMPILED.value
+
+        if self._engine == Engines.COMPILED.value:
+            self._nodes = list(net.places) + list(net.transitions)
+            self._compiled_net = _CompiledNet(self._nodes, initial_marking, final_marking)
+
+        self._pending_variants = Counter()  # alignment as a tuple of moves -> count, not replayed yet
+        self._bad_pairs = Counter()  # (t1, t2) -> count
+
+    def _select_bad_pairs(self, alignment) -> Dict[Tuple[NetNode, NetNode], int]:
+        if self._engine == Engines.COMPILED.value:
+            nodes = self._nodes
+            return {(nodes[i], nodes[j]): cnt for (i, j), cnt in _select_bad_pairs_compiled(self._compiled_net, alignment).items()}
+        else:
+            return _select_bad_pairs(self._net, _format_alignment(alignment), self._initial_marking, self._final_marking)
+
+    def _flush(self):
+        if self._is_parallel and self._pending_variants:
+            self._flush_parallel()
+        for variant, variant_cnt in self._pending_variants.items():
+            for pair, cnt in self._select_bad_pairs(variant).items():
+                self._bad_pairs[pair] += cnt * variant_cnt
+        self._pending_variants.clear()
+
+    def _flush_parallel(self):
+        variants = list(self._pending_variants.items())
+        chunk_size = max(1, -(-len(variants) // (self._n_jobs * CHUNKS_PER_JOB)))
+        chunks = [variants[i:i + chunk_size] for i in range(0, len(variants), chunk_size)]
+
+        if self._executor is None:
+            with ProcessPoolExecutor(max_workers=self._n_jobs) as executor:
+                shards = list(executor.map(_select_bad_pairs_chunk, repeat(self._compiled_net), chunks))
+        else:
+            shards = self._executor.map(_select_bad_pairs_chunk, repeat(self._compiled_net), chunks)
+
+        # the workers return indices, they are mapped back to the nodes of the caller's net
+        nodes = self._nodes
+        for shard in shards:
+            for (i, j), cnt in shard.items():
+                self._bad_pairs[(nodes[i], nodes[j])] += cnt
+        self._pending_variants.clear()
+
+    def add(self, aligned_trace: typing.AlignmentResult, count: int = 1):
+        """
+        Parameters
+        ------------
+        aligned_trace
+            one aligned trace in the format described in apply()
+        count
+            how many times the aligned trace occurs
+        """
+        if self._group_by_variants or self._is_parallel:  # replayed later, once for each distinct alignment
+            self._pending_variants[tuple(aligned_trace['alignment'])] += count
+        else:
+            for pair, cnt in self._select_bad_pairs(aligned_trace['alignment']).items():
+                self._bad_pairs[pair] += cnt * count
+
+    def merge(self, other: 'BadPairsAccumulator'):
+        """
+        Add all aligned traces accumulated by the `other` accumulator built on the same net
+        """
+        self._pending_variants.update(other._pending_variants)
+        self._bad_pairs.update(other._bad_pairs)
+
+    def result(self) -> Dict[Tuple[NetNode, NetNode], int]:
+        """
+        Returns
+        ------------
+        bad_pairs
+            bad pairs for all the added aligned traces in the format described in apply()
+        """
+        self._flush()
+        return dict(self._bad_pairs)
+
+
+def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking, aligned_traces: Union[typing.ListAlignments, Iterable[typing.AlignmentResult]],
+          parameters: Optional[Dict[Any, Any]] = None) -> Dict[Tuple[NetNode, NetNode], int]:
     """
     Select "bad" pairs of nodes (transitions or start/end places) based on the given alignments
 
@@ -117,7 +357,8 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking, align
     net, initial_marking, final_marking
         A WF-net to be analyzed
     aligned_traces
-        a result of applying the alignments algo to some log and the `net`
+        a result of applying the alignments algo to some log and the `net`,
+        any iterable (e.g. a generator) of aligned traces is accepted, it is traversed only once
         format of each aligned trace:
         {
             'alignment': sequence of tuples
@@ -125,6 +366,16 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking, align
         }
         for this format a parameter PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE should be set to True
         when calculating alignments
+    parameters
+        Parameters of the algorithm:
+            Parameters.GROUP_BY_VARIANTS - whether to replay each distinct alignment (sequence of moves) only once
+                and multiply the found bad pairs by its frequency, by default: DEFAULT_GROUP_BY_VARIANTS
+            Parameters.ENGINE - one of Engines: how the alignments are replayed, by default: DEFAULT_ENGINE
+            Parameters.N_JOBS - number of worker processes to replay distinct alignments in
+                (also determines the number of chunks the alignments are split into), by default: DEFAULT_N_JOBS
+            Parameters.EXECUTOR - an executor (e.g. ProcessPoolExecutor) to be used instead of creating a new process pool,
+                by default: None
+            if more than one job or an executor is used, the alignments are replayed with Engines.COMPILED
 
     Returns
     ------------
@@ -134,15 +385,29 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking, align
          and
         count is the number of its detections
     """
-    bad_pairs = {}
-
+    accumulator = BadPairsAccumulator(net, initial_marking, final_marking, parameters)
     for aligned_trace in aligned_traces:
-        alignment = _format_alignment(aligned_trace['alignment'])
-        cur_bad_pairs = _select_bad_pairs(net, alignment, initial_marking, final_marking)
-        for plc, cnt in cur_bad_pairs.items():
-            if plc in bad_pairs:
-                bad_pairs[plc] += cnt
-            else:
-                bad_pairs[plc] = cnt
+        accumulator.add(aligned_trace)
+    return accumulator.result()
 
-    return bad_pairs
+
+def apply_variants(net: PetriNet, initial_marking: Marking, final_marking: Marking, aligned_variants: Iterable[Tuple[typing.AlignmentResult, int]],
+                   parameters: Optional[Dict[Any, Any]] = None) -> Dict[Tuple[NetNode, NetNode], int]:
+    """
+    The same as apply() but for alignments of trace variants
+
+    Parameters
+    ------------
+    aligned_variants
+        pairs (aligned trace, number of traces with this alignment),
+        for example, the result of log_alignments.apply_variants()
+
+    Returns
+    ------------
+    bad_pairs
+        the same as for apply()
+    """
+    accumulator = BadPairsAccumulator(net, initial_marking, final_marking, parameters)
+    for aligned_trace, cnt in aligned_variants:
+        accumulator.add(aligned_trace, cnt)
+    return accumulator.result()
@@ -0,0 +1,305 @@
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import repeat
+from typing import Optional, Dict, Any, Union, Tuple, List, Set
+
+import pandas as pd
+
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
+from pm4py.objects.conversion.log import converter as log_converter
+from pm4py.objects.log.obj import EventLog, EventStream, Trace, Event
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.util import exec_utils, xes_constants, typing, constants as pm4_constants
+
+from hammocks_repair.conformance_analysis import alignments_cache, replay_alignments
+from hammocks_repair.conformance_analysis.alignments_cache import AlignmentsCache
+
+
+class Backends(Enum):
+    ALIGNMENTS = 'alignments'  # optimal alignments calculated by pm4py
+    TOKEN_REPLAY = 'token_replay'  # approximate pseudo-alignments derived from token replay, see replay_alignments
+
+
+class Parameters(Enum):
+    BACKEND = 'alignments_backend'  # from Backends
+    ALIGNMENTS_CACHE = 'alignments_cache'  # AlignmentsCache or path to its file
+    N_JOBS = 'alignments_n_jobs'  # number of worker processes
+    PREFILTER_FITTING = 'alignments_prefilter_fitting'  # skip alignments of variants that fit according to token replay
+    MAX_ALIGN_TIME_TRACE = 'alignments_max_align_time_trace'  # time budget (in seconds) of the alignment of one variant
+    REPLAY_MAX_LOOKAHEAD_STATES = replay_alignments.Parameters.MAX_LOOKAHEAD_STATES.value
+    ACTIVITY_KEY = pm4_constants.PARAMETER_CONSTANT_ACTIVITY_KEY
+
+
+DEFAULT_ACTIVITY_KEY = xes_constants.DEFAULT_NAME_KEY
+DEFAULT_BACKEND = Backends.ALIGNMENTS
+DEFAULT_N_JOBS = 1
+DEFAULT_PREFILTER_FITTING = True
+DEFAULT_MAX_ALIGN_TIME_TRACE = None  # no limit
+FALLBACK_KEY = 'replay_fallback'  # set to True in the pseudo-alignments of variants which exceeded the time budget
+CHUNKS_PER_JOB = 4  # variants are split into more chunks than workers for better load balancing
+
+
+def _get_variants(log: EventLog, activity_key: str) -> Dict[Tuple[str, ...], List[int]]:
+    """
+    Returns
+    ------------
+    variants
+        {sequence of activities: indices of traces in the `log`}
+    """
+    variants = {}
+    for trace_idx, trace in enumerate(log):
+        variant = tuple(event[activity_key] for event in trace)
+        if variant not in variants:
+            variants[variant] = []
+        variants[variant].append(trace_idx)
+    return variants
+
+
+def _align_log(log: EventLog, net: PetriNet, initial_marking: Marking, final_marking: Marking,
+               max_align_time_trace: Optional[float] = None, show_progress_bar: bool = True) -> typing.ListAlignments:
+    """
+    Returns
+    ------------
+    alignments
+        alignments of the traces of the `log`, None for the traces which exceeded `max_align_time_trace`
+    """
+    alignments_parameters = {
+        alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+        alignments_algo.Parameters.SHOW_PROGRESS_BAR: show_progress_bar,
+    }
+    if max_align_time_trace is not None:
+        alignments_parameters[alignments_algo.Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = max_align_time_trace
+    return alignments_algo.apply_log(log, net, initial_marking, final_marking, parameters=alignments_parameters)
+
+
+def _align_traces(traces: List[Trace], net: PetriNet, initial_marking: Marking, final_marking: Marking, n_jobs: int,
+                  max_align_time_trace: Optional[float] = None) -> typing.ListAlignments:
+    """
+    Returns
+    ------------
+    alignments
+        alignments of the `traces` in the same order, None for the traces which exceeded `max_align_time_trace`
+    """
+    if n_jobs <= 1 or len(traces) <= 1:
+        return _align_log(EventLog(traces), net, initial_marking, final_marking, max_align_time_trace)
+
+    chunk_size = max(1, -(-len(traces) // (n_jobs * CHUNKS_PER_JOB)))
+    chunks = [EventLog(traces[i:i + chunk_size]) for i in range(0, len(traces), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        # map() keeps the order of the chunks, so the alignments are reassembled in the order of the traces
+        chunks_alignments = executor.map(_align_log, chunks, repeat(net), repeat(initial_marking), repeat(final_marking),
+                                         repeat(max_align_time_trace), repeat(False))
+        return [aligned_trace for chunk_alignments in chunks_alignments for aligned_trace in chunk_alignments]
+
+
+def _align_variants(log: EventLog, net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                    cache: Optional[AlignmentsCache], activity_key: str, n_jobs: int,
+                    max_align_time_trace: Optional[float] = None, replay_parameters: Optional[Dict[Any, Any]] = None,
+                    backend: str = DEFAULT_BACKEND.value, prefilter_fitting: bool = DEFAULT_PREFILTER_FITTING) -> Tuple[Dict[Tuple[str, ...], List[int]], Dict[Tuple[str, ...], typing.AlignmentResult]]:
+    """
+    Returns
+    ------------
+    variants_idxs
+        {variant: indices of traces in the `log`}
+    aligned_variants
+        {variant: aligned trace}
+    """
+    variants_idxs = _get_variants(log, activity_key)
+
+    if backend == Backends.TOKEN_REPLAY.value:  # pseudo-alignments are cheap and never cached
+        aligned_variants = {variant: replay_alignments.apply_trace(variant, net, initial_marking, final_marking, replay_parameters)
+                            for variant in variants_idxs}
+        return variants_idxs, aligned_variants
+
+    aligned_variants = {}
+    if prefilter_fitting:  # alignments of the fitting variants consist of sync and hidden moves, replay finds them much faster
+        for variant in variants_idxs:
+            aligned_trace = replay_alignments.apply_fitting_trace(variant, net, initial_marking, final_marking, replay_parameters)
+            if aligned_trace is not None:
+                aligned_variants[variant] = aligned_trace
+
+    if cache is not None:
+        fingerprint = alignments_cache.net_fingerprint(net, initial_marking, final_marking)
+        aligned_variants.update(cache.get_many(fingerprint, [variant for variant in variants_idxs if variant not in aligned_variants]))
+
+    missing_variants = [variant for variant in variants_idxs if variant not in aligned_variants]
+    if missing_variants:
+        traces = [log[variants_idxs[variant][0]] for variant in missing_variants]
+        new_alignments = _align_traces(traces, net, initial_marking, final_marking, n_jobs, max_align_time_trace)
+        if cache is not None:  # pseudo-alignments are not cached, a later call may have enough time for the optimal ones
+            cache.put_many(fingerprint, zip(missing_variants, new_alignments))
+        for variant, aligned_trace in zip(missing_variants, new_alignments):
+            if aligned_trace is None:
+                aligned_trace = replay_alignments.apply_trace(variant, net, initial_marking, final_marking, replay_parameters)
+                aligned_trace[FALLBACK_KEY] = True
+            aligned_variants[variant] = aligned_trace
+
+    return variants_idxs, aligned_variants
+
+
+def _apply(log: Union[pd.DataFrame, EventLog, EventStream], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+           parameters: Optional[Dict[Any, Any]] = None):
+    log = log_converter.apply(log, variant=log_converter.Variants.TO_EVENT_LOG)
+
+    backend = exec_utils.get_param_value(Parameters.BACKEND, parameters, DEFAULT_BACKEND)
+    cache = exec_utils.get_param_value(Parameters.ALIGNMENTS_CACHE, parameters, None)
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_ACTIVITY_KEY)
+    n_jobs = exec_utils.get_param_value(Parameters.N_JOBS, parameters, DEFAULT_N_JOBS)
+    prefilter_fitting = exec_utils.get_param_value(Parameters.PREFILTER_FITTING, parameters, DEFAULT_PREFILTER_FITTING)
+    max_align_time_trace = exec_utils.get_param_value(Parameters.MAX_ALIGN_TIME_TRACE, parameters, DEFAULT_MAX_ALIGN_TIME_TRACE)
+    replay_parameters = {
+        replay_alignments.Parameters.MAX_LOOKAHEAD_STATES: exec_utils.get_param_value(
+            Parameters.REPLAY_MAX_LOOKAHEAD_STATES, parameters, replay_alignments.DEFAULT_MAX_LOOKAHEAD_STATES),
+    }
+    # 'bwc' of the pseudo-alignments, calculated once for the net
+    replay_parameters[replay_alignments.Parameters.BEST_WORST_COST] = replay_alignments.best_worst_cost(
+        net, initial_marking, final_marking, replay_parameters)
+
+    if cache is None or isinstance(cache, AlignmentsCache):
+        variants_idxs, aligned_variants = _align_variants(log, net, initial_marking, final_marking, cache, activity_key, n_jobs,
+                                                          max_align_time_trace, replay_parameters, backend, prefilter_fitting)
+    else:
+        with AlignmentsCache(cache) as opened_cache:
+            variants_idxs, aligned_variants = _align_variants(log, net, initial_marking, final_marking, opened_cache, activity_key, n_jobs,
+                                                              max_align_time_trace, replay_parameters, backend, prefilter_fitting)
+    return len(log), variants_idxs, aligned_variants
+
+
+def apply_variants(log: Union[pd.DataFrame, EventLog, EventStream], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                   parameters: Optional[Dict[Any, Any]] = None) -> List[Tuple[typing.AlignmentResult, int]]:
+    """
+    Calculate one alignment for each trace variant of the `log` on the `net`
+    with PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE set to True (or its approximation, see Parameters.BACKEND)
+
+    Parameters
+    ------------
+    log
+        Event log
+    net, initial_marking, final_marking
+        A WF-net
+    parameters
+        Parameters of the algorithm:
+            Parameters.BACKEND - one of Backends: how the alignments are calculated, by default: DEFAULT_BACKEND
+                (Backends.TOKEN_REPLAY ignores the cache, the number of jobs and the time budget)
+            Parameters.ALIGNMENTS_CACHE - AlignmentsCache (or path to its file) to reuse the alignments from, by default: None (no cache)
+            Parameters.N_JOBS - number of worker processes to align the variants in, by default: DEFAULT_N_JOBS
+            Parameters.PREFILTER_FITTING - if True, variants that perfectly fit according to token replay
+                (see replay_alignments.apply_fitting_trace) are not aligned, by default: DEFAULT_PREFILTER_FITTING
+            Parameters.MAX_ALIGN_TIME_TRACE - time budget (in seconds) of the alignment of one variant, variants exceeding it
+                get a replay-based pseudo-alignment (see replay_alignments) with FALLBACK_KEY set to True,
+                by default: DEFAULT_MAX_ALIGN_TIME_TRACE
+            Parameters.REPLAY_MAX_LOOKAHEAD_STATES - see replay_alignments.Parameters.MAX_LOOKAHEAD_STATES
+            Parameters.ACTIVITY_KEY - The name of the attribute to be used as activity, by default: DEFAULT_ACTIVITY_KEY
+
+    Returns
+    ------------
+    aligned_variants
+        list of pairs (aligned trace, number of traces of its variant in the `log`)
+    """
+    _, variants_idxs, aligned_variants = _apply(log, net, initial_marking, final_marking, parameters)
+    return [(aligned_variants[variant], len(trace_idxs)) for variant, trace_idxs in variants_idxs.items()]
+
+
+def _get_variant(aligned_trace: typing.AlignmentResult) -> Tuple[str, ...]:
+    # ( (log_name, model_name), (log_label, model_label) )
+    return tuple(log_label for _, (log_label, _) in aligned_trace['alignment'] if log_label != '>>')
+
+
+def realign_variants(net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                     aligned_variants: List[Tuple[typing.AlignmentResult, int]], activities: Set[str],
+                     parameters: Optional[Dict[Any, Any]] = None) -> List[Tuple[typing.AlignmentResult, int]]:
+    """
+    Recalculate the alignments of the variants containing any of the `activities`, other alignments are reused
+
+    Useful after a repair that only adds transitions with the labels from `activities`
+    which don't change markings (e.g. self-loops): alignments of other variants stay optimal on the repaired net
+
+    Parameters
+    ------------
+    net, initial_marking, final_marking
+        A WF-net the variants are realigned on
+    aligned_variants
+        pairs (aligned trace, count) as returned by apply_variants()
+    activities
+        activities of the variants to be realigned
+    parameters
+        the same as for apply_variants()
+
+    Returns
+    ------------
+    aligned_variants
+        pairs (aligned trace, count) in the same order
+    """
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_ACTIVITY_KEY)
+
+    variants = [_get_variant(aligned_trace) for aligned_trace, _ in aligned_variants]
+    outdated_variants = list(dict.fromkeys(variant for variant in variants if not activities.isdisjoint(variant)))
+    if not outdated_variants:
+        return aligned_variants
+
+    log = EventLog([Trace([Event({activity_key: activity}) for activity in variant]) for variant in outdated_variants])
+    _, _, new_aligned_variants = _apply(log, net, initial_marking, final_marking, parameters)
+    return [(new_aligned_variants.get(variant, aligned_trace), cnt)
+            for variant, (aligned_trace, cnt) in zip(variants, aligned_variants)]
+
+
+def apply(log: Union[pd.DataFrame, EventLog, EventStream], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+          parameters: Optional[Dict[Any, Any]] = None) -> typing.ListAlignments:
+    """
+    Calculate alignments of the traces of the `log` on the `net`
+    with PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE set to True
+
+    As in pm4py, traces of the same variant share one alignment object
+
+    Parameters
+    ------------
+    log
+        Event log
+    net, initial_marking, final_marking
+        A WF-net
+    parameters
+        the same as for apply_variants()
+
+    Returns
+    ------------
+    alignments
+        list of aligned traces in the order of the traces in the `log`
+    """
+    traces_cnt, variants_idxs, aligned_variants = _apply(log, net, initial_marking, final_marking, parameters)
+
+    alignments = [None] * traces_cnt
+    for variant, trace_idxs in variants_idxs.items():
+        for trace_idx in trace_idxs:
+            alignments[trace_idx] = aligned_variants[variant]
+    return alignments
+
+
+def group_by_variants(alignments: typing.ListAlignments) -> List[Tuple[typing.AlignmentResult, int]]:
+    """
+    Convert per-trace alignments to the format of apply_variants()
+
+    Aligned traces are grouped by identity, so the objects are shared with the given `alignments`
+    (as in pm4py, traces of the same variant are expected to share one alignment object)
+
+    Returns
+    ------------
+    aligned_variants
+        list of pairs (aligned trace, number of its occurrences in the `alignments`)
+    """
+    aligned_variants = {}  # id: [aligned trace, count]
+    for aligned_trace in alignments:
+        key = id(aligned_trace)
+        if key not in aligned_variants:
+            aligned_variants[key] = [aligned_trace, 0]
+        aligned_variants[key][1] += 1
+    return [(aligned_trace, cnt) for aligned_trace, cnt in aligned_variants.values()]
+
+
+def count_fallbacks(aligned_variants: List[Tuple[typing.AlignmentResult, int]]) -> int:
+    """
+    Returns
+    ------------
+    fallbacks_cnt
+        number of traces that got a replay-based pseudo-alignment instead of the optimal one
+    """
+    return sum(cnt for aligned_trace, cnt in aligned_variants if aligned_trace.get(FALLBACK_KEY, False))
@@ -0,0 +1,261 @@
+import heapq
+from collections import Counter
+from enum import Enum
+from typing import Optional, Dict, Any, Sequence, List, Tuple, Callable
+
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
+from pm4py.objects.log.obj import Trace
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.objects.petri_net.utils import align_utils
+from pm4py.util import exec_utils, typing
+
+"""
+Cheap pseudo-alignments derived from token replay
+
+The trace is replayed greedily: an event is a sync move if a transition with its label can be enabled by a few
+model-only moves (which produce the missing tokens), otherwise it is a log-only move.
+In the end model-only moves leading to the final marking are added if they are found.
+Unlike optimal alignments, the result is not guaranteed to be optimal, but it is a valid firing sequence of the net,
+so it can be consumed by bad_pairs_selection and the prerepair algorithms
+"""
+
+
+class Parameters(Enum):
+    MAX_LOOKAHEAD_STATES = 'replay_max_lookahead_states'  # max number of markings explored to enable a transition
+    BEST_WORST_COST = 'replay_best_worst_cost'  # cost of the empty trace alignment, see best_worst_cost()
+
+
+DEFAULT_MAX_LOOKAHEAD_STATES = 1000
+
+MODEL_MOVE_COST = align_utils.STD_MODEL_LOG_MOVE_COST
+LOG_MOVE_COST = align_utils.STD_MODEL_LOG_MOVE_COST
+TAU_MOVE_COST = align_utils.STD_TAU_COST
+
+
+def _frozen(marking: Counter) -> frozenset:
+    return frozenset(marking.items())
+
+
+def _is_enabled(transition: PetriNet.Transition, marking: Counter) -> bool:
+    for in_arc in transition.in_arcs:
+        if marking[in_arc.source] < in_arc.weight:
+            return False
+    return True
+
+
+def _fire(transition: PetriNet.Transition, marking: Counter) -> Counter:
+    new_marking = Counter(marking)
+    for in_arc in transition.in_arcs:
+        new_marking[in_arc.source] -= in_arc.weight
+        if new_marking[in_arc.source] == 0:
+            del new_marking[in_arc.source]
+    for out_arc in transition.out_arcs:
+        new_marking[out_arc.target] += out_arc.weight
+    return new_marking
+
+
+def _model_move_cost(transition: PetriNet.Transition) -> int:
+    return TAU_MOVE_COST if transition.label is None else MODEL_MOVE_COST
+
+
+def _find_model_moves(net: PetriNet, marking: Counter, is_target: Callable[[Counter], bool],
+                      max_states: int, hidden_only: bool = False) -> Optional[Tuple[List[PetriNet.Transition], Counter]]:
+    """
+    Uniform-cost search of the cheapest sequence of model-only moves leading to a marking satisfying `is_target`
+    (only hidden transitions are fired if `hidden_only`)
+
+    Returns
+    ------------
+    path, reached_marking
+        None if no such sequence was found within `max_states` explored markings
+    """
+    counter = 0  # tie-breaker for the heap
+    queue = [(0, counter, marking, [])]
+    visited = set()
+
+    while queue and len(visited) < max_states:
+        cost, _, cur_marking, path = heapq.heappop(queue)
+        frozen_marking = _frozen(cur_marking)
+        if frozen_marking in visited:
+            continue
+        visited.add(frozen_marking)
+
+        if is_target(cur_marking):
+            return path, cur_marking
+
+        for place in list(cur_marking.keys()):
+            for out_arc in place.out_arcs:
+                transition = out_arc.target
+                if hidden_only and transition.label is not None:
+                    continue
+                if not _is_enabled(transition, cur_marking):
+                    continue
+                new_marking = _fire(transition, cur_marking)
+                if _frozen(new_marking) in visited:
+                    continue
+                counter += 1
+                heapq.heappush(queue, (cost + _model_move_cost(transition), counter, new_marking, path + [transition]))
+    return None
+
+
+def _model_move(transition: PetriNet.Transition):
+    # ( (log_name, model_name), (log_label, model_label) )
+    return ('>>', transition.name), ('>>', transition.label)
+
+
+def _replay(trace: Sequence[str], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+            max_states: int, hidden_only: bool) -> Optional[Tuple[list, int]]:
+    """
+    Returns
+    ------------
+    alignment, cost
+        None if `hidden_only` and the trace can't be replayed with sync moves and hidden transitions only
+    """
+    transitions_by_label = {}
+    for transition in net.transitions:
+        if transition.label is not None:
+            transitions_by_label.setdefault(transition.label, []).append(transition)
+
+    marking = Counter(dict(initial_marking))
+    alignment = []
+    cost = 0
+
+    for event_index, label in enumerate(trace):
+        log_name = f't_{label}_{event_index}'
+        candidates = transitions_by_label.get(label, [])
+
+        found = None
+        if candidates:
+            found = _find_model_moves(net, marking, lambda m: any(_is_enabled(t, m) for t in candidates), max_states,
+                                      hidden_only)
+
+        if found is None:
+            if hidden_only:
+                return None
+            alignment.append(((log_name, '>>'), (label, '>>')))  # log-only move
+            cost += LOG_MOVE_COST
+            continue
+
+        path, marking = found
+        for transition in path:
+            alignment.append(_model_move(transition))
+            cost += _model_move_cost(transition)
+        fired_transition = next(t for t in candidates if _is_enabled(t, marking))
+        marking = _fire(fired_transition, marking)
+        alignment.append(((log_name, fired_transition.name), (label, label)))
+
+    target_marking = Counter(dict(final_marking))
+    found = _find_model_moves(net, marking, lambda m: m == target_marking, max_states, hidden_only)
+    if found is None:
+        if hidden_only:
+            return None
+    else:
+        path, marking = found
+        for transition in path:
+            alignment.append(_model_move(transition))
+            cost += _model_move_cost(transition)
+
+    return alignment, cost
+
+
+def best_worst_cost(net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                    parameters: Optional[Dict[Any, Any]] = None) -> int:
+    """
+    Returns
+    ------------
+    best_worst_cost
+        Cost of the cheapest model-only moves from the initial to the final marking (the alignment of the empty trace),
+        as pm4py calculates it for 'bwc'. If the final marking isn't reached within MAX_LOOKAHEAD_STATES markings,
+        the cost of the optimal alignment of the empty trace is calculated by pm4py
+    """
+    max_states = exec_utils.get_param_value(Parameters.MAX_LOOKAHEAD_STATES, parameters, DEFAULT_MAX_LOOKAHEAD_STATES)
+    target_marking = Counter(dict(final_marking))
+    found = _find_model_moves(net, Counter(dict(initial_marking)), lambda m: m == target_marking, max_states)
+    if found is None:
+        return alignments_algo.apply(Trace(), net, initial_marking, final_marking)['cost']
+    path, _ = found
+    return sum(_model_move_cost(transition) for transition in path)
+
+
+def _add_fitness(aligned_trace: typing.AlignmentResult, trace: Sequence[str], net: PetriNet, initial_marking: Marking,
+                 final_marking: Marking, parameters: Optional[Dict[Any, Any]] = None) -> typing.AlignmentResult:
+    """
+    Set 'bwc' and 'fitness' of the `aligned_trace` in the same way as pm4py alignments do
+    """
+    model_bwc = exec_utils.get_param_value(Parameters.BEST_WORST_COST, parameters, None)
+    if model_bwc is None:
+        model_bwc = best_worst_cost(net, initial_marking, final_marking, parameters)
+    bwc = len(trace) * LOG_MOVE_COST + model_bwc
+
+    fitness_den = bwc // align_utils.STD_MODEL_LOG_MOVE_COST
+    aligned_trace['fitness'] = 1 - (aligned_trace['cost'] // align_utils.STD_MODEL_LOG_MOVE_COST) / fitness_den if fitness_den > 0 else 0
+    aligned_trace['bwc'] = bwc
+    return aligned_trace
+
+
+def apply_trace(trace: Sequence[str], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                parameters: Optional[Dict[Any, Any]] = None) -> typing.AlignmentResult:
+    """
+    Build a pseudo-alignment of the `trace` via token replay
+
+    Parameters
+    ------------
+    trace
+        sequence of activities
+    net, initial_marking, final_marking
+        A WF-net
+    parameters
+        Parameters of the algorithm:
+            Parameters.MAX_LOOKAHEAD_STATES - max number of markings explored when looking for model-only moves that
+                enable the current event (or lead to the final marking), by default: DEFAULT_MAX_LOOKAHEAD_STATES
+            Parameters.BEST_WORST_COST - best_worst_cost() of the net to share between the traces, by default: calculated
+
+    Returns
+    ------------
+    aligned_trace
+        {
+            'alignment': sequence of tuples ( (log_name, model_name), (log_label, model_label) ),
+            'cost': cost of the pseudo-alignment with the standard cost function,
+            'fitness': 1 - cost / bwc as in pm4py alignments,
+            'bwc': the best worst cost as in pm4py alignments
+        }
+    """
+    max_states = exec_utils.get_param_value(Parameters.MAX_LOOKAHEAD_STATES, parameters, DEFAULT_MAX_LOOKAHEAD_STATES)
+    alignment, cost = _replay(trace, net, initial_marking, final_marking, max_states, hidden_only=False)
+    return _add_fitness({'alignment': alignment, 'cost': cost}, trace, net, initial_marking, final_marking, parameters)
+
+
+def apply_fitting_trace(trace: Sequence[str], net: PetriNet, initial_marking: Marking, final_marking: Marking,
+                        parameters: Optional[Dict[Any, Any]] = None) -> Optional[typing.AlignmentResult]:
+    """
+    Check that the `trace` perfectly fits the net by replaying it with sync moves and hidden transitions only
+
+    The check is greedy: a fitting trace may be rejected if the net has duplicate labels or choices
+    between hidden transitions that are resolved only by later events, but a non-fitting trace is never accepted
+
+    Parameters
+    ------------
+    trace
+        sequence of activities
+    net, initial_marking, final_marking
+        A WF-net
+    parameters
+        the same as for apply_trace()
+
+    Returns
+    ------------
+    aligned_trace
+        {
+            'alignment': sequence of sync moves and moves on hidden transitions,
+            'cost': cost of the moves on hidden transitions,
+            'fitness': 1.0,
+            'bwc': the best worst cost as in pm4py alignments
+        }
+        None if the trace is not proved to fit
+    """
+    max_states = exec_utils.get_param_value(Parameters.MAX_LOOKAHEAD_STATES, parameters, DEFAULT_MAX_LOOKAHEAD_STATES)
+    replay_result = _replay(trace, net, initial_marking, final_marking, max_states, hidden_only=True)
+    if replay_result is None:
+        return None
+    alignment, cost = replay_result
+    return _add_fitness({'alignment': alignment, 'cost': cost}, trace, net, initial_marking, final_marking, parameters)
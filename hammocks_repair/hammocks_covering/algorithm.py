@@ -2,13 +2,14 @@ from enum import Enum
 from typing import Optional, Dict, Any, Union, Iterable, List, Tuple, Sequence
 
 from pm4py.objects.petri_net.obj import PetriNet
-from pm4py.objects.petri_net.utils import check_soundness
 from pm4py.util import exec_utils
 
 from hammocks_repair.hammocks_covering.obj import Hammock
-from hammocks_repair.hammocks_covering.variants import minimal_hammock
+from hammocks_repair.hammocks_covering.variants import minimal_hammock, dominators_hammock, decomposition_tree
 from hammocks_repair.hammocks_covering.variants.minimal_hammock import NodeTypes
+from hammocks_repair.utils import net_analysis
 from hammocks_repair.utils.pn_typing import NetNode
+from hammocks_repair.utils.union_find import UnionFind
 
 
 class Variants(Enum):
@@ -16,11 +17,17 @@ class Variants(Enum):
     algorithms for searching the minimal hammock covering the given set of nodes
     """
     DEFAULT_ALGO = minimal_hammock
+    DOMINATORS = dominators_hammock  # queries on the dominator trees of the net, see dominators_hammock.HammockIndex
+    DECOMPOSITION_TREE = decomposition_tree  # lookups in the hammocks nesting tree, coarser than the minimal hammocks, see decomposition_tree
 
 
 class Parameters(Enum):
     HAMMOCK_PERMITTED_SOURCE_NODE_TYPE = minimal_hammock.Parameters.PARAM_SOURCE_NODE_TYPE.value
     HAMMOCK_PERMITTED_SINK_NODE_TYPE = minimal_hammock.Parameters.PARAM_SINK_NODE_TYPE.value
+    NET_GRAPH = minimal_hammock.Parameters.PARAM_NET_GRAPH.value  # only for Variants.DEFAULT_ALGO
+    HAMMOCK_LOCAL_SEARCH = minimal_hammock.Parameters.PARAM_LOCAL_SEARCH.value  # only for Variants.DEFAULT_ALGO
+    HAMMOCK_INDEX = dominators_hammock.Parameters.PARAM_HAMMOCK_INDEX.value  # only for Variants.DOMINATORS
+    HAMMOCK_TREE = decomposition_tree.Parameters.PARAM_HAMMOCK_TREE.value  # only for Variants.DECOMPOSITION_TREE
 
 
 DEFAULT_HAMMOCK_PERMITTED_SOURCE_NODE_TYPE = NodeTypes.PLACE_TYPE
@@ -44,20 +51,25 @@ def apply(net: PetriNet, covered_nodes: Union[Sequence[NetNode], Iterable[Tuple[
         Parameters of the algorithm:
             Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_HAMMOCK_PERMITTED_SOURCE_NODE_TYPE
             Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE - permitted node type of the hammock's sink (ORed NodeTypes), by default: DEFAULT_HAMMOCK_PERMITTED_SINK_NODE_TYPE
+            Parameters.NET_GRAPH - minimal_hammock.NetGraph of the net for Variants.DEFAULT_ALGO, by default: built once per call
+            Parameters.HAMMOCK_LOCAL_SEARCH - search the paths near the covered nodes first for Variants.DEFAULT_ALGO, by default: minimal_hammock.DEFAULT_LOCAL_SEARCH
+            Parameters.HAMMOCK_INDEX - dominators_hammock.HammockIndex of the net for Variants.DOMINATORS, by default: built once per call
+            Parameters.HAMMOCK_TREE - decomposition_tree.HammockTree of the net for Variants.DECOMPOSITION_TREE, by default: built once per call
     variant
         Variants of the algorithm, possible values:
             - Variants.DEFAULT_ALGO
+            - Variants.DOMINATORS
+            - Variants.DECOMPOSITION_TREE
 
     Returns
     ------------
     hammocks
         List of covering hammocks
     """
-    if not check_soundness.check_wfnet(net):
+    if not net_analysis.check_wfnet(net):
         raise Exception("Trying to apply hammocks covering search on a Petri Net that is not a WF-net")
 
-    net_source = check_soundness.check_source_place_presence(net)
-    net_sink = check_soundness.check_sink_place_presence(net)
+    net_source, net_sink = net_analysis.get_source_and_sink(net)
 
     if as_pairs:
         return _apply_to_graph(net, net_source, net_sink, covered_nodes, parameters, variant)
@@ -65,44 +77,81 @@ def apply(net: PetriNet, covered_nodes: Union[Sequence[NetNode], Iterable[Tuple[
         return _apply_to_set(net, net_source, net_sink, covered_nodes, parameters, variant)
 
 
-def _apply_to_set(net: PetriNet, net_source: PetriNet.Place, net_sink: PetriNet.Place, covered_nodes: Sequence[NetNode], parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO) -> Hammock:
-    linked_pairs = []
-    for i in range(1, len(covered_nodes)):
-        linked_pairs.append((covered_nodes[i-1], covered_nodes[i]))
-    return _apply_to_graph(net, net_source, net_sink, linked_pairs, parameters)[0]
+def apply_many(net: PetriNet, covered_nodes_sets: Iterable[Sequence[NetNode]], parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO) -> List[Hammock]:
+    """
+    Find the hammock covering each of the `covered_nodes_sets`, the same as apply() with as_pairs=False for every set,
+    but the net is checked and the search structures of the variant are built once for all the sets
+
+    Parameters
+    ------------
+    net
+        a Petri net
+    covered_nodes_sets
+        sets of vertices, each to be covered by one hammock
+    parameters
+        the same as for apply()
+    variant
+        the same as for apply()
+
+    Returns
+    ------------
+    hammocks
+        The covering hammocks in the order of the `covered_nodes_sets`
+    """
+    if not net_analysis.check_wfnet(net):
+        raise Exception("Trying to apply hammocks covering search on a Petri Net that is not a WF-net")
 
+    net_source, net_sink = net_analysis.get_source_and_sink(net)
 
-def _get_component(graph, v):  # bfs
-    cur_level = [v]
-    used = {v}
+    parameters = _with_search_structures(net_source, net_sink, parameters, variant)
+    return [_apply_to_set(net, net_source, net_sink, list(covered_nodes), parameters, variant) for covered_nodes in covered_nodes_sets]
 
-    while cur_level:
-        next_level = []
-        for next_node in graph[v]:
-            if next_node not in used:
-                used.add(next_node)
-                next_level.append(next_node)
-        cur_level = next_level
-    return used
 
+def _apply_to_set(net: PetriNet, net_source: PetriNet.Place, net_sink: PetriNet.Place, covered_nodes: Sequence[NetNode], parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO) -> Hammock:
+    linked_pairs = []
+    for i in range(1, len(covered_nodes)):
+        linked_pairs.append((covered_nodes[i-1], covered_nodes[i]))
+    return _apply_to_graph(net, net_source, net_sink, linked_pairs, parameters, variant)[0]
 
-def _add_edge(u, v, graph):
-    if u not in graph:
-        graph[u] = set()
-    graph[u].add(v)
-    if v not in graph:
-        graph[v] = set()
-    graph[v].add(u)
 
+def _with_search_structures(net_source: PetriNet.Place, net_sink: PetriNet.Place, parameters: Optional[Dict[Any, Any]], variant: Variants) -> Optional[Dict[Any, Any]]:
+    """
+    Returns
+    ------------
+    parameters
+        The copy of the `parameters` with the search structures of the variant built for the net (if not given),
+        so they are shared by all the queries
+    """
+    if variant == Variants.DEFAULT_ALGO and exec_utils.get_param_value(Parameters.NET_GRAPH, parameters, None) is None:
+        parameters = dict(parameters) if parameters is not None else {}
+        parameters[Parameters.NET_GRAPH] = minimal_hammock.NetGraph(net_source, net_sink)
+    elif variant == Variants.DOMINATORS and exec_utils.get_param_value(Parameters.HAMMOCK_INDEX, parameters, None) is None:
+        parameters = dict(parameters) if parameters is not None else {}
+        parameters[Parameters.HAMMOCK_INDEX] = dominators_hammock.HammockIndex(net_source, net_sink)
+    elif variant == Variants.DECOMPOSITION_TREE and exec_utils.get_param_value(Parameters.HAMMOCK_TREE, parameters, None) is None:
+        parameters = dict(parameters) if parameters is not None else {}
+        parameters[Parameters.HAMMOCK_TREE] = decomposition_tree.HammockTree(
+            net_source, net_sink,
+            exec_utils.get_param_value(Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE, parameters, DEFAULT_HAMMOCK_PERMITTED_SOURCE_NODE_TYPE),
+            exec_utils.get_param_value(Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE, parameters, DEFAULT_HAMMOCK_PERMITTED_SINK_NODE_TYPE))
+    return parameters
+
+
+def _apply_to_graph(net: PetriNet, net_source: PetriNet.Place, net_sink: PetriNet.Place, linked_pairs: Iterable[Tuple[NetNode, NetNode]], parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO,
+                    covering_hammocks: Iterable[Hammock] = ()) -> List[Hammock]:
+    """
+    covering_hammocks
+        Hammocks covering the previously linked pairs, only the ones intersecting the components of the `linked_pairs` are recalculated
+    """
+    parameters = _with_search_structures(net_source, net_sink, parameters, variant)
 
-def _apply_to_graph(net: PetriNet, net_source: PetriNet.Place, net_sink: PetriNet.Place, linked_pairs: Iterable[Tuple[NetNode, NetNode]], parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO) -> List[Hammock]:
-    cr_graph = {}  # linked_pairs -> graph
+    components = UnionFind()  # nodes that should be in one hammock: linked pairs, transitions with the same label, covered nodes
     nodes_to_cover = set()
 
     for u, v in linked_pairs:
         nodes_to_cover.add(u)
         nodes_to_cover.add(v)
-        _add_edge(u, v, cr_graph)
+        components.union(u, v)
 
     # special case for transitions sharing the same label
     trans_by_label = {}
@@ -114,37 +163,100 @@ def _apply_to_graph(net: PetriNet, net_source: PetriNet.Place, net_sink: PetriNe
         trans_by_label[trans.label].append(trans)
     for transitions_with_same_label in trans_by_label.values():
         for i in range(1, len(transitions_with_same_label)):
-            _add_edge(transitions_with_same_label[i-1], transitions_with_same_label[i], cr_graph)
+            components.union(transitions_with_same_label[i-1], transitions_with_same_label[i])
     # ––––––––––––––––––––––––––––––––––––––––––––––––
 
-    cr_graph_nodes = set(cr_graph.keys())
-    hammocks = {}  # {node : covering hammock}
+    covering_hammocks = list(covering_hammocks)
+    for hammock in covering_hammocks:
+        for node in hammock.nodes:
+            components.union(hammock.source, node)
+
+    hammocks = {}  # {root of the component : covering hammock}
+    # the covering hammock is kept if it is the only one in its component and no new pair is linked to it
+    linked_roots = {components.find(node) for node in nodes_to_cover}
+    hammocks_by_root = {}
+    for hammock in covering_hammocks:
+        hammocks_by_root.setdefault(components.find(hammock.source), []).append(hammock)
+    for root, component_hammocks in hammocks_by_root.items():
+        if len(component_hammocks) == 1 and root not in linked_roots:
+            hammocks[root] = component_hammocks[0]
+        else:
+            nodes_to_cover.add(root)
+
     for uncovered_node in nodes_to_cover:
-        if uncovered_node in hammocks:
+        if components.find(uncovered_node) in hammocks:
             continue
 
-        component = _get_component(cr_graph, uncovered_node)
+        component = set(components.members(uncovered_node))
 
         while True:
             cur_hammock = exec_utils.get_variant(variant).apply(component, net_source, net_sink, parameters)
 
-            new_nodes = set()
+            intersected = False
             for node in cur_hammock.nodes:
-                if node in component or node in new_nodes:
+                if node not in components:
                     continue
-                elif node in hammocks:  # intersection with another hammock
-                    intersected_hammock = hammocks[node]
-                    for other_node in intersected_hammock.nodes:
-                        hammocks.pop(other_node)
-                        new_nodes.add(other_node)
-                elif node in cr_graph_nodes:  # intersection with an uncovered component
-                    new_nodes.update(_get_component(cr_graph, node))
-
-            if not new_nodes:
+                root = components.find(node)
+                if root != components.find(uncovered_node):  # intersection with another hammock or an uncovered component
+                    hammocks.pop(root, None)
+                    components.union(uncovered_node, node)
+                    intersected = True
+
+            if not intersected:
                 break
-            component = cur_hammock.nodes.union(new_nodes)
+            component = cur_hammock.nodes.union(components.members(uncovered_node))
 
         for node in cur_hammock.nodes:
-            hammocks[node] = cur_hammock
+            components.union(uncovered_node, node)
+        hammocks[components.find(uncovered_node)] = cur_hammock
+
+    return list(hammocks.values())
 
-    return list(set(hammocks.values()))
+
+class HammockCover(object):
+    """
+    Disjoint hammocks covering the linked pairs of nodes of a net, updated as new pairs arrive
+
+    Only the hammocks touched by the new pairs are recalculated, the net should not be modified while the cover is used
+    """
+    def __init__(self, net: PetriNet, hammocks: Iterable[Hammock] = (), parameters: Optional[Dict[Any, Any]] = None, variant: Variants = Variants.DEFAULT_ALGO):
+        """
+        Parameters
+        ------------
+        net
+            a Petri net
+        hammocks
+            Hammocks covering the pairs linked before, e.g. the result of apply(net, linked_pairs, as_pairs=True)
+        parameters
+            the same as for apply()
+        variant
+            the same as for apply()
+        """
+        if not net_analysis.check_wfnet(net):
+            raise Exception("Trying to apply hammocks covering search on a Petri Net that is not a WF-net")
+
+        self.net = net
+        self.net_source, self.net_sink = net_analysis.get_source_and_sink(net)
+        self.variant = variant
+        # the search structures are shared by all the updates
+        self.parameters = _with_search_structures(self.net_source, self.net_sink, parameters, variant)
+        self.hammocks = set(hammocks)
+
+    def add_pairs(self, linked_pairs: Iterable[Tuple[NetNode, NetNode]]) -> List[Hammock]:
+        """
+        Cover the new `linked_pairs` merging the hammocks they touch
+
+        Returns
+        ------------
+        changed_hammocks
+            The new hammocks of the cover, the hammocks merged into them are removed from the cover
+        """
+        linked_pairs = list(linked_pairs)
+        if not linked_pairs:
+            return []
+
+        hammocks = _apply_to_graph(self.net, self.net_source, self.net_sink, linked_pairs, self.parameters, self.variant,
+                                   covering_hammocks=self.hammocks)
+        changed_hammocks = [hammock for hammock in hammocks if hammock not in self.hammocks]
+        self.hammocks = set(hammocks)
+        return changed_hammocks
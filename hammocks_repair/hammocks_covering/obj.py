@@ -1,24 +1,81 @@
+from typing import Dict, Hashable
+
 from pm4py.objects.petri_net.obj import PetriNet
 
 
+def get_node_ids(net: PetriNet) -> Dict[Hashable, int]:
+    """
+    Returns
+    ------------
+    node_ids
+        {node of the net: its unique index} to keep the nodes of the hammocks as bitsets
+    """
+    return {node: i for i, node in enumerate(list(net.places) + list(net.transitions))}
+
+
 class Hammock(object):
-    def __init__(self, source=None, sink=None, nodes=None):
+    """
+    Immutable hammock: its source, sink and nodes, the hash and the size are calculated once
+
+    If the ids of the net nodes are given (see get_node_ids()), the hammock also keeps the bitset of its nodes,
+    so intersections and inclusions of hammocks built with the same ids are checked on integers
+    """
+    __slots__ = ('source', 'sink', 'nodes', 'node_ids', 'bits', '_hash', '_size')
+
+    def __init__(self, source=None, sink=None, nodes=None, node_ids=None):
         '''
         nodes contain both source and sink
         '''
-        self.source = source
-        self.sink = sink
-        self.nodes = None if nodes is None else frozenset(nodes)
+        nodes = None if nodes is None else frozenset(nodes)
+        bits = None
+        if node_ids is not None and nodes is not None:
+            bits = 0
+            for node in nodes:
+                bits |= 1 << node_ids[node]
+
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'sink', sink)
+        object.__setattr__(self, 'nodes', nodes)
+        object.__setattr__(self, 'node_ids', node_ids)
+        object.__setattr__(self, 'bits', bits)
+        object.__setattr__(self, '_hash', hash((source, sink, nodes)))
+        object.__setattr__(self, '_size', 0 if nodes is None else sum(1 for node in nodes if isinstance(node, PetriNet.Transition) and node.label is not None))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Hammock is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("Hammock is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self.source, self.sink, self.nodes, self.node_ids)
 
     def __eq__(self, other):
-        return self.source == other.source and self.sink == other.sink and self.nodes == other.nodes
+        if not isinstance(other, Hammock):
+            return NotImplemented
+        return self._hash == other._hash and self.source == other.source and self.sink == other.sink and self.nodes == other.nodes
 
     def __hash__(self):
-        return hash(self.source) + hash(self.sink) + hash(self.nodes)  # bad hash
+        return self._hash
 
     def size(self):
-        cnt = 0
-        for node in self.nodes:
-            if isinstance(node, PetriNet.Transition) and node.label is not None:
-                cnt += 1
-        return cnt
+        """
+        Returns
+        ------------
+        size
+            The number of visible transitions in the hammock
+        """
+        return self._size
+
+    def _same_ids(self, other):
+        return self.bits is not None and other.bits is not None and self.node_ids is other.node_ids
+
+    def isdisjoint(self, other: 'Hammock') -> bool:
+        if self._same_ids(other):
+            return not (self.bits & other.bits)
+        return self.nodes.isdisjoint(other.nodes)
+
+    def issubset(self, other: 'Hammock') -> bool:
+        if self._same_ids(other):
+            return self.bits & other.bits == self.bits
+        return self.nodes <= other.nodes
@@ -0,0 +1,340 @@
+"""
+Lookups of covering hammocks in a decomposition tree of a WF-net
+
+Unlike minimal_hammock and dominators_hammock, this variant doesn't answer the minimal hammock query: the result is taken
+from a laminar family of hammocks fixed for the net, so it covers the nodes and respects the permitted node types,
+but in general it's another hammock (a larger or even a smaller one), also for the ends of an arc.
+Hence hammocks_covering gives another cover with Variants.DECOMPOSITION_TREE than with Variants.DEFAULT_ALGO.
+
+The tree is assembled from one HammockIndex.minimal_hammock() query per arc of the net: the hammocks are inserted from
+the largest ones, and a hammock overlapping one already inserted is replaced with the minimal hammock covering both
+(and inserted again), consecutive hammocks of a sequence are kept as siblings. A lookup returns the smallest hammock
+of the tree covering the nodes or, if the nodes are in a run of consecutive children of that hammock,
+the union of the shortest such run, which is not a node of the tree itself.
+"""
+import json
+from enum import Enum
+from typing import Optional, Dict, Any, Union, Iterable, List
+
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.util import exec_utils
+
+from hammocks_repair.hammocks_covering.obj import Hammock
+from hammocks_repair.hammocks_covering.variants import minimal_hammock
+from hammocks_repair.hammocks_covering.variants.dominators_hammock import HammockIndex
+from hammocks_repair.hammocks_covering.variants.minimal_hammock import NodeFilter, NodeTypes
+from hammocks_repair.utils.pn_typing import NetNode
+
+
+class Parameters(Enum):
+    PARAM_SOURCE_NODE_TYPE = minimal_hammock.Parameters.PARAM_SOURCE_NODE_TYPE.value
+    PARAM_SINK_NODE_TYPE = minimal_hammock.Parameters.PARAM_SINK_NODE_TYPE.value
+    PARAM_HAMMOCK_TREE = 'hammock_tree'  # HammockTree of the net to reuse between the queries
+
+
+DEFAULT_SOURCE_NODE_TYPE = minimal_hammock.DEFAULT_SOURCE_NODE_TYPE
+DEFAULT_SINK_NODE_TYPE = minimal_hammock.DEFAULT_SINK_NODE_TYPE
+
+
+class HammockTreeNode(object):
+    def __init__(self, source: NetNode, sink: NetNode, nodes: Iterable[NetNode]):
+        self.source = source
+        self.sink = sink
+        self.nodes = frozenset(nodes)
+        self.size = sum(1 for node in self.nodes if isinstance(node, PetriNet.Transition) and node.label is not None)
+        self.parent = None
+        self.children = []
+        self.depth = 0
+
+    def hammock(self) -> Hammock:
+        return Hammock(self.source, self.sink, self.nodes)
+
+
+class HammockTree(object):
+    """
+    Nesting tree of hammocks of a WF-net, in the style of SESE decomposition
+
+    The tree contains the whole net (the root) and the minimal hammocks covering the ends of each arc,
+    the overlapping ones replaced with the minimal hammocks covering them, so any two hammocks of the tree are either nested
+    or disjoint, except for the consecutive hammocks of a sequence sharing the sink of one as the source of the other.
+    All hammocks respect the permitted node types of the source and the sink (except the root)
+
+    The smallest hammock of the tree covering a set of nodes is found with an LCA lookup,
+    it differs from the minimal hammock of the set when the latter is not in the tree
+    """
+    def __init__(self, net_source: PetriNet.Place, net_sink: PetriNet.Place,
+                 source_node_type: int = DEFAULT_SOURCE_NODE_TYPE, sink_node_type: int = DEFAULT_SINK_NODE_TYPE,
+                 hammocks: Optional[List[Hammock]] = None):
+        """
+        Parameters
+        ------------
+        net_source, net_sink
+            The source and the sink of the net
+        source_node_type, sink_node_type
+            Permitted node types of the hammocks' sources and sinks (ORed NodeTypes)
+        hammocks
+            Laminar hammocks of the tree (used for deserialization), by default: the hammocks are found in the net
+        """
+        self.net_source = net_source
+        self.net_sink = net_sink
+        self.source_node_type = source_node_type
+        self.sink_node_type = sink_node_type
+
+        if hammocks is None:
+            hammocks = self._find_hammocks()
+        self._build(hammocks)
+
+    def _find_hammocks(self) -> List[Hammock]:
+        index = HammockIndex(self.net_source, self.net_sink)
+        source_filter, sink_filter = NodeFilter(self.source_node_type), NodeFilter(self.sink_node_type)
+        net_nodes = index.dominators.as_dict().keys()
+
+        root = Hammock(self.net_source, self.net_sink, net_nodes)
+        children = {root: []}  # laminar family of hammocks as a tree
+
+        hammocks = {index.minimal_hammock([node, out_arc.target], source_filter, sink_filter)
+                    for node in net_nodes for out_arc in node.out_arcs}
+        # insertion of larger hammocks first makes most of the insertions to end in a leaf,
+        # overlapping hammocks of the same size (e.g. in a sequence) are taken in the order of the flow, so the tree is deterministic
+        def insertion_order(ham):
+            return -len(ham.nodes), index.dominators.depth(ham.source), -index.post_dominators.depth(ham.sink), ham.source.name, ham.sink.name
+
+        for hammock in sorted(hammocks, key=insertion_order):
+            parent = root
+            while hammock not in children and hammock != parent:
+                for child in children[parent]:
+                    if hammock.nodes <= child.nodes:
+                        parent = child  # descend
+                        break
+                    if not hammock.nodes.isdisjoint(child.nodes) and not child.nodes <= hammock.nodes \
+                            and not _are_consecutive(hammock, child):
+                        # overlapping hammocks are replaced with the minimal hammock covering both
+                        hammock = index.minimal_hammock(hammock.nodes | child.nodes, source_filter, sink_filter)
+                        parent = root
+                        break
+                else:
+                    nested = [child for child in children[parent] if child.nodes <= hammock.nodes]
+                    children[parent] = [child for child in children[parent] if not child.nodes <= hammock.nodes]
+                    children[parent].append(hammock)
+                    children[hammock] = nested
+
+        return list(children.keys())
+
+    def _build(self, hammocks: List[Hammock]):
+        self.tree_nodes = [HammockTreeNode(ham.source, ham.sink, ham.nodes) for ham in hammocks]
+        self.tree_nodes.sort(key=lambda tree_node: len(tree_node.nodes), reverse=True)
+        self.root = self.tree_nodes[0]
+
+        # the smallest hammocks of the tree containing the node (several for the shared nodes of consecutive hammocks),
+        # parents are processed before their children
+        self._deepest = {}
+        for tree_node in self.tree_nodes:
+            if tree_node is not self.root:
+                # the parent is the deepest hammock containing the tree_node among the ancestors of the candidates
+                for candidate in self._deepest[next(iter(tree_node.nodes))]:
+                    while not tree_node.nodes <= candidate.nodes:
+                        candidate = candidate.parent
+                    if tree_node.parent is None or candidate.depth > tree_node.parent.depth:
+                        tree_node.parent = candidate
+                tree_node.parent.children.append(tree_node)
+                tree_node.depth = tree_node.parent.depth + 1
+            for node in tree_node.nodes:
+                if tree_node.parent is not None and tree_node.parent in self._deepest[node]:
+                    self._deepest[node].remove(tree_node.parent)
+                self._deepest.setdefault(node, []).append(tree_node)
+
+    def find(self, covered_nodes: Iterable[NetNode]) -> HammockTreeNode:
+        """
+        Returns
+        ------------
+        tree_node
+            The smallest hammock of the tree that covers the `covered_nodes`,
+            or the union of the consecutive children of that hammock if they cover the nodes (not linked to the tree)
+        """
+        covered_nodes = list(covered_nodes)
+        res = None
+        for node in covered_nodes:
+            tree_nodes = self._deepest[node]
+            if res is None:
+                res = tree_nodes
+                continue
+            res = [self._lca(res_node, tree_node) for res_node in res for tree_node in tree_nodes]
+            max_depth = max(res_node.depth for res_node in res)
+            res = list({id(res_node): res_node for res_node in res if res_node.depth == max_depth}.values())
+        return self._find_in_sequence(res[0], covered_nodes)
+
+    def _find_in_sequence(self, tree_node: HammockTreeNode, covered_nodes: List[NetNode]) -> HammockTreeNode:
+        # children of the tree_node containing each of the covered nodes
+        nodes_pieces = []
+        for node in covered_nodes:
+            node_pieces = []
+            for piece in self._deepest[node]:
+                while piece.depth > tree_node.depth + 1:
+                    piece = piece.parent
+                if piece.parent is tree_node:
+                    node_pieces.append(piece)
+            if not node_pieces:
+                return tree_node
+            nodes_pieces.append(node_pieces)
+
+        # the sequence of consecutive children containing a piece of the first covered node
+        next_piece = {child.source: child for child in tree_node.children}
+        prev_piece = {child.sink: child for child in tree_node.children}
+        first_piece = nodes_pieces[0][0]
+        used = {first_piece}
+        while first_piece.source in prev_piece and prev_piece[first_piece.source] not in used \
+                and _are_consecutive(prev_piece[first_piece.source], first_piece):
+            first_piece = prev_piece[first_piece.source]
+            used.add(first_piece)
+        sequence = [first_piece]
+        while sequence[-1].sink in next_piece and next_piece[sequence[-1].sink] not in sequence \
+                and _are_consecutive(sequence[-1], next_piece[sequence[-1].sink]):
+            sequence.append(next_piece[sequence[-1].sink])
+        pos_in_sequence = {piece: pos for pos, piece in enumerate(sequence)}
+
+        # the shortest run of the sequence with a piece of each covered node
+        run_start = run_end = None
+        for node_pieces in nodes_pieces:
+            positions = [pos_in_sequence[piece] for piece in node_pieces if piece in pos_in_sequence]
+            if not positions:
+                return tree_node
+            run_start = max(positions) if run_start is None else min(run_start, max(positions))
+            run_end = min(positions) if run_end is None else max(run_end, min(positions))
+        run = sequence[run_start:run_end + 1] if run_start <= run_end else [sequence[run_start]]
+
+        if len(run) == 1:
+            return run[0]
+        if len(run) == len(tree_node.children) and run[0].source == tree_node.source and run[-1].sink == tree_node.sink:
+            return tree_node
+        res = HammockTreeNode(run[0].source, run[-1].sink, frozenset().union(*(piece.nodes for piece in run)))
+        res.parent = tree_node
+        res.depth = tree_node.depth + 1
+        return res
+
+    def sequences(self, tree_node: HammockTreeNode) -> List[List[HammockTreeNode]]:
+        """
+        Returns
+        ------------
+        sequences
+            The children of the `tree_node` split into the maximal chains of consecutive hammocks in the order of the flow
+            (a child that is not consecutive to any other one forms a chain of its own)
+        """
+        next_piece = {child.source: child for child in tree_node.children}
+        has_prev = {next_piece[child.sink] for child in tree_node.children
+                    if child.sink in next_piece and _are_consecutive(child, next_piece[child.sink])}
+
+        used = set()
+        sequences = []
+        # the chains are started from their first pieces, the rest are cycles of consecutive pieces
+        for first_piece in [child for child in tree_node.children if child not in has_prev] + tree_node.children:
+            if first_piece in used:
+                continue
+            sequence = [first_piece]
+            used.add(first_piece)
+            while sequence[-1].sink in next_piece and next_piece[sequence[-1].sink] not in used \
+                    and _are_consecutive(sequence[-1], next_piece[sequence[-1].sink]):
+                sequence.append(next_piece[sequence[-1].sink])
+                used.add(sequence[-1])
+            sequences.append(sequence)
+        return sequences
+
+    @staticmethod
+    def _lca(u: HammockTreeNode, v: HammockTreeNode) -> HammockTreeNode:
+        while u.depth > v.depth:
+            u = u.parent
+        while v.depth > u.depth:
+            v = v.parent
+        while u is not v:
+            u, v = u.parent, v.parent
+        return u
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns
+        ------------
+        tree
+            JSON-serializable representation of the tree, nodes of the net are referred by their names
+        """
+        return {
+            'net_source': self.net_source.name,
+            'net_sink': self.net_sink.name,
+            'source_node_type': self.source_node_type,
+            'sink_node_type': self.sink_node_type,
+            'hammocks': [{
+                'source': tree_node.source.name,
+                'sink': tree_node.sink.name,
+                'nodes': sorted(node.name for node in tree_node.nodes),
+                'size': tree_node.size,
+            } for tree_node in self.tree_nodes],
+        }
+
+    @classmethod
+    def from_dict(cls, tree: Dict[str, Any], net: PetriNet) -> 'HammockTree':
+        """
+        Restore the tree serialized by to_dict() for the `net` with the same names of nodes
+        """
+        nodes_by_name = {node.name: node for node in list(net.places) + list(net.transitions)}
+        hammocks = [Hammock(nodes_by_name[ham['source']], nodes_by_name[ham['sink']], [nodes_by_name[name] for name in ham['nodes']])
+                    for ham in tree['hammocks']]
+        return cls(nodes_by_name[tree['net_source']], nodes_by_name[tree['net_sink']],
+                   tree['source_node_type'], tree['sink_node_type'], hammocks)
+
+    def save(self, filepath: str):
+        with open(filepath, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filepath: str, net: PetriNet) -> 'HammockTree':
+        with open(filepath) as f:
+            return cls.from_dict(json.load(f), net)
+
+
+def _are_consecutive(ham1: Hammock, ham2: Hammock) -> bool:
+    """
+    Returns
+    ------------
+    consecutive
+        True if the hammocks share only the sink of one of them that is the source of the other
+    """
+    shared_nodes = ham1.nodes & ham2.nodes
+    return shared_nodes == {ham1.sink} == {ham2.source} or shared_nodes == {ham1.source} == {ham2.sink}
+
+
+def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
+          net_source: PetriNet.Place, net_sink: PetriNet.Place,
+          parameters: Optional[Dict[Any, Any]] = None) -> Hammock:
+    """
+    Find the smallest hammock of the decomposition tree of the net that covers the `covered_nodes`,
+    it's not the minimal hammock of the `covered_nodes` in general (see the module docstring)
+
+    Building the tree takes O(m * h log n), where m is the number of arcs and h is the size of the hammocks,
+    a query takes O(k * d), where k is the number of covered nodes and d is the depth of the tree.
+    The tree should be built once and passed in the parameters for many queries on the same net
+
+    Parameters
+    ------------
+    covered_nodes
+        The set of nodes to cover
+    net_source
+        The source node of the net
+    net_sink
+        The sink node of the net
+    parameters
+        Parameters of the algorithm:
+            - Parameters.PARAM_SOURCE_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SOURCE_NODE_TYPE
+            - Parameters.PARAM_SINK_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SINK_NODE_TYPE
+            - Parameters.PARAM_HAMMOCK_TREE - HammockTree of the net built for the same node types, by default: built for the query
+
+    Returns
+    ------------
+    hammock
+        The smallest hammock of the tree that covers the `covered_nodes`
+    """
+    source_node_type = exec_utils.get_param_value(Parameters.PARAM_SOURCE_NODE_TYPE, parameters, DEFAULT_SOURCE_NODE_TYPE)
+    sink_node_type = exec_utils.get_param_value(Parameters.PARAM_SINK_NODE_TYPE, parameters, DEFAULT_SINK_NODE_TYPE)
+
+    tree = exec_utils.get_param_value(Parameters.PARAM_HAMMOCK_TREE, parameters, None)
+    if tree is None or tree.net_source != net_source or tree.net_sink != net_sink \
+            or tree.source_node_type != source_node_type or tree.sink_node_type != sink_node_type:
+        tree = HammockTree(net_source, net_sink, source_node_type, sink_node_type)
+    return tree.find(covered_nodes).hammock()
@@ -0,0 +1,165 @@
+from collections import deque
+from enum import Enum
+from typing import Optional, Dict, Any, Union, Iterable
+
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.util import exec_utils
+
+from hammocks_repair.hammocks_covering.obj import Hammock
+from hammocks_repair.hammocks_covering.variants import minimal_hammock
+from hammocks_repair.hammocks_covering.variants.minimal_hammock import NodeFilter, NodeTypes
+from hammocks_repair.utils.dominator_tree import DominatorTree
+from hammocks_repair.utils.pn_typing import NetNode
+
+
+class Parameters(Enum):
+    PARAM_SOURCE_NODE_TYPE = minimal_hammock.Parameters.PARAM_SOURCE_NODE_TYPE.value
+    PARAM_SINK_NODE_TYPE = minimal_hammock.Parameters.PARAM_SINK_NODE_TYPE.value
+    PARAM_HAMMOCK_INDEX = 'hammock_index'  # HammockIndex of the net to reuse between the queries
+
+
+DEFAULT_SOURCE_NODE_TYPE = minimal_hammock.DEFAULT_SOURCE_NODE_TYPE
+DEFAULT_SINK_NODE_TYPE = minimal_hammock.DEFAULT_SINK_NODE_TYPE
+
+
+def _in_neighbors(node):
+    return [in_arc.source for in_arc in node.in_arcs]
+
+
+def _out_neighbors(node):
+    return [out_arc.target for out_arc in node.out_arcs]
+
+
+class HammockIndex(object):
+    """
+    Dominator tree from the source of a WF-net and post-dominator tree from its sink
+
+    The source of a hammock dominates all its nodes and the sink post-dominates them,
+    so the minimal hammock is found by climbing the trees from the LCAs of the covered nodes
+    while exploring only the nodes of the hammock itself
+
+    The index should be rebuilt after the net is modified
+    """
+    def __init__(self, net_source: PetriNet.Place, net_sink: PetriNet.Place):
+        self.net_source = net_source
+        self.net_sink = net_sink
+        self.dominators = DominatorTree(net_source, _out_neighbors)
+        self.post_dominators = DominatorTree(net_sink, _in_neighbors)
+        # distances to the ends of the net tell which covered nodes minimal_hammock starts its paths from
+        self.net_graph = minimal_hammock.NetGraph(net_source, net_sink)
+        self.net_graph.build()
+
+    def _raise(self, tree: DominatorTree, node: NetNode, node_filter: NodeFilter) -> NetNode:
+        while not node_filter.is_permitted(node) and tree.idom(node) is not None:
+            node = tree.idom(node)
+        return node
+
+    def minimal_hammock(self, covered_nodes: Iterable[NetNode], source_filter: NodeFilter, sink_filter: NodeFilter) -> Hammock:
+        """
+        Find the minimal hammock that covers the `covered_nodes`, the same as minimal_hammock.apply() finds
+        Time complexity - O((h + k) log n), where h is the number of nodes and arcs in the hammock, k is the number of covered nodes
+
+        As in minimal_hammock.apply(), the shortest paths from the covered nodes to the source and the sink of the net
+        (the ones of the NetGraph) are inside the hammock up to its source and sink, e.g. the covered node nearest
+        both to the source and to the sink of the net is an inner node unless it's both the source and the sink.
+        The source and the sink always have the permitted types, while minimal_hammock.apply() doesn't check the type of
+        the only covered node, so e.g. a single covered transition is a hammock itself there even if only places are
+        permitted, here the hammock is larger
+        """
+        covered_nodes = list(dict.fromkeys(covered_nodes))  # the order breaks ties between the paths as in minimal_hammock
+        # the next nodes of the paths from the covered nodes to the source and to the sink of the net
+        walk_to_src = min(covered_nodes, key=self.net_graph.dist_to_source.__getitem__)
+        walk_to_sink = min(covered_nodes, key=self.net_graph.dist_to_sink.__getitem__)
+
+        covered_nodes = set(covered_nodes)
+        ham_src = self._raise(self.dominators, self.dominators.lca_of(covered_nodes), source_filter)
+        ham_sink = self._raise(self.post_dominators, self.post_dominators.lca_of(covered_nodes), sink_filter)
+        nodes = covered_nodes | {ham_src, ham_sink}
+        queue = deque(nodes)
+
+        def move_bounds(new_src, new_sink):
+            # the former source and sink become inner nodes
+            nonlocal ham_src, ham_sink
+            queue.append(ham_src)
+            queue.append(ham_sink)
+            ham_src, ham_sink = new_src, new_sink
+            for new_node in (ham_src, ham_sink):
+                if new_node not in nodes:
+                    nodes.add(new_node)
+                    queue.append(new_node)
+
+        def add_node(v):
+            if v in nodes:
+                return
+            if not self.dominators.dominates(ham_src, v) or not self.post_dominators.dominates(ham_sink, v):
+                # the hammock has to grow
+                move_bounds(self._raise(self.dominators, self.dominators.lca(ham_src, v), source_filter),
+                            self._raise(self.post_dominators, self.post_dominators.lca(ham_sink, v), sink_filter))
+            nodes.add(v)
+            queue.append(v)
+
+        while queue:
+            while queue:
+                u = queue.popleft()
+                if u == ham_src and u == ham_sink:
+                    neighbors = []
+                elif u == ham_src:  # edges entering the source are outside of the hammock
+                    neighbors = _out_neighbors(u)
+                elif u == ham_sink:  # edges leaving the sink are outside of the hammock
+                    neighbors = _in_neighbors(u)
+                else:
+                    neighbors = _in_neighbors(u) + _out_neighbors(u)
+                for v in neighbors:
+                    add_node(v)
+
+            # the nodes of the paths are inner ones up to the source (sink), the paths pass through it as it (post-)dominates
+            # the covered nodes
+            while walk_to_src != ham_src:
+                if walk_to_src == ham_sink and self.post_dominators.idom(ham_sink) is not None:
+                    move_bounds(ham_src, self._raise(self.post_dominators, self.post_dominators.idom(ham_sink), sink_filter))
+                add_node(walk_to_src)
+                walk_to_src = self.net_graph.parent_to_source[walk_to_src]
+            while walk_to_sink != ham_sink:
+                if walk_to_sink == ham_src and self.dominators.idom(ham_src) is not None:
+                    move_bounds(self._raise(self.dominators, self.dominators.idom(ham_src), source_filter), ham_sink)
+                add_node(walk_to_sink)
+                walk_to_sink = self.net_graph.parent_to_sink[walk_to_sink]
+
+        return Hammock(ham_src, ham_sink, nodes)
+
+
+def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
+          net_source: PetriNet.Place, net_sink: PetriNet.Place,
+          parameters: Optional[Dict[Any, Any]] = None) -> Hammock:
+    """
+    Find the minimal hammock that covers the `covered_nodes` using the dominator trees of the net
+
+    Building the index takes O((n + m) log n), a query takes time proportional to the size of the found hammock,
+    so the index should be built once and passed in the parameters for many queries on the same net
+
+    Parameters
+    ------------
+    covered_nodes
+        The set of nodes to cover
+    net_source
+        The source node of the net
+    net_sink
+        The sink node of the net
+    parameters
+        Parameters of the algorithm:
+            - Parameters.PARAM_SOURCE_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SOURCE_NODE_TYPE
+            - Parameters.PARAM_SINK_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SINK_NODE_TYPE
+            - Parameters.PARAM_HAMMOCK_INDEX - HammockIndex of the net, by default: built for the query
+
+    Returns
+    ------------
+    hammock
+        The minimal hammock that covers the `covered_nodes`
+    """
+    index = exec_utils.get_param_value(Parameters.PARAM_HAMMOCK_INDEX, parameters, None)
+    if index is None or index.net_source != net_source or index.net_sink != net_sink:
+        index = HammockIndex(net_source, net_sink)
+
+    source_node_type = exec_utils.get_param_value(Parameters.PARAM_SOURCE_NODE_TYPE, parameters, DEFAULT_SOURCE_NODE_TYPE)
+    sink_node_type = exec_utils.get_param_value(Parameters.PARAM_SINK_NODE_TYPE, parameters, DEFAULT_SINK_NODE_TYPE)
+    return index.minimal_hammock(covered_nodes, NodeFilter(source_node_type), NodeFilter(sink_node_type))
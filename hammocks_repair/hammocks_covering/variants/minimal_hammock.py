@@ -1,5 +1,5 @@
 from copy import copy
-from typing import Optional, Dict, Any, Union, Iterable
+from typing import Optional, Dict, Any, Union, Iterable, List
 from enum import Enum
 
 from pm4py.objects.petri_net.obj import PetriNet
@@ -11,6 +11,10 @@ from hammocks_repair.hammocks_covering.obj import Hammock
 class Parameters(Enum):
     PARAM_SOURCE_NODE_TYPE = 'source_node_type'
     PARAM_SINK_NODE_TYPE = 'sink_node_type'
+    PARAM_NET_GRAPH = 'net_graph'  # NetGraph of the net to reuse between the queries
+    PARAM_LOCAL_SEARCH = 'local_search'
+    PARAM_LOCAL_SEARCH_RADIUS = 'local_search_radius'
+    PARAM_LOCAL_SEARCH_MAX_NODES = 'local_search_max_nodes'
 
 
 class NodeTypes:
@@ -21,6 +25,9 @@ class NodeTypes:
 
 DEFAULT_SOURCE_NODE_TYPE = NodeTypes.PLACE_TYPE
 DEFAULT_SINK_NODE_TYPE = NodeTypes.PLACE_TYPE
+DEFAULT_LOCAL_SEARCH = False
+DEFAULT_LOCAL_SEARCH_RADIUS = 4
+DEFAULT_LOCAL_SEARCH_MAX_NODES = 2000
 
 
 class NodeFilter:
@@ -47,51 +54,186 @@ def _get_sink_filter(parameters):
     return NodeFilter(sink_node_type)
 
 
-def _find_path(start_nodes, target_node, reverse_order=False):
+class NetGraph(object):
+    """
+    Compiled adjacency of a WF-net with the BFS trees from its source and to its sink
+
+    The trees give the shortest paths from any node to the source (against the arcs) and to the sink,
+    so they are shared by all the minimal hammock queries on the net.
+    The graph is built on the first query and should be recreated after the net is modified
+    """
+    def __init__(self, net_source: PetriNet.Place, net_sink: PetriNet.Place):
+        self.net_source = net_source
+        self.net_sink = net_sink
+        self.is_built = False
+
+    def build(self):
+        if self.is_built:
+            return
+        self.is_built = True
+
+        net_source, net_sink = self.net_source, self.net_sink
+        self.in_neighbors = {}
+        self.out_neighbors = {}
+        nodes = [net_source]
+        used = {net_source}
+        for node in nodes:
+            self.in_neighbors[node] = [in_arc.source for in_arc in node.in_arcs]
+            self.out_neighbors[node] = [out_arc.target for out_arc in node.out_arcs]
+            for next_node in self.in_neighbors[node] + self.out_neighbors[node]:
+                if next_node not in used:
+                    used.add(next_node)
+                    nodes.append(next_node)
+
+        self.dist_to_source, self.parent_to_source = self._bfs(net_source, self.out_neighbors)
+        self.dist_to_sink, self.parent_to_sink = self._bfs(net_sink, self.in_neighbors)
+
+    @staticmethod
+    def _bfs(root, neighbors):
+        dist = {root: 0}
+        parent = {root: None}
+        cur_level = [root]
+        while cur_level:
+            next_level = []
+            for node in cur_level:
+                for next_node in neighbors[node]:
+                    if next_node not in dist:
+                        dist[next_node] = dist[node] + 1
+                        parent[next_node] = node
+                        next_level.append(next_node)
+            cur_level = next_level
+        return dist, parent
+
+    def _path(self, start_nodes, dist, parent):
+        cur_node = None
+        for node in start_nodes:
+            if node not in dist:
+                raise Exception("The target_node is not reachable from the given set of nodes")
+            if cur_node is None or dist[node] < dist[cur_node]:
+                cur_node = node
+
+        path = []
+        while cur_node is not None:
+            path.append(cur_node)
+            cur_node = parent[cur_node]
+        return path
+
+    def path_to_source(self, start_nodes):
+        """
+        Returns
+        ------------
+        path
+            The minimal path from one of the `start_nodes` to the source of the net against the arcs
+        """
+        self.build()
+        return self._path(start_nodes, self.dist_to_source, self.parent_to_source)
+
+    def path_to_sink(self, start_nodes):
+        """
+        Returns
+        ------------
+        path
+            The minimal path from one of the `start_nodes` to the sink of the net
+        """
+        self.build()
+        return self._path(start_nodes, self.dist_to_sink, self.parent_to_sink)
+
+
+def _get_net_graph(net_source, net_sink, parameters):
+    net_graph = exec_utils.get_param_value(Parameters.PARAM_NET_GRAPH, parameters, None)
+    if net_graph is None or net_graph.net_source != net_source or net_graph.net_sink != net_sink:
+        net_graph = NetGraph(net_source, net_sink)
+    return net_graph
+
+
+def _in_neighbors(node):
+    return [in_arc.source for in_arc in node.in_arcs]
+
+
+def _out_neighbors(node):
+    return [out_arc.target for out_arc in node.out_arcs]
+
+
+def _local_path(start_nodes, target_node, neighbors, region):
     """
     Returns
     ------------
-    path
-        The minimal path from one of the `start_nodes` to the `target_node`
+    path, is_complete
+        The minimal path in the `region` from one of the `start_nodes` to the `target_node` (is_complete=True)
+        or to the nearest node having neighbors outside of the region (is_complete=False)
     """
     node_parent = {node: None for node in start_nodes}
-    used = set(start_nodes)
     cur_level = list(start_nodes)
-
-    while cur_level:
+    end_node = None
+    while cur_level and end_node is None:
         next_level = []
         for node in cur_level:
-            if node == target_node:  # path found
-                cur_level.clear()
+            node_neighbors = neighbors(node)
+            if node == target_node or any(next_node not in region for next_node in node_neighbors):
+                end_node = node
                 break
-
-            for arc in (node.in_arcs if reverse_order else node.out_arcs):
-                next_node = (arc.source if reverse_order else arc.target)
-                if next_node in used:
-                    continue
-                node_parent[next_node] = node
-
-                used.add(next_node)
-                next_level.append(next_node)
+            for next_node in node_neighbors:
+                if next_node not in node_parent:
+                    node_parent[next_node] = node
+                    next_level.append(next_node)
         cur_level = next_level
 
-    if target_node not in node_parent:
+    if end_node is None:
         raise Exception("The target_node is not reachable from the given set of nodes")
     path = []
-    cur_node = target_node
+    cur_node = end_node
     while cur_node is not None:
         path.append(cur_node)
         cur_node = node_parent[cur_node]
     path.reverse()
-    return path
+    return path, end_node == target_node
 
 
-def _in_neighbors(node):
-    return [in_arc.source for in_arc in node.in_arcs]
-
+def _apply_local(covered_nodes, net_source, net_sink, parameters):
+    """
+    Search for the minimal hammock in the neighbourhood of the `covered_nodes`,
+    growing it in both directions until the hammock is closed inside it
 
-def _out_neighbors(node):
-    return [out_arc.target for out_arc in node.out_arcs]
+    Returns
+    ------------
+    hammock
+        The minimal hammock or None if the neighbourhood exceeds Parameters.PARAM_LOCAL_SEARCH_MAX_NODES
+    """
+    radius = exec_utils.get_param_value(Parameters.PARAM_LOCAL_SEARCH_RADIUS, parameters, DEFAULT_LOCAL_SEARCH_RADIUS)
+    max_nodes = exec_utils.get_param_value(Parameters.PARAM_LOCAL_SEARCH_MAX_NODES, parameters, DEFAULT_LOCAL_SEARCH_MAX_NODES)
+
+    covered_nodes = list(dict.fromkeys(covered_nodes))  # the order breaks ties between the paths as in the global search
+    region = set(covered_nodes)
+    cur_level = list(covered_nodes)
+    dist = 0
+    while len(region) <= max_nodes:
+        while cur_level and dist < radius:
+            next_level = []
+            for node in cur_level:
+                for next_node in _in_neighbors(node) + _out_neighbors(node):
+                    if next_node not in region:
+                        region.add(next_node)
+                        next_level.append(next_node)
+            cur_level = next_level
+            dist += 1
+
+        path_to_src, is_complete_to_src = _local_path(covered_nodes, net_source, _in_neighbors, region)
+        path_to_sink, is_complete_to_sink = _local_path(covered_nodes, net_sink, _out_neighbors, region)
+        hammock = _apply(covered_nodes, path_to_src, path_to_sink, net_source, net_sink, _in_neighbors, _out_neighbors, parameters,
+                         region, is_complete_to_src, is_complete_to_sink)
+        # an incomplete path may lead away from the end of the net, then the hammock closes around the wrong node
+        # and swallows the end of the net
+        if hammock is not None and (net_source not in hammock.nodes or net_source == hammock.source) \
+                and (net_sink not in hammock.nodes or net_sink == hammock.sink):
+            return hammock
+        radius *= 2
+    return None
+
+
+def _apply_global(covered_nodes, net_graph, parameters):
+    net_graph.build()
+    return _apply(covered_nodes, net_graph.path_to_source(covered_nodes), net_graph.path_to_sink(covered_nodes), net_graph.net_source, net_graph.net_sink,
+                  net_graph.in_neighbors.__getitem__, net_graph.out_neighbors.__getitem__, parameters)
 
 
 def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
@@ -113,20 +255,75 @@ def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
         Parameters of the algorithm:
             - Parameters.PARAM_SOURCE_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SOURCE_NODE_TYPE
             - Parameters.PARAM_SINK_NODE_TYPE - permitted node type of the hammock's source (ORed NodeTypes), by default: DEFAULT_SINK_NODE_TYPE
+            - Parameters.PARAM_NET_GRAPH - NetGraph of the net, by default: built for the query
+            - Parameters.PARAM_LOCAL_SEARCH - if True, the hammock is searched in the growing neighbourhood of the `covered_nodes` first,
+                                              the whole net is searched only if the neighbourhood becomes too large, by default: DEFAULT_LOCAL_SEARCH
+            - Parameters.PARAM_LOCAL_SEARCH_RADIUS - initial radius of the neighbourhood (doubled on each attempt), by default: DEFAULT_LOCAL_SEARCH_RADIUS
+            - Parameters.PARAM_LOCAL_SEARCH_MAX_NODES - maximal number of nodes in the neighbourhood, by default: DEFAULT_LOCAL_SEARCH_MAX_NODES
 
     Returns
     ------------
     hammock
         The minimal hammock that covers the `covered_nodes`
     """
+    return apply_many([covered_nodes], net_source, net_sink, parameters)[0]
+
+
+def apply_many(covered_nodes_sets: Iterable[Iterable[Union[PetriNet.Place, PetriNet.Transition]]],
+               net_source: PetriNet.Place, net_sink: PetriNet.Place,
+               parameters: Optional[Dict[Any, Any]] = None) -> List[Hammock]:
+    """
+    Find the minimal hammocks covering each of the `covered_nodes_sets`
+    The BFS trees and the adjacency of the net are built once for all the queries
+
+    Parameters
+    ------------
+    covered_nodes_sets
+        The sets of nodes to cover
+    net_source
+        The source node of the net
+    net_sink
+        The sink node of the net
+    parameters
+        the same as for apply()
+
+    Returns
+    ------------
+    hammocks
+        The minimal hammocks in the order of the `covered_nodes_sets`
+    """
+    net_graph = _get_net_graph(net_source, net_sink, parameters)  # built only if the global search is needed
+    local_search = exec_utils.get_param_value(Parameters.PARAM_LOCAL_SEARCH, parameters, DEFAULT_LOCAL_SEARCH)
+
+    hammocks = []
+    for covered_nodes in covered_nodes_sets:
+        hammock = _apply_local(covered_nodes, net_source, net_sink, parameters) if local_search else None
+        if hammock is None:
+            hammock = _apply_global(covered_nodes, net_graph, parameters)
+        hammocks.append(hammock)
+    return hammocks
+
+
+def _apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]], path_to_src, path_to_sink,
+           net_source: PetriNet.Place, net_sink: PetriNet.Place, in_neighbors, out_neighbors, parameters: Optional[Dict[Any, Any]] = None,
+           region=None, is_complete_to_src=True, is_complete_to_sink=True) -> Optional[Hammock]:
+    """
+    Returns
+    ------------
+    hammock
+        The minimal hammock found along the paths to the source and the sink of the net,
+        None if the search leaves the `region` or needs the nodes beyond the end of an incomplete path
+    """
     covered_nodes = set(covered_nodes)
 
     SRC = 0
     SINK = 1
 
     path_to = [None, None]
-    path_to[SRC] = _find_path(covered_nodes, net_source, reverse_order=True)
-    path_to[SINK] = _find_path(covered_nodes, net_sink)
+    path_to[SRC] = path_to_src
+    path_to[SINK] = path_to_sink
+    is_complete = [is_complete_to_src, is_complete_to_sink]
+    net_end = [net_source, net_sink]
 
     pos_in_path = [None, None]
     pos_in_path[SRC] = {node: pos for pos, node in enumerate(path_to[SRC])}
@@ -152,9 +349,12 @@ def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
         new_src_ind = src_ind
         new_sink_ind = sink_ind
 
-        while new_src_ind != len(path_to[SRC]) - 1 and not node_filter[SRC].is_permitted(path_to[SRC][new_src_ind]):
+        # the index -1 (nothing found yet) refers to the end of the net, not to the last node of a path that may be incomplete
+        while new_src_ind != len(path_to[SRC]) - 1 and \
+                not node_filter[SRC].is_permitted(path_to[SRC][new_src_ind] if new_src_ind != -1 else net_end[SRC]):
             new_src_ind += 1
-        while new_sink_ind != len(path_to[SINK]) - 1 and not node_filter[SINK].is_permitted(path_to[SINK][new_sink_ind]):
+        while new_sink_ind != len(path_to[SINK]) - 1 and \
+                not node_filter[SINK].is_permitted(path_to[SINK][new_sink_ind] if new_sink_ind != -1 else net_end[SINK]):
             new_sink_ind += 1
 
         for u in new_nodes:
@@ -163,6 +363,10 @@ def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
             if u in path_to_set[SINK]:
                 new_sink_ind = max(new_sink_ind, pos_in_path[SINK][u])
 
+        for i, new_ind in [(SRC, new_src_ind), (SINK, new_sink_ind)]:
+            if new_ind == len(path_to[i]) - 1 and not is_complete[i] and not node_filter[i].is_permitted(path_to[i][new_ind]):
+                return None  # the source/sink is further than the end of the path
+
         ham_src = path_to[SRC][new_src_ind]
         ham_sink = path_to[SINK][new_sink_ind]
 
@@ -176,23 +380,29 @@ def apply(covered_nodes: Iterable[Union[PetriNet.Place, PetriNet.Transition]],
             for i in range(max(0, src_ind), new_src_ind):
                 gray.add(path_to[SRC][i])
             if ham_src != ham_sink:
-                for u in _out_neighbors(ham_src):
+                for u in out_neighbors(ham_src):
                     if u not in black and u not in gray:
+                        if region is not None and u not in region:
+                            return None
                         new_nodes.add(u)
             src_ind = new_src_ind
         if new_sink_ind != sink_ind:
             for i in range(max(0, sink_ind), new_sink_ind):
                 gray.add(path_to[SINK][i])
             if ham_src != ham_sink:
-                for u in _in_neighbors(ham_sink):
+                for u in in_neighbors(ham_sink):
                     if u not in black and u not in gray:
+                        if region is not None and u not in region:
+                            return None
                         new_nodes.add(u)
             sink_ind = new_sink_ind
 
         # step 3
         for u in gray:
-            for v in _in_neighbors(u) + _out_neighbors(u):
+            for v in in_neighbors(u) + out_neighbors(u):
                 if v not in black and v not in gray:
+                    if region is not None and v not in region:
+                        return None
                     new_nodes.add(v)
             black.add(u)
         gray.clear()
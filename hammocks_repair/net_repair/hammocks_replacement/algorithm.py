@@ -1,24 +1,30 @@
+import importlib
+import numpy as np
 import pandas as pd
 
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import Optional, Dict, Any, Tuple, Union
-import time
+from itertools import repeat
+from types import ModuleType
+from typing import Optional, Dict, Any, Tuple, Union, Set, List
 
-from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
 from pm4py.algo.discovery.inductive import algorithm as inductive_miner
-from pm4py.objects.conversion.log import converter as log_converter
-from pm4py.objects.log.obj import EventLog, EventStream
+from pm4py.objects.log.obj import EventLog, EventStream, Trace, Event
 from pm4py.objects.petri_net.obj import PetriNet, Marking
 from pm4py.objects.petri_net.utils import check_soundness, petri_utils
 from pm4py.util import exec_utils, xes_constants, typing, constants as pm4_constants
 
-from hammocks_repair.conformance_analysis import bad_pairs_selection
+from hammocks_repair.conformance_analysis import bad_pairs_selection, log_alignments
 from hammocks_repair.hammocks_covering import algorithm as hammocks_covering
-from hammocks_repair.utils import net_helpers
+from hammocks_repair.utils import net_helpers, net_analysis
+from hammocks_repair.utils.encoded_log import EncodedLog
+from hammocks_repair.net_repair.hammocks_replacement import subprocess_cache
+from hammocks_repair.net_repair.hammocks_replacement.subprocess_cache import SubprocessCache
 import hammocks_repair.net_repair.naive_log_only.algorithm as naive_log_only_algo
 
 Hammock = hammocks_covering.Hammock
 NodeTypes = hammocks_covering.NodeTypes
+ConformanceBackends = log_alignments.Backends
 
 
 class Parameters(Enum):
@@ -26,7 +32,14 @@ class Parameters(Enum):
     HAMMOCK_PERMITTED_SINK_NODE_TYPE = hammocks_covering.Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE.value
     SUBPROCESS_MINER_ALGO = 'hammocks_replacement_subprocess_miner_algo'  # any algorithm
     SUBPROCESS_MINER_ALGO_VARIANT = 'hammocks_replacement_subprocess_miner_algo_variant'
+    SUBPROCESS_N_JOBS = 'hammocks_replacement_subprocess_n_jobs'  # number of worker processes to discover the subprocesses in
+    SUBPROCESS_CACHE = 'hammocks_replacement_subprocess_cache'  # SubprocessCache or path to its file
     PREREPAIR_VARIANT = 'hammocks_replacement_prerepair_variant'  # from PrerepairVariants
+    CONFORMANCE_BACKEND = log_alignments.Parameters.BACKEND.value  # from ConformanceBackends
+    ALIGNMENTS_CACHE = log_alignments.Parameters.ALIGNMENTS_CACHE.value
+    ALIGNMENTS_N_JOBS = log_alignments.Parameters.N_JOBS.value
+    ALIGNMENTS_PREFILTER_FITTING = log_alignments.Parameters.PREFILTER_FITTING.value
+    ALIGNMENTS_MAX_TIME_TRACE = log_alignments.Parameters.MAX_ALIGN_TIME_TRACE.value
 
     LOG_ACTIVITY_KEY = pm4_constants.PARAMETER_CONSTANT_ACTIVITY_KEY
     LOG_CASE_KEY = pm4_constants.PARAMETER_CONSTANT_CASEID_KEY
@@ -38,12 +51,31 @@ class PrerepairVariants(Enum):
 
 DEFAULT_SUBPROCESS_MINER_ALGO = inductive_miner
 DEFAULT_SUBPROCESS_MINER_ALGO_VARIANT = inductive_miner.DEFAULT_VARIANT_LOG
+DEFAULT_SUBPROCESS_N_JOBS = 1
 DEFAULT_PREREPAIR_VARIANT = PrerepairVariants.NAIVE_LOG_ONLY
 DEFAULT_LOG_ACTIVITY_KEY = xes_constants.DEFAULT_NAME_KEY
 DEFAULT_LOG_CASE_KEY = pm4_constants.CASE_CONCEPT_NAME
 
 
-def discover_subprocess(hammock: Hammock, log: Union[pd.DataFrame, EventLog, EventStream], parameters: Optional[Dict[Any, Any]] = None) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
+def encode_log(log: Union[pd.DataFrame, EventLog, EventStream, EncodedLog], parameters: Optional[Dict[Any, Any]] = None) -> EncodedLog:
+    """
+    Encode the `log` once to share it between the subprocess discoveries of all the hammocks (see discover_subprocess())
+
+    Parameters
+    ------------
+    parameters
+        Parameters of the algorithm:
+            Parameters.LOG_ACTIVITY_KEY - The name of the attribute to be used as activity for process discovery
+            Parameters.LOG_CASE_KEY - The name of the attribute to be used as case identifier
+    """
+    if isinstance(log, EncodedLog):
+        return log
+    log_activity_key = exec_utils.get_param_value(Parameters.LOG_ACTIVITY_KEY, parameters, DEFAULT_LOG_ACTIVITY_KEY)
+    log_case_key = exec_utils.get_param_value(Parameters.LOG_CASE_KEY, parameters, DEFAULT_LOG_CASE_KEY)
+    return EncodedLog.from_log(log, log_activity_key, log_case_key)
+
+
+def discover_subprocess(hammock: Hammock, log: Union[pd.DataFrame, EventLog, EventStream, EncodedLog], parameters: Optional[Dict[Any, Any]] = None) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
     """
     Discover a subprocess on activities included in the hammock (which is potentially replaced), based on the log
 
@@ -51,10 +83,13 @@ def discover_subprocess(hammock: Hammock, log: Union[pd.DataFrame, EventLog, Eve
     ------------
     hammock
         A hammock to be replaced
+    log
+        Event log, pass the log encoded by encode_log() to discover the subprocesses of several hammocks
     parameters
         Parameters of the algorithm:
             Parameters.SUBPROCESS_MINER_ALGO - A process discovery algorithm to be used for discovering a subprocess (apply() method is used)
             Parameters.SUBPROCESS_MINER_ALGO_VARIANT - A variant of the process discovery algorithm to be used
+            Parameters.SUBPROCESS_CACHE - SubprocessCache (or path to its file) to reuse the discovered subprocesses from, by default: None (no cache)
             Parameters.LOG_ACTIVITY_KEY - The name of the attribute to be used as activity for process discovery
             Parameters.LOG_CASE_KEY - The name of the attribute to be used as case identifier
 
@@ -62,41 +97,184 @@ def discover_subprocess(hammock: Hammock, log: Union[pd.DataFrame, EventLog, Eve
     ------------
         net, net_source, net_sink - discovered net with source and sink nodes
     """
+    projections = encode_log(log, parameters).project_many([_get_activities_labels(hammock)])
+    return _open_cache_and_discover([hammock], projections, parameters)[0]
 
-    log_activity_key = exec_utils.get_param_value(Parameters.LOG_ACTIVITY_KEY, parameters, DEFAULT_LOG_ACTIVITY_KEY)
-    log_case_key = exec_utils.get_param_value(Parameters.LOG_CASE_KEY, parameters, DEFAULT_LOG_CASE_KEY)
 
-    df = log_converter.apply(log, variant=log_converter.Variants.TO_DATA_FRAME)
-    hammock_activities_labels = {node.label for node in hammock.nodes if isinstance(node, PetriNet.Transition) and node.label is not None}
-    filtered_df = df[df[log_activity_key].isin(hammock_activities_labels)]
+def _get_activities_labels(hammock: Hammock) -> Set[str]:
+    return {node.label for node in hammock.nodes if isinstance(node, PetriNet.Transition) and node.label is not None}
+
+
+def _get_subprocess_name(hammock: Hammock) -> str:
+    # the hammocks replaced in the net are disjoint, so the names of their sources are unique
+    return hammock.source.name
+
 
-    # don't forget about empty subtraces
-    is_empty_subtrace = df[log_case_key].nunique() > filtered_df[log_case_key].nunique()
-    if len(filtered_df) == 0:  # what if filtered log is empty
+def _mine_variants(variants: Dict[Tuple[str, ...], int], parameters: Optional[Dict[Any, Any]] = None) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
+    """
+    Discover a net with the SUBPROCESS_MINER_ALGO on the (non-empty) {variant: number of cases} of a projected log
+
+    Returns
+    ------------
+        net, net_source, net_sink - the discovered net with its source and sink places
+    """
+    miner_algo = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO, parameters, DEFAULT_SUBPROCESS_MINER_ALGO)
+    miner_algo_variant = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO_VARIANT, parameters, DEFAULT_SUBPROCESS_MINER_ALGO_VARIANT)
+    # the miners accepting the variants (e.g. the inductive miner) get them as is,
+    # the rest get the log of the variants
+    if hasattr(miner_algo, 'apply_variants'):
+        miner_apply, miner_input = miner_algo.apply_variants, variants
+    else:
+        log_activity_key = exec_utils.get_param_value(Parameters.LOG_ACTIVITY_KEY, parameters, DEFAULT_LOG_ACTIVITY_KEY)
+        miner_apply, miner_input = miner_algo.apply, _variants_to_log(variants, log_activity_key)
+    if miner_algo_variant is None:
+        net, _, _ = miner_apply(miner_input, parameters=parameters)
+    else:
+        net, _, _ = miner_apply(miner_input, variant=miner_algo_variant, parameters=parameters)
+
+    return net, check_soundness.check_source_place_presence(net), check_soundness.check_sink_place_presence(net)
+
+
+def _complete_subprocess(net: Optional[PetriNet], net_source: Optional[PetriNet.Place], net_sink: Optional[PetriNet.Place],
+                         is_empty_subtrace: bool, name: str) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
+    """
+    Parameters
+    ------------
+    net, net_source, net_sink
+        The mined subprocess, None if the projected log is empty
+    is_empty_subtrace
+        True if some traces of the log have no activities of the hammock
+    name
+        Unique name of the subprocess, the source and the sink of the subprocess are named after it
+    """
+    if net is None:  # what if filtered log is empty
         net = PetriNet()
         net_source = petri_utils.add_place(net)
         net_sink = petri_utils.add_place(net)
-    else:
-        miner_algo = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO, parameters, DEFAULT_SUBPROCESS_MINER_ALGO)
-        miner_algo_variant = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO_VARIANT, parameters, DEFAULT_SUBPROCESS_MINER_ALGO_VARIANT)
-        if miner_algo_variant is None:
-            net, _, _ = miner_algo.apply(filtered_df, parameters=parameters)
-        else:
-            net, _, _ = miner_algo.apply(filtered_df, variant=miner_algo_variant, parameters=parameters)
-
-        net_source = check_soundness.check_source_place_presence(net)
-        net_sink = check_soundness.check_sink_place_presence(net)
 
     if is_empty_subtrace:  # don't forget about empty subtraces
         hidden_trans = petri_utils.add_transition(net)
         petri_utils.add_arc_from_to(net_source, hidden_trans, net)
         petri_utils.add_arc_from_to(hidden_trans, net_sink, net)
 
-    net_source.name = 'hammock_src_' + str(time.time())
-    net_sink.name = 'hammock_sink_' + str(time.time())
+    net_source.name = 'hammock_src_' + name
+    net_sink.name = 'hammock_sink_' + name
     return net, net_source, net_sink
 
 
+def _variants_to_log(variants: Dict[Tuple[str, ...], int], activity_key: str) -> EventLog:
+    return EventLog([Trace([Event({activity_key: activity}) for activity in variant])
+                     for variant, count in variants.items() for _ in range(count)])
+
+
+def _to_reference(algo: Any) -> Any:
+    """
+    Modules (and enum members with module values, i.e. the variants of pm4py algorithms) can't be pickled,
+    so they are passed to the worker processes by their import paths
+    """
+    if isinstance(algo, ModuleType):
+        return _AlgoReference(algo.__name__)
+    if isinstance(algo, Enum) and isinstance(algo.value, ModuleType):
+        return _AlgoReference(type(algo).__module__, type(algo).__qualname__ + '.' + algo.name)
+    return algo
+
+
+class _AlgoReference(object):
+    def __init__(self, module_name: str, qualname: Optional[str] = None):
+        self.module_name = module_name
+        self.qualname = qualname
+
+    def resolve(self) -> Any:
+        algo = importlib.import_module(self.module_name)
+        for attr in self.qualname.split('.') if self.qualname is not None else []:
+            algo = getattr(algo, attr)
+        return algo
+
+
+def _mine_variants_job(variants: Dict[Tuple[str, ...], int], miner_algo: Any, miner_algo_variant: Any,
+                       parameters: Dict[Any, Any]) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
+    parameters = dict(parameters)
+    parameters[Parameters.SUBPROCESS_MINER_ALGO] = miner_algo.resolve() if isinstance(miner_algo, _AlgoReference) else miner_algo
+    parameters[Parameters.SUBPROCESS_MINER_ALGO_VARIANT] = miner_algo_variant.resolve() if isinstance(miner_algo_variant, _AlgoReference) else miner_algo_variant
+    return _mine_variants(variants, parameters)
+
+
+def _get_miner_parameters(parameters: Optional[Dict[Any, Any]]) -> Dict[Any, Any]:
+    """
+    Returns
+    ------------
+    miner_parameters
+        The parameters of the miner, i.e. without the parameters of the repair (and the miner itself)
+    """
+    excluded_params = set(Parameters)
+    excluded_params.update({param.value for param in Parameters})
+    return {key: value for key, value in (parameters if parameters is not None else {}).items() if key not in excluded_params}
+
+
+def _get_job_parameters(parameters: Optional[Dict[Any, Any]]) -> Dict[Any, Any]:
+    """
+    Returns
+    ------------
+    job_parameters
+        The parameters of the miner with the activity key the projected logs are built with
+    """
+    job_parameters = _get_miner_parameters(parameters)
+    job_parameters[Parameters.LOG_ACTIVITY_KEY.value] = exec_utils.get_param_value(Parameters.LOG_ACTIVITY_KEY, parameters, DEFAULT_LOG_ACTIVITY_KEY)
+    return job_parameters
+
+
+def _mine_many(variants_list: List[Dict[Tuple[str, ...], int]], n_jobs: int,
+               parameters: Optional[Dict[Any, Any]] = None) -> List[Tuple[PetriNet, PetriNet.Place, PetriNet.Place]]:
+    if n_jobs <= 1 or len(variants_list) <= 1:
+        return [_mine_variants(variants, parameters) for variants in variants_list]
+
+    miner_algo = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO, parameters, DEFAULT_SUBPROCESS_MINER_ALGO)
+    miner_algo_variant = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO_VARIANT, parameters, DEFAULT_SUBPROCESS_MINER_ALGO_VARIANT)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        # map() keeps the order of the hammocks, so the subprocesses are spliced in deterministically
+        return list(executor.map(_mine_variants_job, variants_list, repeat(_to_reference(miner_algo)),
+                                 repeat(_to_reference(miner_algo_variant)), repeat(_get_job_parameters(parameters))))
+
+
+def _discover_subprocesses(hammocks: List[Hammock], projections: List[Tuple[Dict[Tuple[str, ...], int], np.ndarray]], n_jobs: int,
+                           cache: Optional[SubprocessCache], parameters: Optional[Dict[Any, Any]] = None) -> List[Tuple[PetriNet, PetriNet.Place, PetriNet.Place]]:
+    """
+    Returns
+    ------------
+    subprocesses
+        net, net_source, net_sink discovered for each of the `hammocks` on its projection, in the order of the hammocks
+    """
+    mined = [None] * len(hammocks)
+    keys = [None] * len(hammocks)
+    if cache is not None:
+        miner_algo = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO, parameters, DEFAULT_SUBPROCESS_MINER_ALGO)
+        miner_algo_variant = exec_utils.get_param_value(Parameters.SUBPROCESS_MINER_ALGO_VARIANT, parameters, DEFAULT_SUBPROCESS_MINER_ALGO_VARIANT)
+        miner_parameters = _get_miner_parameters(parameters)
+        for i, (hammock, (variants, _)) in enumerate(zip(hammocks, projections)):
+            if variants:
+                keys[i] = subprocess_cache.subprocess_key(_get_activities_labels(hammock), variants, miner_algo, miner_algo_variant, miner_parameters)
+                mined[i] = cache.get(keys[i])
+
+    missing = [i for i, (variants, _) in enumerate(projections) if variants and mined[i] is None]
+    for i, subprocess in zip(missing, _mine_many([projections[i][0] for i in missing], n_jobs, parameters)):
+        mined[i] = subprocess
+        if cache is not None:
+            cache.put(keys[i], *subprocess)
+
+    return [_complete_subprocess(*(subprocess if subprocess is not None else (None, None, None)), len(empty_cases) > 0, _get_subprocess_name(hammock))
+            for hammock, subprocess, (_, empty_cases) in zip(hammocks, mined, projections)]
+
+
+def _open_cache_and_discover(hammocks: List[Hammock], projections: List[Tuple[Dict[Tuple[str, ...], int], np.ndarray]],
+                             parameters: Optional[Dict[Any, Any]] = None) -> List[Tuple[PetriNet, PetriNet.Place, PetriNet.Place]]:
+    n_jobs = exec_utils.get_param_value(Parameters.SUBPROCESS_N_JOBS, parameters, DEFAULT_SUBPROCESS_N_JOBS)
+    cache = exec_utils.get_param_value(Parameters.SUBPROCESS_CACHE, parameters, None)
+    if cache is None or isinstance(cache, SubprocessCache):
+        return _discover_subprocesses(hammocks, projections, n_jobs, cache, parameters)
+    with SubprocessCache(cache) as opened_cache:
+        return _discover_subprocesses(hammocks, projections, n_jobs, opened_cache, parameters)
+
+
 def replace_hammock(net: PetriNet, initial_marking: Marking, final_marking: Marking, hammock: Hammock,
                     subprocess_net: PetriNet, subprocess_source: PetriNet.Place, subprocess_sink: PetriNet.Place) -> Tuple[PetriNet, Marking, Marking]:
     """
@@ -168,6 +346,7 @@ def replace_hammock(net: PetriNet, initial_marking: Marking, final_marking: Mark
     for node in hammock.nodes:
         net_helpers.remove_node(net, node)
 
+    net_analysis.invalidate(net)
     return net, initial_marking, final_marking
 
 
@@ -186,13 +365,23 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking,
     alignments
         Optional alignments to be used in the algorithm.
         A parameter PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE should be set to True during their calculation.
-        if not provided, they will be calculated
+        if not provided, they will be calculated (one alignment per trace variant)
     parameters
         Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE -> Permitted node type of the hammock's source (mask of ORed NodeTypes), by default: hammocks_covering.DEFAULT_HAMMOCK_PERMITTED_SOURCE_NODE_TYPE
         Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE -> Permitted node type of the hammock's sink (mask of ORed NodeTypes), by default: hammocks_covering.DEFAULT_HAMMOCK_PERMITTED_SINK_NODE_TYPE
         Parameters.SUBPROCESS_MINER_ALGO -> A process discovery algorithm to be used for discovering a subprocess (apply() method is used)
         Parameters.SUBPROCESS_MINER_ALGO_VARIANT -> A variant of the process discovery algorithm to be used
+        Parameters.SUBPROCESS_N_JOBS -> Number of worker processes to discover the subprocesses of the hammocks in, by default: 1
+        Parameters.SUBPROCESS_CACHE -> SubprocessCache (or path to its file) to reuse the subprocesses discovered on the same projected logs
+                                       across runs, None if no cache should be used
         Parameters.PREREPAIR_VARIANT -> An algorithm from PrerepairVariants to be used before applying hammocks replacement, None if no prerepair should be used
+        Parameters.CONFORMANCE_BACKEND -> One of ConformanceBackends: optimal alignments or their fast approximation by token replay,
+                                           by default: ConformanceBackends.ALIGNMENTS
+        Parameters.ALIGNMENTS_CACHE -> AlignmentsCache (or path to its file) to reuse alignments across runs, None if no cache should be used
+        Parameters.ALIGNMENTS_N_JOBS -> Number of worker processes to calculate alignments in, by default: 1
+        Parameters.ALIGNMENTS_PREFILTER_FITTING -> If True, trace variants fitting according to token replay are not aligned, by default: True
+        Parameters.ALIGNMENTS_MAX_TIME_TRACE -> Time budget (in seconds) of the alignment of one trace variant, variants exceeding it
+                                                get a token replay based pseudo-alignment, by default: None (no limit)
         Parameters.LOG_ACTIVITY_KEY -> The name of the attribute to be used as activity for process discovery
         Parameters.LOG_CASE_KEY -> The name of the attribute to be used as case identifier
 
@@ -203,35 +392,44 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking,
     net, initial_marking, final_marking
         The repaired net
     """
-    if not check_soundness.check_wfnet(net):
+    if not net_analysis.check_wfnet(net):
         raise Exception("Trying to apply hammocks replacement repair on a Petri Net that is not a WF-net")
 
     net, initial_marking, final_marking = net_helpers.deepcopy_net(net, initial_marking, final_marking)
 
-    alignments_parameters = {
-        alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True
-    }
+    # one alignment per trace variant, the objects are shared with the given `alignments`
+    aligned_variants = None if alignments is None else log_alignments.group_by_variants(alignments)
 
     prerepair_algo = exec_utils.get_param_value(Parameters.PREREPAIR_VARIANT, parameters, DEFAULT_PREREPAIR_VARIANT)
     if prerepair_algo is not None:
         # applying prerepair
-        if alignments is None:
-            alignments = alignments_algo.apply_log(log, net, initial_marking, final_marking, parameters=alignments_parameters)
-        net, initial_marking, final_marking = prerepair_algo.apply(net, initial_marking, final_marking, log, alignments, parameters)
+        if aligned_variants is None:
+            aligned_variants = log_alignments.apply_variants(log, net, initial_marking, final_marking, parameters)
+        transitions_names = {trans.name for trans in net.transitions}
+        net, initial_marking, final_marking = prerepair_algo.apply(net, initial_marking, final_marking, log,
+                                                                   [aligned_trace for aligned_trace, _ in aligned_variants], parameters)
 
         # hardcode for each possible prerepair_variants (that's probably not the best solution)
         if prerepair_algo == PrerepairVariants.NAIVE_LOG_ONLY.value:
             if parameters.get(naive_log_only_algo.Parameters.ALIGNMENTS_MODIFICATION_MODE, naive_log_only_algo.DEFAULT_MODIFY_ALIGNMENTS_MODE) == naive_log_only_algo.AlignmentsModificationMode.NONE:
-                alignments = None
+                # only self-loops are added, so only variants containing their labels may get better alignments
+                added_labels = {trans.label for trans in net.transitions
+                                if trans.name not in transitions_names and trans.label is not None}
+                aligned_variants = log_alignments.realign_variants(net, initial_marking, final_marking, aligned_variants,
+                                                                   added_labels, parameters)
 
-    if alignments is None:
-        alignments = alignments_algo.apply_log(log, net, initial_marking, final_marking, parameters=alignments_parameters)
+    if aligned_variants is None:
+        aligned_variants = log_alignments.apply_variants(log, net, initial_marking, final_marking, parameters)
 
-    bad_pairs = bad_pairs_selection.apply(net, initial_marking, final_marking, alignments)
+    bad_pairs = bad_pairs_selection.apply_variants(net, initial_marking, final_marking, aligned_variants, parameters)
     hammocks = hammocks_covering.apply(net, bad_pairs, as_pairs=True, parameters=parameters)
 
-    for hammock in hammocks:
-        subproc_net, subproc_src, subproc_sink = discover_subprocess(hammock, log, parameters)
+    hammocks = list(hammocks)
+    # the variants of the sublogs of all the hammocks are projected in one pass over the log
+    projections = encode_log(log, parameters).project_many([_get_activities_labels(hammock) for hammock in hammocks])
+    # the hammocks are disjoint, so their subprocesses are discovered independently and only the replacements are sequential
+    subprocesses = _open_cache_and_discover(hammocks, projections, parameters)
+    for hammock, (subproc_net, subproc_src, subproc_sink) in zip(hammocks, subprocesses):
         net, initial_marking, final_marking = replace_hammock(net, initial_marking, final_marking, hammock, subproc_net, subproc_src, subproc_sink)
     net_helpers.enumerate_nodes_successively(net)
 
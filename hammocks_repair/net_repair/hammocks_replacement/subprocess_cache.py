@@ -0,0 +1,167 @@
+import hashlib
+import json
+import sqlite3
+from enum import Enum
+from types import ModuleType
+from typing import Optional, Dict, Any, Tuple, Iterable
+
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.objects.petri_net.utils import petri_utils
+
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def _hash(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _algo_id(algo: Any) -> Optional[str]:
+    if algo is None:
+        return None
+    if isinstance(algo, ModuleType):
+        return algo.__name__
+    if isinstance(algo, Enum):
+        return type(algo).__module__ + '.' + type(algo).__qualname__ + '.' + algo.name
+    algo_type = algo if isinstance(algo, type) else type(algo)
+    return algo_type.__module__ + '.' + algo_type.__qualname__
+
+
+def _plain_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        value = value.value
+    return value if value is None or isinstance(value, (str, int, float, bool)) else NotImplemented
+
+
+def subprocess_key(activities: Iterable[str], variants: Dict[Tuple[str, ...], int], miner_algo: Any, miner_algo_variant: Any,
+                   parameters: Optional[Dict[Any, Any]] = None) -> str:
+    """
+    Content address of a subprocess discovery
+
+    Parameters
+    ------------
+    activities
+        Labels of the hammock
+    variants
+        {variant: number of cases} of the log projected on the activities
+    miner_algo, miner_algo_variant
+        The process discovery algorithm and its variant, identified by their import paths
+    parameters
+        Parameters of the miner, only the ones with plain values (strings, numbers, enum members of them) are taken into account
+
+    Returns
+    ------------
+    key
+        hex digest of the hashes of the label set, the variant multiset, the miner and the parameters
+    """
+    plain_parameters = {}
+    for key, value in (parameters if parameters is not None else {}).items():
+        plain_key, plain_value = _plain_value(key), _plain_value(value)
+        if plain_key is not NotImplemented and plain_value is not NotImplemented:
+            plain_parameters[str(plain_key)] = plain_value
+
+    return _hash([
+        _hash(sorted(set(activities))),
+        _hash(sorted([list(variant), count] for variant, count in variants.items())),
+        _algo_id(miner_algo),
+        _algo_id(miner_algo_variant),
+        plain_parameters,
+    ])
+
+
+def serialize_net(net: PetriNet, source: PetriNet.Place, sink: PetriNet.Place) -> str:
+    """
+    Returns
+    ------------
+    encoded_net
+        JSON representation of the net with its source and sink, the nodes are referred by their indices
+    """
+    places = list(net.places)
+    transitions = list(net.transitions)
+    nodes_ids = {node: i for i, node in enumerate(places + transitions)}
+    return json.dumps({
+        'places': [place.name for place in places],
+        'transitions': [[trans.name, trans.label] for trans in transitions],
+        'arcs': [[nodes_ids[arc.source], nodes_ids[arc.target], arc.weight] for arc in net.arcs],
+        'source': nodes_ids[source],
+        'sink': nodes_ids[sink],
+    })
+
+
+def deserialize_net(encoded_net: str) -> Tuple[PetriNet, PetriNet.Place, PetriNet.Place]:
+    """
+    Returns
+    ------------
+    net, source, sink
+        A new net restored from its representation made by serialize_net()
+    """
+    net_repr = json.loads(encoded_net)
+    net = PetriNet()
+    nodes = [petri_utils.add_place(net, name) for name in net_repr['places']]
+    nodes += [petri_utils.add_transition(net, name, label) for name, label in net_repr['transitions']]
+    for source_id, target_id, weight in net_repr['arcs']:
+        petri_utils.add_arc_from_to(nodes[source_id], nodes[target_id], net, weight)
+    return net, nodes[net_repr['source']], nodes[net_repr['sink']]
+
+
+class SubprocessCache(object):
+    """
+    On-disk (SQLite) cache of discovered subprocesses keyed by subprocess_key()
+
+    The least recently used entries are evicted when the number of entries exceeds the cap
+    """
+    def __init__(self, filepath: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Parameters
+        ------------
+        filepath
+            path to the SQLite database file, created if doesn't exist
+        max_entries
+            maximal number of subprocesses kept in the cache, by default: DEFAULT_MAX_ENTRIES
+        """
+        self.filepath = filepath
+        self.max_entries = max_entries
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS subprocesses ('
+                                 'key TEXT PRIMARY KEY, '
+                                 'net TEXT NOT NULL, '
+                                 'last_used INTEGER NOT NULL)')
+        self._connection.commit()
+        self._clock = self._connection.execute('SELECT COALESCE(MAX(last_used), 0) FROM subprocesses').fetchone()[0]
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM subprocesses').fetchone()[0]
+
+    def get(self, key: str) -> Optional[Tuple[PetriNet, PetriNet.Place, PetriNet.Place]]:
+        """
+        Returns
+        ------------
+        net, source, sink
+            A new copy of the cached subprocess, None if it's absent in the cache
+        """
+        row = self._connection.execute('SELECT net FROM subprocesses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._connection.execute('UPDATE subprocesses SET last_used = ? WHERE key = ?', (self._tick(), key))
+        self._connection.commit()
+        return deserialize_net(row[0])
+
+    def put(self, key: str, net: PetriNet, source: PetriNet.Place, sink: PetriNet.Place):
+        self._connection.execute('INSERT OR REPLACE INTO subprocesses (key, net, last_used) VALUES (?, ?, ?)',
+                                 (key, serialize_net(net, source, sink), self._tick()))
+        # LRU eviction
+        self._connection.execute('DELETE FROM subprocesses WHERE key NOT IN '
+                                 '(SELECT key FROM subprocesses ORDER BY last_used DESC LIMIT ?)', (self.max_entries,))
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -3,16 +3,21 @@ from enum import Enum
 from typing import Optional, Dict, Any, Set, List, Tuple, Union
 import pandas as pd
 
-from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
 from pm4py.objects.log.obj import EventLog, EventStream
 from pm4py.objects.petri_net.obj import PetriNet, Marking
-from pm4py.objects.petri_net.utils import petri_utils, check_soundness
+from pm4py.objects.petri_net.utils import petri_utils
 
-from hammocks_repair.utils import net_helpers
+from hammocks_repair.conformance_analysis import log_alignments
+from hammocks_repair.utils import net_helpers, net_analysis
 
 
 class Parameters(Enum):
     ALIGNMENTS_MODIFICATION_MODE = 'modify_alignments_mode'  # from ModifyAlignments
+    CONFORMANCE_BACKEND = log_alignments.Parameters.BACKEND.value  # from ConformanceBackends
+    ALIGNMENTS_CACHE = log_alignments.Parameters.ALIGNMENTS_CACHE.value
+    ALIGNMENTS_N_JOBS = log_alignments.Parameters.N_JOBS.value
+    ALIGNMENTS_PREFILTER_FITTING = log_alignments.Parameters.PREFILTER_FITTING.value
+    ALIGNMENTS_MAX_TIME_TRACE = log_alignments.Parameters.MAX_ALIGN_TIME_TRACE.value
 
 
 class AlignmentsModificationMode(Enum):
@@ -23,6 +28,8 @@ class AlignmentsModificationMode(Enum):
 
 DEFAULT_MODIFY_ALIGNMENTS_MODE = AlignmentsModificationMode.NONE
 
+ConformanceBackends = log_alignments.Backends
+
 
 def _get_log_only_moves_insertion_places(net: PetriNet, initial_marking, alignments) -> Dict[str, List[Tuple[Set, List]]]:
     """
@@ -130,22 +137,29 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking,
         if not provided, they will be calculated
     parameters
         Parameters.ALIGNMENTS_MODIFICATION_MODE -> One of AlignmentsModificationMode: mode of alignments' modification during the repair
+        Parameters.CONFORMANCE_BACKEND -> One of ConformanceBackends: optimal alignments or their fast approximation by token replay,
+                                           by default: ConformanceBackends.ALIGNMENTS
+        Parameters.ALIGNMENTS_CACHE -> AlignmentsCache (or path to its file) to reuse alignments across runs, None if no cache should be used
+        Parameters.ALIGNMENTS_N_JOBS -> Number of worker processes to calculate alignments in, by default: 1
+        Parameters.ALIGNMENTS_PREFILTER_FITTING -> If True, trace variants fitting according to token replay are not aligned, by default: True
+        Parameters.ALIGNMENTS_MAX_TIME_TRACE -> Time budget (in seconds) of the alignment of one trace variant, variants exceeding it
+                                                get a token replay based pseudo-alignment, by default: None (no limit)
 
     Returns
     ------------
     net, initial_marking, final_marking
         The repaired net
     """
-    if not check_soundness.check_wfnet(net):
+    if not net_analysis.check_wfnet(net):
         raise Exception("Trying to apply repair algorithm on a Petri Net that is not a WF-net")
 
     net, initial_marking, final_marking = net_helpers.deepcopy_net(net, initial_marking, final_marking)
 
+    # one alignment per trace variant: the objects are shared, so modifications are visible in the given `alignments`
     if alignments is None:
-        alignments_parameters = {
-            alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True
-        }
-        alignments = alignments_algo.apply_log(log, net, initial_marking, final_marking, parameters=alignments_parameters)
+        alignments = [aligned_trace for aligned_trace, _ in log_alignments.apply_variants(log, net, initial_marking, final_marking, parameters)]
+    else:
+        alignments = [aligned_trace for aligned_trace, _ in log_alignments.group_by_variants(alignments)]
 
     places_sets_for_log_only_moves = _get_log_only_moves_insertion_places(net, initial_marking, alignments)
 
@@ -204,4 +218,5 @@ def apply(net: PetriNet, initial_marking: Marking, final_marking: Marking,
             final_marking[new_end_plc] = final_marking[end_plc]
             del final_marking[end_plc]
 
+    net_analysis.invalidate(net)
     return net, initial_marking, final_marking
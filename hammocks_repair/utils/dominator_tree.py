@@ -0,0 +1,191 @@
+from typing import Callable, Iterable, Hashable, Dict, List, Optional
+
+
+class DominatorTree(object):
+    """
+    Dominator tree of the nodes reachable from the `root` built with the Lengauer-Tarjan algorithm
+
+    Node u dominates node v if every path from the root to v passes through u (each node dominates itself).
+    Built on the reversed graph from the sink, the tree is the post-dominator tree
+
+    Answers ancestor queries in O(1) and LCA queries in O(log n)
+    """
+    def __init__(self, root: Hashable, successors: Callable[[Hashable], Iterable[Hashable]]):
+        """
+        Parameters
+        ------------
+        root
+            The root of the graph
+        successors
+            Function returning the successors of a node in the graph
+        """
+        self.root = root
+        self._build(successors)
+
+    def _build(self, successors):
+        # iterative dfs numbering
+        vertex = []  # dfs number -> node
+        number = {}  # node -> dfs number
+        parent = []  # dfs number -> dfs number of the parent in the dfs tree
+        preds = []  # dfs number -> dfs numbers of the predecessors
+
+        number[self.root] = 0
+        vertex.append(self.root)
+        parent.append(-1)
+        preds.append([])
+        stack = [(self.root, iter(successors(self.root)))]
+        while stack:
+            node, succ_iter = stack[-1]
+            for succ in succ_iter:
+                if succ not in number:
+                    number[succ] = len(vertex)
+                    vertex.append(succ)
+                    parent.append(number[node])
+                    preds.append([number[node]])
+                    stack.append((succ, iter(successors(succ))))
+                    break
+                preds[number[succ]].append(number[node])
+            else:
+                stack.pop()
+
+        n = len(vertex)
+        semi = list(range(n))
+        idom = [0] * n
+        ancestor = [-1] * n
+        label = list(range(n))
+        bucket = [[] for _ in range(n)]
+
+        def evaluate(v):
+            if ancestor[v] == -1:
+                return v
+            # iterative path compression
+            path = []
+            while ancestor[ancestor[v]] != -1:
+                path.append(v)
+                v = ancestor[v]
+            for u in reversed(path):
+                a = ancestor[u]
+                if semi[label[a]] < semi[label[u]]:
+                    label[u] = label[a]
+                ancestor[u] = ancestor[a]
+            return label[path[0]] if path else label[v]
+
+        for w in range(n - 1, 0, -1):
+            for v in preds[w]:
+                u = evaluate(v)
+                if semi[u] < semi[w]:
+                    semi[w] = semi[u]
+            bucket[semi[w]].append(w)
+            ancestor[w] = parent[w]  # link
+            for v in bucket[parent[w]]:
+                u = evaluate(v)
+                idom[v] = u if semi[u] < semi[v] else parent[w]
+            bucket[parent[w]].clear()
+        for w in range(1, n):
+            if idom[w] != semi[w]:
+                idom[w] = idom[idom[w]]
+
+        self._idom = {vertex[w]: vertex[idom[w]] for w in range(1, n)}
+        self._idom[self.root] = None
+
+        # euler tour for ancestor queries and binary lifting for LCA queries
+        children = [[] for _ in range(n)]
+        for w in range(1, n):
+            children[idom[w]].append(w)
+        self._tin = {}
+        self._tout = {}
+        self._depth = {self.root: 0}
+        timer = 0
+        stack = [(0, False)]
+        while stack:
+            w, is_exit = stack.pop()
+            if is_exit:
+                self._tout[vertex[w]] = timer
+                timer += 1
+                continue
+            self._tin[vertex[w]] = timer
+            timer += 1
+            stack.append((w, True))
+            for child in children[w]:
+                self._depth[vertex[child]] = self._depth[vertex[w]] + 1
+                stack.append((child, False))
+
+        self._up = [{node: (idom_node if idom_node is not None else node) for node, idom_node in self._idom.items()}]
+        max_depth = max(self._depth.values())
+        while (1 << len(self._up)) <= max_depth:
+            prev = self._up[-1]
+            self._up.append({node: prev[prev[node]] for node in prev})
+
+    def __contains__(self, node):
+        return node in self._idom
+
+    def idom(self, node: Hashable) -> Optional[Hashable]:
+        """
+        Returns
+        ------------
+        idom
+            The immediate dominator of the `node`, None for the root
+        """
+        return self._idom[node]
+
+    def depth(self, node: Hashable) -> int:
+        return self._depth[node]
+
+    def dominates(self, u: Hashable, v: Hashable) -> bool:
+        """
+        Returns
+        ------------
+        dominates
+            True if `u` dominates `v` (is its ancestor in the tree or the same node)
+        """
+        return self._tin[u] <= self._tin[v] and self._tout[v] <= self._tout[u]
+
+    def lca(self, u: Hashable, v: Hashable) -> Hashable:
+        """
+        Returns
+        ------------
+        lca
+            The nearest common dominator of `u` and `v`
+        """
+        if self.dominates(u, v):
+            return u
+        if self.dominates(v, u):
+            return v
+        for up in reversed(self._up):
+            if not self.dominates(up[u], v):
+                u = up[u]
+        return self._idom[u]
+
+    def lca_of(self, nodes: Iterable[Hashable]) -> Hashable:
+        """
+        Returns
+        ------------
+        lca
+            The nearest common dominator of all the `nodes`
+        """
+        res = None
+        for node in nodes:
+            res = node if res is None else self.lca(res, node)
+        return res
+
+    def ancestors(self, node: Hashable) -> List[Hashable]:
+        """
+        Returns
+        ------------
+        ancestors
+            Dominators of the `node` from the node itself to the root
+        """
+        res = []
+        while node is not None:
+            res.append(node)
+            node = self._idom[node]
+        return res
+
+    def as_dict(self) -> Dict[Hashable, Optional[Hashable]]:
+        """
+        Returns
+        ------------
+        idoms
+            {node: its immediate dominator}, None for the root
+        """
+        return dict(self._idom)
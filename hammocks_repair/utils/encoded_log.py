@@ -0,0 +1,166 @@
+from collections import Counter
+from typing import Union, Iterable, List, Hashable, Sequence, Tuple, Dict
+
+import numpy as np
+import pandas as pd
+
+from pm4py.objects.conversion.log import converter as log_converter
+from pm4py.objects.log.obj import EventLog, EventStream, Trace, Event
+from pm4py.util import xes_constants, constants as pm4_constants
+
+DEFAULT_ACTIVITY_KEY = xes_constants.DEFAULT_NAME_KEY
+DEFAULT_CASE_KEY = pm4_constants.CASE_CONCEPT_NAME
+
+
+class EncodedLog(object):
+    """
+    Columnar encoding of the activities of a log, built once and shared by the projections of the log
+
+    The events of all the cases are kept in one array of integer activity codes, the events of the i-th case
+    are codes[case_offsets[i]:case_offsets[i + 1]], positions[code] are the (sorted) positions of the events
+    of the activity in the codes
+    """
+    def __init__(self, activities: List[str], codes: np.ndarray, case_offsets: np.ndarray, case_ids: List[Hashable],
+                 activity_key: str = DEFAULT_ACTIVITY_KEY, case_key: str = DEFAULT_CASE_KEY):
+        self.activities = activities  # code -> activity
+        self.activity_codes = {activity: code for code, activity in enumerate(activities)}
+        self.codes = codes
+        self.case_offsets = case_offsets
+        self.case_ids = case_ids
+        self.activity_key = activity_key
+        self.case_key = case_key
+
+        # activity -> positions of its events
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(activities) + 1))
+        self.positions = [order[bounds[code]:bounds[code + 1]] for code in range(len(activities))]
+
+    @classmethod
+    def from_log(cls, log: Union[pd.DataFrame, EventLog, EventStream],
+                 activity_key: str = DEFAULT_ACTIVITY_KEY, case_key: str = DEFAULT_CASE_KEY) -> 'EncodedLog':
+        """
+        Encode the `log`, the order of events of the dataframe cases is the order of their rows
+        """
+        if isinstance(log, pd.DataFrame):
+            case_codes, case_ids = pd.factorize(log[case_key], sort=False)
+            order = np.argsort(case_codes, kind='stable')
+            codes, activities = pd.factorize(log[activity_key].values[order], sort=False)
+            case_offsets = np.concatenate(([0], np.cumsum(np.bincount(case_codes, minlength=len(case_ids)))))
+            return cls(list(activities), codes.astype(np.int64), case_offsets, list(case_ids), activity_key, case_key)
+
+        if not isinstance(log, EventLog):
+            log = log_converter.apply(log, variant=log_converter.Variants.TO_EVENT_LOG)
+
+        activity_codes = {}
+        codes = []
+        case_offsets = [0]
+        for trace in log:
+            for event in trace:
+                codes.append(activity_codes.setdefault(event[activity_key], len(activity_codes)))
+            case_offsets.append(len(codes))
+        case_ids = [trace.attributes.get(xes_constants.DEFAULT_TRACEID_KEY) for trace in log]
+        return cls(list(activity_codes.keys()), np.array(codes, dtype=np.int64), np.array(case_offsets, dtype=np.int64),
+                   case_ids, activity_key, case_key)
+
+    def __len__(self):
+        return len(self.case_ids)
+
+    def project_positions(self, activities: Iterable[str]) -> np.ndarray:
+        """
+        Returns
+        ------------
+        positions
+            Sorted positions of the events of the `activities` (unknown activities are skipped)
+        """
+        codes = [self.activity_codes[activity] for activity in activities if activity in self.activity_codes]
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self.positions[code] for code in codes]))
+
+    def cases_of(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Returns
+        ------------
+        cases
+            Indices of the cases of the events at the (sorted) `positions`
+        """
+        return np.searchsorted(self.case_offsets, positions, side='right') - 1
+
+    def project(self, activities: Iterable[str]) -> EventLog:
+        """
+        Returns
+        ------------
+        sublog
+            The log of the cases projected on the `activities`, cases without their events are omitted
+        """
+        return self._sublog(self.project_positions(activities))
+
+    def project_variants(self, activities: Iterable[str]) -> Dict[Tuple[str, ...], int]:
+        """
+        Returns
+        ------------
+        variants
+            {variant of the log projected on the `activities`: number of its cases}, cases without their events are omitted
+        """
+        return self._variants(self.project_positions(activities))
+
+    def project_many(self, activities_sets: Sequence[Iterable[str]]) -> List[Tuple[Dict[Tuple[str, ...], int], np.ndarray]]:
+        """
+        Project the log on each of the `activities_sets` in one pass over the events,
+        each event is routed to the projections containing its activity
+
+        Returns
+        ------------
+        projections
+            (variants, empty_cases) for each set of activities: the variants of the log projected on the set
+            as in project_variants() and the indices of the cases without events of the set
+        """
+        # activity code -> indices of the sets containing it, as flat arrays
+        sets_of_code = [[] for _ in self.activities]
+        for set_idx, activities in enumerate(activities_sets):
+            for activity in set(activities):
+                if activity in self.activity_codes:
+                    sets_of_code[self.activity_codes[activity]].append(set_idx)
+        code_sets_cnt = np.array([len(sets) for sets in sets_of_code], dtype=np.int64)
+        code_sets_offsets = np.concatenate(([0], np.cumsum(code_sets_cnt)))
+        code_sets = np.array([set_idx for sets in sets_of_code for set_idx in sets], dtype=np.int64)
+
+        # (set, position) for each routed event, grouped by the sets with the positions kept sorted
+        event_sets_cnt = code_sets_cnt[self.codes]
+        positions = np.repeat(np.arange(len(self.codes)), event_sets_cnt)
+        routed_offsets = np.repeat(np.cumsum(event_sets_cnt) - event_sets_cnt, event_sets_cnt)
+        sets = code_sets[code_sets_offsets[self.codes[positions]] + np.arange(len(positions)) - routed_offsets]
+        order = np.argsort(sets, kind='stable')
+        positions, sets = positions[order], sets[order]
+        bounds = np.searchsorted(sets, np.arange(len(activities_sets) + 1))
+
+        projections = []
+        for set_idx in range(len(activities_sets)):
+            set_positions = positions[bounds[set_idx]:bounds[set_idx + 1]]
+            is_empty_case = np.ones(len(self), dtype=bool)
+            is_empty_case[self.cases_of(set_positions)] = False
+            projections.append((self._variants(set_positions), np.flatnonzero(is_empty_case)))
+        return projections
+
+    def _sublog(self, positions: np.ndarray) -> EventLog:
+        cases = self.cases_of(positions)
+        sublog = EventLog()
+        if len(positions) == 0:
+            return sublog
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(cases)) + 1, [len(positions)])).tolist()
+        cases = cases.tolist()
+        activities = [self.activities[code] for code in self.codes[positions].tolist()]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            sublog.append(Trace([Event({self.activity_key: activity}) for activity in activities[start:end]],
+                                attributes={xes_constants.DEFAULT_TRACEID_KEY: self.case_ids[cases[start]]}))
+        return sublog
+
+    def _variants(self, positions: np.ndarray) -> Dict[Tuple[str, ...], int]:
+        if len(positions) == 0:
+            return {}
+        cases = self.cases_of(positions)
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(cases)) + 1, [len(positions)])).tolist()
+        codes = self.codes[positions].tolist()
+        # the variants are counted on the codes, the activities are decoded once per variant
+        codes_variants = Counter(tuple(codes[start:end]) for start, end in zip(bounds[:-1], bounds[1:]))
+        return {tuple(self.activities[code] for code in variant): count for variant, count in codes_variants.items()}
@@ -0,0 +1,72 @@
+from typing import Optional, Tuple
+
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.objects.petri_net.utils import check_soundness
+
+_VERSION_ATTR = '_hammocks_repair_structure_version'
+_ANALYSIS_ATTR = '_hammocks_repair_analysis'
+
+
+class NetAnalysis(object):
+    """
+    Structural properties of a net valid for its version stamp
+    """
+    def __init__(self, stamp: Tuple[int, int, int, int], is_wfnet: bool,
+                 source: Optional[PetriNet.Place], sink: Optional[PetriNet.Place]):
+        self.stamp = stamp
+        self.is_wfnet = is_wfnet
+        self.source = source  # the unique source place or None
+        self.sink = sink  # the unique sink place or None
+
+
+def get_version_stamp(net: PetriNet) -> Tuple[int, int, int, int]:
+    """
+    Returns
+    ------------
+    stamp
+        Cheap structural version of the net: the number of its modifications reported by invalidate()
+        and the numbers of places, transitions and arcs (so the modifications changing them are detected anyway)
+    """
+    return getattr(net, _VERSION_ATTR, 0), len(net.places), len(net.transitions), len(net.arcs)
+
+
+def invalidate(net: PetriNet):
+    """
+    Report the modification of the net, the cached analysis is recalculated on the next request
+    """
+    setattr(net, _VERSION_ATTR, getattr(net, _VERSION_ATTR, 0) + 1)
+
+
+def analyze(net: PetriNet) -> NetAnalysis:
+    """
+    Returns
+    ------------
+    analysis
+        WF-net status, source and sink of the net, cached in the net until its version stamp changes
+    """
+    stamp = get_version_stamp(net)
+    analysis = getattr(net, _ANALYSIS_ATTR, None)
+    if analysis is None or analysis.stamp != stamp:
+        analysis = NetAnalysis(stamp, check_soundness.check_wfnet(net),
+                               check_soundness.check_source_place_presence(net),
+                               check_soundness.check_sink_place_presence(net))
+        setattr(net, _ANALYSIS_ATTR, analysis)
+    return analysis
+
+
+def check_wfnet(net: PetriNet) -> bool:
+    """
+    Cached check_soundness.check_wfnet()
+    """
+    return analyze(net).is_wfnet
+
+
+def get_source_and_sink(net: PetriNet) -> Tuple[Optional[PetriNet.Place], Optional[PetriNet.Place]]:
+    """
+    Returns
+    ------------
+    net_source, net_sink
+        The unique source and sink places of the net (None if there is no such place), cached
+    """
+    analysis = analyze(net)
+    return analysis.source, analysis.sink
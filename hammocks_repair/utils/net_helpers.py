@@ -2,6 +2,8 @@ from pm4py.objects.petri_net.obj import PetriNet, Marking
 from copy import deepcopy
 from pm4py.objects.petri_net.utils import petri_utils
 
+from hammocks_repair.utils import net_analysis
+
 # TODO: get rid of the duplicates of methods from the petri_utils
 
 
@@ -13,6 +15,7 @@ def remove_node(net: PetriNet, node):
         petri_utils.remove_place(net, node)
     else:
         petri_utils.remove_transition(net, node)
+    net_analysis.invalidate(net)
 
 
 def get_node_by_name(net: PetriNet, name):
@@ -62,6 +65,7 @@ def find_arc(source_name, target_name, net):
 def remove_arc(source_name, target_name, net):
     bad_arc = find_arc(source_name, target_name, net)
     petri_utils.remove_arc(net, bad_arc)
+    net_analysis.invalidate(net)
 
 
 def del_trans(label, net):
@@ -75,6 +79,7 @@ def del_trans(label, net):
         return
 
     # print('delete', del_tr)
+    net_analysis.invalidate(net)
     return petri_utils.remove_transition(net, del_tr)
 
 
@@ -88,6 +93,7 @@ def del_place(label, net):
         print(f'place "{label}" not found')
         return
     # print('delete', del_plc)
+    net_analysis.invalidate(net)
     return petri_utils.remove_place(net, del_plc)
 
 
@@ -117,6 +123,7 @@ def create_arc(source_name, target_name, net):
     source.out_arcs.add(arc)
     target.in_arcs.add(arc)
     net.arcs.add(arc)
+    net_analysis.invalidate(net)
 
     # print('created', arc)
 
@@ -129,6 +136,7 @@ def add_transition(alias, net, is_hidden=False):
         t = PetriNet.Transition(name=f'{underscore}_t', label=alias)
 
     net.transitions.add(t)
+    net_analysis.invalidate(net)
     return t
 
 
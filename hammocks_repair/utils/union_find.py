@@ -0,0 +1,75 @@
+from typing import Hashable, Iterable, List
+
+
+class UnionFind(object):
+    """
+    Disjoint sets of hashable elements with path compression and union by rank
+
+    Each set keeps the list of its elements, so the elements of a set are listed in time proportional to its size
+    """
+    def __init__(self, elements: Iterable[Hashable] = ()):
+        self._parent = {}
+        self._rank = {}
+        self._members = {}  # root -> elements of its set
+        for element in elements:
+            self.add(element)
+
+    def __contains__(self, element):
+        return element in self._parent
+
+    def add(self, element: Hashable):
+        """
+        Add the `element` as a singleton set if it is not present yet
+        """
+        if element not in self._parent:
+            self._parent[element] = element
+            self._rank[element] = 0
+            self._members[element] = [element]
+
+    def find(self, element: Hashable) -> Hashable:
+        """
+        Returns
+        ------------
+        root
+            The representative of the set of the `element`
+        """
+        root = element
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[element] != root:  # path compression
+            self._parent[element], element = root, self._parent[element]
+        return root
+
+    def union(self, u: Hashable, v: Hashable) -> Hashable:
+        """
+        Merge the sets of `u` and `v` (adding the elements if they are not present)
+
+        Returns
+        ------------
+        root
+            The representative of the merged set
+        """
+        self.add(u)
+        self.add(v)
+        u, v = self.find(u), self.find(v)
+        if u == v:
+            return u
+        if self._rank[u] < self._rank[v]:
+            u, v = v, u
+        self._parent[v] = u
+        if self._rank[u] == self._rank[v]:
+            self._rank[u] += 1
+        # the smaller list is appended to the larger one
+        if len(self._members[u]) < len(self._members[v]):
+            self._members[u], self._members[v] = self._members[v], self._members[u]
+        self._members[u].extend(self._members.pop(v))
+        return u
+
+    def members(self, element: Hashable) -> List[Hashable]:
+        """
+        Returns
+        ------------
+        members
+            The elements of the set of the `element`
+        """
+        return self._members[self.find(element)]
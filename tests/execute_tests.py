@@ -7,13 +7,23 @@ if __name__ == "__main__":
     parent_dir = os.path.dirname(current_dir)
     sys.path.insert(0, parent_dir)
 
-    from tests.test_hammocks_covering import MinimalHammockTest, HammocksCoveringTest
+    from tests.test_hammocks_covering import HammockTest, MinimalHammockTest, LocalMinimalHammockTest, DefaultRadiusLocalMinimalHammockTest, DominatorsHammockTest, DecompositionTreeTest, DisjointHammocksTest, HammocksCoveringTest
+    test_hammock = HammockTest()
     test_minimal_hammock = MinimalHammockTest()
+    test_local_minimal_hammock = LocalMinimalHammockTest()
+    test_default_radius_local_minimal_hammock = DefaultRadiusLocalMinimalHammockTest()
+    test_dominators_hammock = DominatorsHammockTest()
+    test_decomposition_tree = DecompositionTreeTest()
+    test_disjoint_hammocks = DisjointHammocksTest()
     test_hammocks_covering = HammocksCoveringTest()
 
     from tests.test_bad_pairs_selection import BadPairsSelectionTest
     test_bad_pairs_selection = BadPairsSelectionTest()
 
+    from tests.test_log_alignments import AlignmentsCacheTest, LogAlignmentsTest
+    test_alignments_cache = AlignmentsCacheTest()
+    test_log_alignments = LogAlignmentsTest()
+
     from tests.test_repair import HammocksReplacementRepairTest
     test_hammocks_replacement_repair = HammocksReplacementRepairTest()
 
@@ -1,6 +1,9 @@
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 
-from examples import test_net
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
+
+from examples import test_net, bad_pairs_hammocks_covering
 from hammocks_repair.conformance_analysis import bad_pairs_selection
 from hammocks_repair.utils import net_helpers
 
@@ -95,6 +98,113 @@ class BadPairsSelectionTest(unittest.TestCase):
         res = bad_pairs_selection.apply(net, im, fm, alignments)
         self.assertEqual(true_bad_pairs, res)
 
+    def test3(self):
+        """
+        repeated alignments: grouping by variants gives the same counts as replaying every aligned trace
+        """
+        net, im, fm = test_net.create_net()
+
+        # ( (log_name, model_name), (log_label, model_label) )
+        trace1 = [
+            ((None, 'take_device_t'), ('>>', 'take device')),
+            ((None, 'add_to_the_db_t'), ('add to the db', 'add to the db')),
+            ((None, 'inspect_t'), ('>>', 'inspect')),
+            ((None, 'admit_helplessness_hidden_t'), ('>>', None)),
+            ((None, 'repair_finished_t'), ('repair finished', 'repair finished')),
+            ((None, 'inform_client_t'), ('inform client', 'inform client')),
+            ((None, 'client_didnt_come_t'), ('>>', 'client didnt come')),
+            ((None, 'sell_device_t'), ('sell device', 'sell device')),
+        ]
+        trace2 = [
+            ((None, 'take_device_t'), ('take device', 'take device')),
+            ((None, 'add_to_the_db_t'), ('add to the db', 'add to the db')),
+            ((None, 'inspect_t'), ('inspect', 'inspect')),
+            ((None, 'admit_helplessness_hidden_t'), ('>>', None)),
+            ((None, 'repair_finished_t'), ('repair finished', 'repair finished')),
+            ((None, 'inform_client_t'), ('inform client', 'inform client')),
+            ((None, 'client_didnt_come_t'), ('>>', 'client didnt come')),
+            ((None, 'sell_device_t'), ('sell device', 'sell device')),
+        ]
+        alignments = [{'alignment': list(trace1)} for _ in range(3)] + [{'alignment': list(trace2)} for _ in range(2)]
+
+        true_bad_pairs_names = {
+            ('start', 'add_to_the_db_t'): 3,
+            ('start', 'repair_finished_t'): 3,
+            ('inform_client_t', 'sell_device_t'): 5
+        }
+        true_bad_pairs = _conv_bad_pairs_dict(net, true_bad_pairs_names)
+
+        for group_by_variants in [True, False]:
+            for engine in bad_pairs_selection.Engines:
+                parameters = {
+                    bad_pairs_selection.Parameters.GROUP_BY_VARIANTS: group_by_variants,
+                    bad_pairs_selection.Parameters.ENGINE: engine,
+                }
+                res = bad_pairs_selection.apply(net, im, fm, alignments, parameters)
+                self.assertEqual(true_bad_pairs, res)
+
+    def test4(self):
+        """
+        the compiled engine gives the same bad pairs as the token one on real alignments
+        """
+        for case in [test_net.Variants.CASE1, test_net.Variants.CASE2]:
+            net, im, fm, _, _, _, log = bad_pairs_hammocks_covering.get_sample_data(case)
+            alignments_parameters = {
+                alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+                alignments_algo.Parameters.SHOW_PROGRESS_BAR: False,
+            }
+            alignments = alignments_algo.apply_log(log, net, im, fm, parameters=alignments_parameters)
+
+            tokens_res = bad_pairs_selection.apply(net, im, fm, alignments, {bad_pairs_selection.Parameters.ENGINE: bad_pairs_selection.Engines.TOKENS})
+            compiled_res = bad_pairs_selection.apply(net, im, fm, alignments, {bad_pairs_selection.Parameters.ENGINE: bad_pairs_selection.Engines.COMPILED})
+            self.assertEqual(tokens_res, compiled_res)
+
+    def test5(self):
+        """
+        streaming alignments and merging accumulators give the same result as apply() on the whole list
+        """
+        net, im, fm, _, _, _, log = bad_pairs_hammocks_covering.get_sample_data(test_net.Variants.CASE2)
+        alignments_parameters = {
+            alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+            alignments_algo.Parameters.SHOW_PROGRESS_BAR: False,
+        }
+        alignments = alignments_algo.apply_log(log, net, im, fm, parameters=alignments_parameters)
+        true_bad_pairs = bad_pairs_selection.apply(net, im, fm, alignments)
+
+        res = bad_pairs_selection.apply(net, im, fm, (aligned_trace for aligned_trace in alignments))
+        self.assertEqual(true_bad_pairs, res)
+
+        for group_by_variants in [True, False]:
+            parameters = {bad_pairs_selection.Parameters.GROUP_BY_VARIANTS: group_by_variants}
+            half = len(alignments) // 2
+            first_acc = bad_pairs_selection.BadPairsAccumulator(net, im, fm, parameters)
+            second_acc = bad_pairs_selection.BadPairsAccumulator(net, im, fm, parameters)
+            for aligned_trace in alignments[:half]:
+                first_acc.add(aligned_trace)
+            for aligned_trace in alignments[half:]:
+                second_acc.add(aligned_trace)
+            first_acc.merge(second_acc)
+            self.assertEqual(true_bad_pairs, first_acc.result())
+
+    def test6(self):
+        """
+        replaying alignments in worker processes gives the same result as the sequential replay
+        """
+        net, im, fm, _, _, _, log = bad_pairs_hammocks_covering.get_sample_data(test_net.Variants.CASE2)
+        alignments_parameters = {
+            alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+            alignments_algo.Parameters.SHOW_PROGRESS_BAR: False,
+        }
+        alignments = alignments_algo.apply_log(log, net, im, fm, parameters=alignments_parameters)
+        true_bad_pairs = bad_pairs_selection.apply(net, im, fm, alignments)
+
+        res = bad_pairs_selection.apply(net, im, fm, alignments, {bad_pairs_selection.Parameters.N_JOBS: 2})
+        self.assertEqual(true_bad_pairs, res)
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            res = bad_pairs_selection.apply(net, im, fm, alignments, {bad_pairs_selection.Parameters.EXECUTOR: executor})
+        self.assertEqual(true_bad_pairs, res)
+
 
 if __name__ == '__main__':
     unittest.main()
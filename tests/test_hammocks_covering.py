@@ -1,9 +1,14 @@
+import os
+import pickle
+import random
+import tempfile
 import unittest
 
-from hammocks_repair.hammocks_covering.variants import minimal_hammock
+from hammocks_repair.hammocks_covering.variants import minimal_hammock, dominators_hammock, decomposition_tree
 from hammocks_repair.hammocks_covering import algorithm as hammocks_covering_algo
-from hammocks_repair.hammocks_covering.obj import Hammock
+from hammocks_repair.hammocks_covering.obj import Hammock, get_node_ids
 from examples import test_net
+from grader import test_gen
 from hammocks_repair.utils import net_helpers
 
 NodeTypes = minimal_hammock.NodeTypes
@@ -25,7 +30,44 @@ def _init_hammock(net, nodes_names, source_name, sink_name):
     return Hammock(true_hammock_source, true_hammock_sink, true_hammock_nodes)
 
 
+class HammockTest(unittest.TestCase):
+    def test1(self):
+        """
+        hammocks are immutable, hashable and picklable, their bitsets agree with their sets of nodes
+        """
+        net, _, _ = test_net.create_net()
+        node_ids = get_node_ids(net)
+        ham1 = _init_hammock(net, ['order_parts_t', '1st_vendor_t', 'p7', 'p10'], 'order_parts_t', 'p10')
+        ham2 = _init_hammock(net, ['p7', '1st_vendor_t', 'no_1st_vendor_hidden_t', 'p10'], 'p7', 'p10')
+        ham3 = _init_hammock(net, ['complete_repair_t', 'p9'], 'complete_repair_t', 'p9')
+
+        self.assertEqual(2, ham1.size())
+        self.assertEqual(1, ham2.size())
+        with self.assertRaises(AttributeError):
+            ham1.nodes = frozenset()
+
+        ham1_with_ids = Hammock(ham1.source, ham1.sink, ham1.nodes, node_ids)
+        self.assertEqual(ham1, ham1_with_ids)
+        self.assertEqual(hash(ham1), hash(ham1_with_ids))
+        self.assertEqual(len({ham1, ham1_with_ids, ham2}), 2)
+
+        for ham_a in [ham1, ham2, ham3]:
+            for ham_b in [ham1, ham2, ham3]:
+                ham_a_with_ids = Hammock(ham_a.source, ham_a.sink, ham_a.nodes, node_ids)
+                ham_b_with_ids = Hammock(ham_b.source, ham_b.sink, ham_b.nodes, node_ids)
+                self.assertEqual(ham_a.nodes.isdisjoint(ham_b.nodes), ham_a_with_ids.isdisjoint(ham_b_with_ids))
+                self.assertEqual(ham_a.nodes <= ham_b.nodes, ham_a_with_ids.issubset(ham_b_with_ids))
+                self.assertEqual(ham_a.nodes <= ham_b.nodes, ham_a.issubset(ham_b_with_ids))
+
+        restored_net, restored_ham = pickle.loads(pickle.dumps((net, ham1_with_ids)))
+        self.assertEqual(2, restored_ham.size())
+        self.assertEqual({node.name for node in ham1.nodes}, {node.name for node in restored_ham.nodes})
+        self.assertTrue(restored_ham.nodes <= set(restored_net.places) | set(restored_net.transitions))
+
+
 class MinimalHammockTest(unittest.TestCase):
+    algo = minimal_hammock
+
     def test1(self):
         """
         Testing different permitted NodeTypes for the source and sink of a hammock
@@ -51,7 +93,7 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -66,7 +108,7 @@ class MinimalHammockTest(unittest.TestCase):
 
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -82,7 +124,7 @@ class MinimalHammockTest(unittest.TestCase):
 
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -110,7 +152,7 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -137,7 +179,7 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -151,7 +193,7 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -178,7 +220,7 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
@@ -199,11 +241,293 @@ class MinimalHammockTest(unittest.TestCase):
         true_hammock = _init_hammock(net, true_hammock_nodes_names, true_hammock_source_name, true_hammock_sink_name)
 
         covered_nodes = _get_nodes_by_names(net, covered_nodes_names)
-        res_hammock = minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters=parameters)
+        res_hammock = self.algo.apply(covered_nodes, net_src, net_sink, parameters=parameters)
 
         self.assertEqual(true_hammock, res_hammock)
 
 
+class LocalMinimalHammockTest(MinimalHammockTest):
+    class algo:
+        @staticmethod
+        def apply(covered_nodes, net_source, net_sink, parameters=None):
+            parameters = {
+                **(parameters if parameters is not None else {}),
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH: True,
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH_RADIUS: 1,
+            }
+            return minimal_hammock.apply(covered_nodes, net_source, net_sink, parameters)
+
+    def test5(self):
+        """
+        the local search falls back to the global one when the neighbourhood is too large
+        """
+        net, _, _ = test_net.create_net_loops()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        covered_nodes_sets = [[arc.source, arc.target] for arc in net.arcs]
+
+        hammocks = minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink)
+        for max_nodes in [1, 5, 100]:
+            parameters = {
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH: True,
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH_RADIUS: 1,
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH_MAX_NODES: max_nodes,
+            }
+            self.assertEqual(hammocks, minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink, parameters))
+
+    def test6(self):
+        """
+        the net graph is built on the first path query
+        """
+        net, _, _ = test_net.create_net_loops()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+
+        self.assertEqual([net_src], minimal_hammock.NetGraph(net_src, net_sink).path_to_source([net_src]))
+        self.assertEqual([net_sink], minimal_hammock.NetGraph(net_src, net_sink).path_to_sink([net_sink]))
+        path = minimal_hammock.NetGraph(net_src, net_sink).path_to_sink([net_src])
+        self.assertEqual((net_src, net_sink), (path[0], path[-1]))
+
+    def test7(self):
+        """
+        the local search gives the hammocks of the global one for any radius
+        """
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            net_src = net_helpers.get_place_by_name(net, 'start')
+            net_sink = net_helpers.get_place_by_name(net, 'end')
+            covered_nodes_sets = [[node] for node in list(net.places) + list(net.transitions)] + [[arc.source, arc.target] for arc in net.arcs]
+
+            for node_type in [NodeTypes.PLACE_TYPE, NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE]:
+                parameters = {
+                    minimal_hammock.Parameters.PARAM_SOURCE_NODE_TYPE: node_type,
+                    minimal_hammock.Parameters.PARAM_SINK_NODE_TYPE: node_type,
+                }
+                hammocks = minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink, parameters)
+                for radius in [1, 2, minimal_hammock.DEFAULT_LOCAL_SEARCH_RADIUS]:
+                    local_parameters = {
+                        **parameters,
+                        minimal_hammock.Parameters.PARAM_LOCAL_SEARCH: True,
+                        minimal_hammock.Parameters.PARAM_LOCAL_SEARCH_RADIUS: radius,
+                    }
+                    self.assertEqual(hammocks, minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink, local_parameters))
+
+
+class DefaultRadiusLocalMinimalHammockTest(MinimalHammockTest):
+    class algo:
+        @staticmethod
+        def apply(covered_nodes, net_source, net_sink, parameters=None):
+            parameters = {
+                **(parameters if parameters is not None else {}),
+                minimal_hammock.Parameters.PARAM_LOCAL_SEARCH: True,
+            }
+            return minimal_hammock.apply(covered_nodes, net_source, net_sink, parameters)
+
+
+class DominatorsHammockTest(MinimalHammockTest):
+    algo = dominators_hammock
+
+    def test5(self):
+        """
+        dominator trees of a net with loops
+        """
+        net, _, _ = test_net.create_net_loops()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        index = dominators_hammock.HammockIndex(net_src, net_sink)
+
+        p1, p2, p3, p4, c_t, e_t = _get_nodes_by_names(net, ['p1', 'p2', 'p3', 'p4', 'c_t', 'e_t'])
+        self.assertEqual(c_t, index.dominators.idom(p2))
+        self.assertEqual(c_t, index.dominators.lca(p3, p4))
+        self.assertEqual(e_t, index.dominators.lca(p4, e_t))
+        self.assertTrue(index.dominators.dominates(net_src, net_sink))
+        self.assertFalse(index.dominators.dominates(p3, p4))
+        self.assertEqual(p3, index.post_dominators.lca(p1, p3))
+        self.assertEqual(net_sink, index.post_dominators.lca_of([net_src, p2, net_sink]))
+
+    def test6(self):
+        """
+        the index is reused between the queries and gives the same hammocks as building it for each query
+        """
+        net, _, _ = test_net.create_net()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        index = dominators_hammock.HammockIndex(net_src, net_sink)
+
+        parameters = {
+            dominators_hammock.Parameters.PARAM_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+            dominators_hammock.Parameters.PARAM_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+        }
+        nodes = list(net.places) + list(net.transitions)
+        for node in nodes:
+            for out_arc in node.out_arcs:
+                hammock = dominators_hammock.apply([node, out_arc.target], net_src, net_sink, parameters)
+                indexed_hammock = dominators_hammock.apply([node, out_arc.target], net_src, net_sink,
+                                                           {**parameters, dominators_hammock.Parameters.PARAM_HAMMOCK_INDEX: index})
+                self.assertEqual(hammock, indexed_hammock)
+
+                # single entry and single exit
+                for ham_node in hammock.nodes:
+                    if ham_node != hammock.source:
+                        self.assertTrue(all(in_arc.source in hammock.nodes for in_arc in ham_node.in_arcs))
+                    if ham_node != hammock.sink:
+                        self.assertTrue(all(out_arc.target in hammock.nodes for out_arc in ham_node.out_arcs))
+
+    def test7(self):
+        """
+        the permitted types are respected where minimal_hammock ignores them: a single covered transition with places-only bounds
+        """
+        net, _, _ = test_net.create_net_loops()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        parameters = {
+            dominators_hammock.Parameters.PARAM_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE,
+            dominators_hammock.Parameters.PARAM_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE,
+        }
+        b_t, p1 = _get_nodes_by_names(net, ['b_t', 'p1'])
+
+        bfs_hammock = minimal_hammock.apply([b_t], net_src, net_sink, parameters)
+        self.assertEqual((b_t, b_t, {b_t}), (bfs_hammock.source, bfs_hammock.sink, bfs_hammock.nodes))
+
+        hammock = dominators_hammock.apply([b_t], net_src, net_sink, parameters)
+        self.assertEqual((p1, p1, {p1, b_t}), (hammock.source, hammock.sink, hammock.nodes))
+
+    def test8(self):
+        """
+        the hammocks covering the arcs are the ones of minimal_hammock, e.g. (p2, start_repair_t) is covered by (p1, p12)
+        """
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            net_src = net_helpers.get_place_by_name(net, 'start')
+            net_sink = net_helpers.get_place_by_name(net, 'end')
+            index = dominators_hammock.HammockIndex(net_src, net_sink)
+            covered_nodes_sets = [[arc.source, arc.target] for arc in net.arcs]
+
+            for node_type in [NodeTypes.PLACE_TYPE, NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                              NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE | NodeTypes.HIDDEN_TRANS_TYPE]:
+                parameters = {
+                    dominators_hammock.Parameters.PARAM_SOURCE_NODE_TYPE: node_type,
+                    dominators_hammock.Parameters.PARAM_SINK_NODE_TYPE: node_type,
+                }
+                self.assertEqual(minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink, parameters),
+                                 [dominators_hammock.apply(covered_nodes, net_src, net_sink,
+                                                           {**parameters, dominators_hammock.Parameters.PARAM_HAMMOCK_INDEX: index})
+                                  for covered_nodes in covered_nodes_sets])
+
+        net, _, _ = test_net.create_net()
+        p1, p2, p12, start_repair_t = _get_nodes_by_names(net, ['p1', 'p2', 'p12', 'start_repair_t'])
+        hammock = dominators_hammock.apply([p2, start_repair_t], net_helpers.get_place_by_name(net, 'start'), net_helpers.get_place_by_name(net, 'end'))
+        self.assertEqual((p1, p12), (hammock.source, hammock.sink))
+
+
+class DecompositionTreeTest(unittest.TestCase):
+    def test1(self):
+        """
+        hammocks of the tree are nested or disjoint and cover the ends of each arc
+        """
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            net_src = net_helpers.get_place_by_name(net, 'start')
+            net_sink = net_helpers.get_place_by_name(net, 'end')
+            tree = decomposition_tree.HammockTree(net_src, net_sink, NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                                                  NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE)
+
+            self.assertEqual(set(net.places) | set(net.transitions), tree.root.nodes)
+            for tree_node in tree.tree_nodes:
+                for child in tree_node.children:
+                    self.assertTrue(child.nodes <= tree_node.nodes)
+                for other_tree_node in tree.tree_nodes:
+                    nested = tree_node.nodes <= other_tree_node.nodes or other_tree_node.nodes <= tree_node.nodes
+                    shared_nodes = tree_node.nodes & other_tree_node.nodes
+                    consecutive = shared_nodes in ({tree_node.sink} & {other_tree_node.source}, {tree_node.source} & {other_tree_node.sink})
+                    self.assertTrue(nested or consecutive)
+
+            for arc in net.arcs:
+                hammock = tree.find([arc.source, arc.target])
+                self.assertTrue({arc.source, arc.target} <= hammock.nodes)
+                self.assertTrue(all(not {arc.source, arc.target} <= child.nodes for child in hammock.children))
+
+    def test2(self):
+        """
+        the tree is restored from its serialized representation
+        """
+        net, _, _ = test_net.create_net()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        tree = decomposition_tree.HammockTree(net_src, net_sink)
+
+        with tempfile.TemporaryDirectory() as tree_dir:
+            tree_filepath = os.path.join(tree_dir, 'tree.json')
+            tree.save(tree_filepath)
+            restored_tree = decomposition_tree.HammockTree.load(tree_filepath, net)
+
+        self.assertEqual([tree_node.hammock() for tree_node in tree.tree_nodes],
+                         [tree_node.hammock() for tree_node in restored_tree.tree_nodes])
+        covered_nodes = _get_nodes_by_names(net, ['1st_vendor_t', '2nd_vendor_t'])
+        self.assertEqual(tree.find(covered_nodes).hammock(), restored_tree.find(covered_nodes).hammock())
+        parameters = {decomposition_tree.Parameters.PARAM_HAMMOCK_TREE: restored_tree}
+        self.assertEqual(tree.find(covered_nodes).hammock(), decomposition_tree.apply(covered_nodes, net_src, net_sink, parameters))
+
+    def test3(self):
+        """
+        sequences split the children of each hammock of the tree into chains of consecutive hammocks
+        """
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            net_src = net_helpers.get_place_by_name(net, 'start')
+            net_sink = net_helpers.get_place_by_name(net, 'end')
+            tree = decomposition_tree.HammockTree(net_src, net_sink, NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                                                  NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE)
+            for tree_node in tree.tree_nodes:
+                sequences = tree.sequences(tree_node)
+                pieces = [piece for sequence in sequences for piece in sequence]
+                self.assertEqual(len(tree_node.children), len(pieces))
+                self.assertEqual(set(map(id, tree_node.children)), set(map(id, pieces)))
+                for sequence in sequences:
+                    for piece, next_piece in zip(sequence, sequence[1:]):
+                        self.assertEqual(piece.sink, next_piece.source)
+                        self.assertEqual({piece.sink}, piece.nodes & next_piece.nodes)
+
+    def test4(self):
+        """
+        lookups aren't the minimal hammocks, they only cover the ends of the arcs with permitted bounds
+        """
+        net, _, _ = test_net.create_net()
+        net_src = net_helpers.get_place_by_name(net, 'start')
+        net_sink = net_helpers.get_place_by_name(net, 'end')
+        node_filter = minimal_hammock.NodeFilter(NodeTypes.PLACE_TYPE)
+        parameters = {decomposition_tree.Parameters.PARAM_HAMMOCK_TREE: decomposition_tree.HammockTree(net_src, net_sink)}
+
+        for arc in net.arcs:
+            hammock = decomposition_tree.apply([arc.source, arc.target], net_src, net_sink, parameters)
+            self.assertTrue({arc.source, arc.target} <= hammock.nodes)
+            self.assertTrue(node_filter.is_permitted(hammock.source) and node_filter.is_permitted(hammock.sink))
+
+        p2, start_repair_t = _get_nodes_by_names(net, ['p2', 'start_repair_t'])
+        self.assertNotEqual(minimal_hammock.apply([p2, start_repair_t], net_src, net_sink),
+                            decomposition_tree.apply([p2, start_repair_t], net_src, net_sink, parameters))
+
+
+class DisjointHammocksTest(unittest.TestCase):
+    def test1(self):
+        """
+        sampled hammocks are disjoint, large enough and reproducible with the seed
+        """
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            random.seed(5)
+            hammocks = test_gen.get_disjoint_hammocks(net, min_hammock_size=2, start_end_offset=1, hammocks_dist=1)
+            self.assertTrue(hammocks)
+
+            covered_nodes = [node for ham in hammocks for node in ham.nodes]
+            self.assertEqual(len(covered_nodes), len(set(covered_nodes)))
+            for ham in hammocks:
+                self.assertTrue(ham.size() >= 2)
+                net_src, net_sink = net_helpers.get_place_by_name(net, 'start'), net_helpers.get_place_by_name(net, 'end')
+                self.assertEqual(ham, minimal_hammock.apply(ham.nodes, net_src, net_sink, {
+                    minimal_hammock.Parameters.PARAM_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                    minimal_hammock.Parameters.PARAM_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                }))
+
+            random.seed(5)
+            self.assertEqual(hammocks, test_gen.get_disjoint_hammocks(net, min_hammock_size=2, start_end_offset=1, hammocks_dist=1))
+
+
 class HammocksCoveringTest(unittest.TestCase):
     def test1(self):
         net, _, _ = test_net.create_net()
@@ -237,8 +561,9 @@ class HammocksCoveringTest(unittest.TestCase):
 
         true_hammocks = [_init_hammock(net, true_hammocks_nodes_names[i], true_hammocks_source_name[i], true_hammocks_sink_name[i]) for i in range(hammocks_cnt)]
 
-        res_hammocks = hammocks_covering_algo.apply(net, linked_pairs, as_pairs=True, parameters=parameters)
-        self.assertEqual(set(true_hammocks), set(res_hammocks))
+        for variant in hammocks_covering_algo.Variants:
+            res_hammocks = hammocks_covering_algo.apply(net, linked_pairs, as_pairs=True, parameters=parameters, variant=variant)
+            self.assertEqual(set(true_hammocks), set(res_hammocks))
 
         # case 2: intersecting hammocks
         linked_pairs_names = [
@@ -263,8 +588,81 @@ class HammocksCoveringTest(unittest.TestCase):
         true_hammocks_sink_name[0] = 'p9'
         true_hammocks = [_init_hammock(net, true_hammocks_nodes_names[i], true_hammocks_source_name[i], true_hammocks_sink_name[i]) for i in range(hammocks_cnt)]
 
-        res_hammocks = hammocks_covering_algo.apply(net, linked_pairs, as_pairs=True, parameters=parameters)
-        self.assertEqual(set(true_hammocks), set(res_hammocks))
+        for variant in hammocks_covering_algo.Variants:
+            res_hammocks = hammocks_covering_algo.apply(net, linked_pairs, as_pairs=True, parameters=parameters, variant=variant)
+            self.assertEqual(set(true_hammocks), set(res_hammocks))
+
+    def test2(self):
+        """
+        batched queries give the same hammocks as the separate ones
+        """
+        parameters = {
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+        }
+        for net, _, _ in [test_net.create_net(), test_net.create_net_loops()]:
+            net_src = net_helpers.get_place_by_name(net, 'start')
+            net_sink = net_helpers.get_place_by_name(net, 'end')
+            covered_nodes_sets = [[arc.source, arc.target] for arc in net.arcs]
+
+            hammocks = minimal_hammock.apply_many(covered_nodes_sets, net_src, net_sink, parameters)
+            self.assertEqual([minimal_hammock.apply(covered_nodes, net_src, net_sink, parameters) for covered_nodes in covered_nodes_sets],
+                             hammocks)
+
+            for variant in hammocks_covering_algo.Variants:
+                hammocks = hammocks_covering_algo.apply_many(net, covered_nodes_sets, parameters, variant)
+                self.assertEqual([hammocks_covering_algo.apply(net, covered_nodes, parameters=parameters, variant=variant) for covered_nodes in covered_nodes_sets],
+                                 hammocks)
+
+    def test3(self):
+        """
+        pairs linked through other pairs are covered by one hammock, the covering hammocks are disjoint
+        """
+        net, _, _ = test_net.create_net()
+        linked_pairs_names = [
+            ('order_parts_t', '1st_vendor_t'),
+            ('complete_repair_t', 'p9'),
+            ('2nd_vendor_t', 'complete_repair_t'),
+            ('inspect_t', 'p4'),
+        ]
+        linked_pairs = [tuple(_get_nodes_by_names(net, list(names_pair))) for names_pair in linked_pairs_names]
+        parameters = {
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+        }
+
+        hammocks = hammocks_covering_algo.apply(net, linked_pairs, as_pairs=True, parameters=parameters)
+        linked_nodes = _get_nodes_by_names(net, ['order_parts_t', '1st_vendor_t', '2nd_vendor_t', 'complete_repair_t', 'p9'])
+        self.assertTrue(any(set(linked_nodes) <= hammock.nodes for hammock in hammocks))
+        for u, v in linked_pairs:
+            self.assertTrue(any({u, v} <= hammock.nodes for hammock in hammocks))
+        for i in range(len(hammocks)):
+            for j in range(i + 1, len(hammocks)):
+                self.assertTrue(hammocks[i].nodes.isdisjoint(hammocks[j].nodes))
+
+    def test4(self):
+        """
+        the cover updated with new pairs is the same as the cover of all the pairs
+        """
+        net, _, _ = test_net.create_net()
+        parameters = {
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE | NodeTypes.HIDDEN_TRANS_TYPE,
+            hammocks_covering_algo.Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE | NodeTypes.HIDDEN_TRANS_TYPE,
+        }
+        first_pairs = [tuple(_get_nodes_by_names(net, list(names_pair))) for names_pair in [('order_parts_t', '1st_vendor_t'), ('complete_repair_t', 'p9')]]
+        new_pairs = [tuple(_get_nodes_by_names(net, list(names_pair))) for names_pair in [('finished_order_hidden_t', 'p17'), ('no_2nd_vendor_hidden_t', 'p8')]]
+
+        first_hammocks = hammocks_covering_algo.apply(net, first_pairs, as_pairs=True, parameters=parameters)
+        cover = hammocks_covering_algo.HammockCover(net, first_hammocks, parameters)
+        changed_hammocks = cover.add_pairs(new_pairs)
+
+        all_hammocks = hammocks_covering_algo.apply(net, first_pairs + new_pairs, as_pairs=True, parameters=parameters)
+        self.assertEqual(set(all_hammocks), cover.hammocks)
+        self.assertEqual(set(all_hammocks) - set(first_hammocks), set(changed_hammocks))
+        self.assertEqual(1, len(changed_hammocks))
+        # the hammock of ('complete_repair_t', 'p9') is not touched by the new pairs
+        self.assertTrue(any(hammock in cover.hammocks for hammock in first_hammocks))
+        self.assertEqual([], cover.add_pairs(first_pairs))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,219 @@
+import os
+import tempfile
+import unittest
+
+from pm4py.algo.conformance.alignments.petri_net import algorithm as alignments_algo
+from pm4py.algo.evaluation.replay_fitness.variants import alignment_based as alignment_based_fitness
+from pm4py.algo.simulation.playout.petri_net import algorithm as pn_playout
+from pm4py.objects.log.obj import EventLog, Trace, Event
+from pm4py.objects.petri_net import semantics
+from pm4py.objects.petri_net.obj import PetriNet, Marking
+from pm4py.objects.petri_net.utils import petri_utils
+
+from examples import test_net, bad_pairs_hammocks_covering
+from grader import grader
+from hammocks_repair.conformance_analysis import log_alignments, alignments_cache, bad_pairs_selection, replay_alignments
+from hammocks_repair.net_repair.naive_log_only import algorithm as naive_log_only_algo
+from hammocks_repair.utils import net_helpers
+
+
+def _get_sample_data(case=test_net.Variants.CASE2):
+    net, im, fm, _, _, _, log = bad_pairs_hammocks_covering.get_sample_data(case)
+    return net, im, fm, log
+
+
+def _align_with_pm4py(log, net, im, fm):
+    alignments_parameters = {
+        alignments_algo.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: True,
+        alignments_algo.Parameters.SHOW_PROGRESS_BAR: False,
+    }
+    return alignments_algo.apply_log(log, net, im, fm, parameters=alignments_parameters)
+
+
+class AlignmentsCacheTest(unittest.TestCase):
+    def test1(self):
+        """
+        the fingerprint doesn't depend on the copy of the net but depends on its structure
+        """
+        net, im, fm = test_net.create_net()
+        net_copy, im_copy, fm_copy = net_helpers.deepcopy_net(net, im, fm)
+        self.assertEqual(alignments_cache.net_fingerprint(net, im, fm), alignments_cache.net_fingerprint(net_copy, im_copy, fm_copy))
+
+        net_helpers.del_trans('admit_helplessness_hidden_t', net_copy)
+        self.assertNotEqual(alignments_cache.net_fingerprint(net, im, fm), alignments_cache.net_fingerprint(net_copy, im_copy, fm_copy))
+
+    def test2(self):
+        """
+        alignments are stored in the cache and then reused instead of being recalculated
+        """
+        net, im, fm, log = _get_sample_data()
+        true_alignments = _align_with_pm4py(log, net, im, fm)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_filepath = os.path.join(cache_dir, 'alignments.sqlite')
+            parameters = {log_alignments.Parameters.ALIGNMENTS_CACHE: cache_filepath}
+
+            # ties between optimal alignments may be broken differently, so only costs are compared with pm4py
+            alignments = log_alignments.apply(log, net, im, fm, parameters)  # fills the cache
+            self.assertEqual([al['cost'] for al in true_alignments], [al['cost'] for al in alignments])
+
+            cached_alignments = log_alignments.apply(log, net, im, fm, parameters)
+            self.assertEqual([al['alignment'] for al in alignments], [al['alignment'] for al in cached_alignments])
+            self.assertEqual([al['cost'] for al in alignments], [al['cost'] for al in cached_alignments])
+
+            fingerprint = alignments_cache.net_fingerprint(net, im, fm)
+            with alignments_cache.AlignmentsCache(cache_filepath) as cache:
+                variants = {tuple(event['concept:name'] for event in trace) for trace in log}
+                self.assertEqual(len(variants), len(cache.get_many(fingerprint, variants)))
+                self.assertIsNone(cache.get(fingerprint, ['no such activity']))
+
+    def test3(self):
+        """
+        log fitness of the grader on the cached alignments (with prefiltered fitting variants) is the one of pm4py
+        """
+        net, im, fm, log = _get_sample_data(test_net.Variants.CASE1)
+        true_fitness = alignment_based_fitness.evaluate(_align_with_pm4py(log, net, im, fm))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_filepath = os.path.join(cache_dir, 'alignments.sqlite')
+            for _ in range(2):  # the second call takes the alignments from the cache
+                fitness = grader.log_fitness(log, net, im, fm, alignments_cache=cache_filepath)
+                self.assertEqual(true_fitness, fitness)
+
+
+class LogAlignmentsTest(unittest.TestCase):
+    def test1(self):
+        """
+        one alignment per variant, expanding it back gives the per-trace alignments
+        """
+        net, im, fm, log = _get_sample_data()
+
+        aligned_variants = log_alignments.apply_variants(log, net, im, fm)
+        variants = {tuple(event['concept:name'] for event in trace) for trace in log}
+        self.assertEqual(len(variants), len(aligned_variants))
+        self.assertEqual(len(log), sum(cnt for _, cnt in aligned_variants))
+
+        alignments = log_alignments.apply(log, net, im, fm)
+        self.assertEqual(len(log), len(alignments))
+        self.assertEqual(len(variants), len(log_alignments.group_by_variants(alignments)))
+        for trace, aligned_trace in zip(log, alignments):
+            log_labels = [labels[0] for _, labels in aligned_trace['alignment'] if labels[0] != '>>']
+            self.assertEqual([event['concept:name'] for event in trace], log_labels)
+
+        self.assertEqual(bad_pairs_selection.apply(net, im, fm, alignments),
+                         bad_pairs_selection.apply_variants(net, im, fm, log_alignments.group_by_variants(alignments)))
+
+    def test2(self):
+        """
+        alignments calculated in worker processes are reassembled in the order of the traces
+        """
+        net, im, fm, log = _get_sample_data()
+
+        alignments = log_alignments.apply(log, net, im, fm)
+        parallel_alignments = log_alignments.apply(log, net, im, fm, {log_alignments.Parameters.N_JOBS: 2})
+        self.assertEqual(len(alignments), len(parallel_alignments))
+        for aligned_trace, parallel_aligned_trace in zip(alignments, parallel_alignments):
+            self.assertEqual(aligned_trace['cost'], parallel_aligned_trace['cost'])
+            self.assertEqual([labels[0] for _, labels in aligned_trace['alignment'] if labels[0] != '>>'],
+                             [labels[0] for _, labels in parallel_aligned_trace['alignment'] if labels[0] != '>>'])
+
+    def test3(self):
+        """
+        variants exceeding the time budget get replay-based pseudo-alignments that are still valid firing sequences
+        """
+        net, im, fm, log = _get_sample_data()
+        alignments = log_alignments.apply(log, net, im, fm)
+
+        aligned_variants = log_alignments.apply_variants(log, net, im, fm, {log_alignments.Parameters.MAX_ALIGN_TIME_TRACE: 0})
+        self.assertEqual(len(log), log_alignments.count_fallbacks(aligned_variants))
+        self.assertEqual(0, log_alignments.count_fallbacks(log_alignments.group_by_variants(alignments)))
+
+        fallback_alignments = log_alignments.apply(log, net, im, fm, {log_alignments.Parameters.MAX_ALIGN_TIME_TRACE: 0})
+        transitions = {trans.name: trans for trans in net.transitions}
+        for trace, aligned_trace, fallback_aligned_trace in zip(log, alignments, fallback_alignments):
+            self.assertGreaterEqual(fallback_aligned_trace['cost'], aligned_trace['cost'])
+            log_labels = [labels[0] for _, labels in fallback_aligned_trace['alignment'] if labels[0] != '>>']
+            self.assertEqual([event['concept:name'] for event in trace], log_labels)
+
+            firing_sequence = [transitions[names[1]] for names, _ in fallback_aligned_trace['alignment'] if names[1] != '>>']
+            marking = im
+            for trans in firing_sequence:
+                self.assertTrue(semantics.is_enabled(trans, net, marking))
+                marking = semantics.execute(trans, net, marking)
+            self.assertEqual(fm, marking)
+
+        bad_pairs_selection.apply_variants(net, im, fm, aligned_variants)  # pseudo-alignments are consumable
+
+        # as well as by the fitness evaluation, the fitness of pseudo-alignments is a lower bound of the true one
+        true_fitness = alignment_based_fitness.evaluate(alignments)
+        for fallback_alignments in [fallback_alignments,
+                                    log_alignments.apply(log, net, im, fm, {log_alignments.Parameters.BACKEND: log_alignments.Backends.TOKEN_REPLAY})]:
+            for aligned_trace, fallback_aligned_trace in zip(alignments, fallback_alignments):
+                self.assertEqual(aligned_trace['bwc'], fallback_aligned_trace['bwc'])
+                self.assertLessEqual(fallback_aligned_trace['fitness'], aligned_trace['fitness'])
+            fallback_fitness = alignment_based_fitness.evaluate(fallback_alignments)
+            self.assertLessEqual(fallback_fitness['log_fitness'], true_fitness['log_fitness'])
+
+    def test4(self):
+        """
+        after adding self-loops, realigning only the variants with their labels gives optimal alignments
+        """
+        net = PetriNet('sequence')
+        places = [petri_utils.add_place(net, 'p_' + str(i)) for i in range(3)]
+        for i, label in enumerate(['a', 'b']):
+            trans = petri_utils.add_transition(net, label, label)
+            petri_utils.add_arc_from_to(places[i], trans, net)
+            petri_utils.add_arc_from_to(trans, places[i + 1], net)
+        im, fm = Marking({places[0]: 1}), Marking({places[-1]: 1})
+        log = EventLog([Trace([Event({'concept:name': activity}) for activity in variant])
+                        for variant in [['a', 'b'], ['a', 'x', 'b'], ['a', 'b'], ['a', 'c']]])
+        aligned_variants = log_alignments.apply_variants(log, net, im, fm)
+
+        transitions_names = {trans.name for trans in net.transitions}
+        parameters = {naive_log_only_algo.Parameters.ALIGNMENTS_MODIFICATION_MODE: naive_log_only_algo.AlignmentsModificationMode.NONE}
+        rep_net, rep_im, rep_fm = naive_log_only_algo.apply(net, im, fm, log, [al for al, _ in aligned_variants], parameters)
+        added_labels = {trans.label for trans in rep_net.transitions if trans.name not in transitions_names and trans.label is not None}
+        self.assertEqual({'x', 'c'}, added_labels)
+
+        realigned_variants = log_alignments.realign_variants(rep_net, rep_im, rep_fm, aligned_variants, added_labels)
+        true_aligned_variants = log_alignments.apply_variants(log, rep_net, rep_im, rep_fm)
+        self.assertEqual([cnt for _, cnt in true_aligned_variants], [cnt for _, cnt in realigned_variants])
+        self.assertEqual([True, False, False], [al is new_al for (al, _), (new_al, _) in zip(aligned_variants, realigned_variants)])
+
+        def deviations_cnt(aligned_trace):  # hidden transitions added by the repair may be not counted in the reused alignments
+            return sum(labels[1] == '>>' or (labels[0] == '>>' and labels[1] is not None) for _, labels in aligned_trace['alignment'])
+
+        self.assertEqual([0, 0, 1], [deviations_cnt(al) for al, _ in realigned_variants])
+        self.assertEqual([deviations_cnt(al) for al, _ in true_aligned_variants], [deviations_cnt(al) for al, _ in realigned_variants])
+
+    def test5(self):
+        """
+        variants fitting according to token replay are not aligned, the result doesn't change
+        """
+        net, im, fm, log = _get_sample_data()
+        fitting_log = pn_playout.apply(net, im, fm)
+        log = EventLog(list(fitting_log) + list(log))
+        true_alignments = _align_with_pm4py(log, net, im, fm)
+
+        for trace in fitting_log:
+            self.assertIsNotNone(replay_alignments.apply_fitting_trace([event['concept:name'] for event in trace], net, im, fm))
+
+        alignments = log_alignments.apply(log, net, im, fm, {log_alignments.Parameters.PREFILTER_FITTING: True})
+        self.assertEqual([al['cost'] for al in true_alignments], [al['cost'] for al in alignments])
+        self.assertEqual([al['fitness'] == 1.0 for al in true_alignments], [al.get('fitness') == 1.0 for al in alignments])
+        self.assertEqual([al['bwc'] for al in true_alignments], [al['bwc'] for al in alignments])
+
+    def test6(self):
+        """
+        best worst cost is calculated by pm4py if the final marking isn't reached within the lookahead states
+        """
+        net, im, fm, _ = _get_sample_data()
+        true_bwc = alignments_algo.apply(Trace(), net, im, fm)['cost']
+        self.assertGreater(true_bwc, 0)
+        self.assertEqual(true_bwc, replay_alignments.best_worst_cost(net, im, fm))
+        parameters = {replay_alignments.Parameters.MAX_LOOKAHEAD_STATES: 1}
+        self.assertEqual(true_bwc, replay_alignments.best_worst_cost(net, im, fm, parameters))
+
+
+if __name__ == '__main__':
+    unittest.main()
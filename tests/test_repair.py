@@ -1,12 +1,21 @@
+import os
+import tempfile
 import unittest
 
+import pm4py
 from pm4py import fitness_alignments
-from pm4py.objects.petri_net.utils import check_soundness
+from pm4py.algo.discovery.inductive import algorithm as inductive_miner
+from pm4py.objects.petri_net.obj import PetriNet
+from pm4py.objects.petri_net.utils import check_soundness, petri_utils
 
 from grader import test_gen
-from hammocks_repair.net_repair.hammocks_replacement import algorithm as hammocks_replacement_algo
+from hammocks_repair.net_repair.hammocks_replacement import algorithm as hammocks_replacement_algo, subprocess_cache
+from hammocks_repair.net_repair.hammocks_replacement.subprocess_cache import SubprocessCache
 from hammocks_repair.net_repair.naive_log_only import algorithm as naive_log_only_algo
-from examples import bad_pairs_hammocks_covering
+from hammocks_repair.hammocks_covering import algorithm as hammocks_covering_algo
+from hammocks_repair.utils import net_helpers, net_analysis
+from hammocks_repair.utils.encoded_log import EncodedLog
+from examples import bad_pairs_hammocks_covering, test_net
 
 NodeTypes = hammocks_replacement_algo.NodeTypes
 Parameters = hammocks_replacement_algo.Parameters
@@ -30,3 +39,200 @@ class HammocksReplacementRepairTest(unittest.TestCase):
         self.assertTrue(check_soundness.check_wfnet(rep_net))
         fitness = fitness_alignments(log, rep_net, rep_im, rep_fm)
         self.assertEqual(fitness['percentage_of_fitting_traces'], 100.)
+
+    def test2(self):
+        """
+        repair on the pseudo-alignments from token replay instead of the optimal ones
+        """
+        _, _, _, net, im, fm, log = test_gen.gen_sample_test(
+            bad_pairs_hammocks_covering.Variants.CASE2)
+
+        parameters = {
+            Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+            Parameters.PREREPAIR_VARIANT: hammocks_replacement_algo.PrerepairVariants.NAIVE_LOG_ONLY,
+            Parameters.CONFORMANCE_BACKEND: hammocks_replacement_algo.ConformanceBackends.TOKEN_REPLAY,
+        }
+        rep_net, rep_im, rep_fm = hammocks_replacement_algo.apply(net, im, fm, log, parameters=parameters)
+
+        self.assertTrue(check_soundness.check_wfnet(rep_net))
+        fitness = fitness_alignments(log, rep_net, rep_im, rep_fm)
+        self.assertEqual(fitness['percentage_of_fitting_traces'], 100.)
+
+    def test3(self):
+        """
+        the cached WF-net analysis follows the modifications of the net
+        """
+        net, im, fm = test_net.create_net()
+        net_source, net_sink = net_analysis.get_source_and_sink(net)
+        self.assertTrue(net_analysis.check_wfnet(net))
+        self.assertEqual((check_soundness.check_source_place_presence(net), check_soundness.check_sink_place_presence(net)),
+                         (net_source, net_sink))
+
+        hammock = hammocks_covering_algo.apply(net, [net_helpers.get_node_by_name(net, name) for name in ['1st_vendor_t', '2nd_vendor_t']])
+        subprocess_net = PetriNet()
+        subprocess_source, subprocess_sink = petri_utils.add_place(subprocess_net), petri_utils.add_place(subprocess_net)
+        trans = petri_utils.add_transition(subprocess_net, 'vendor_t', 'vendor')
+        petri_utils.add_arc_from_to(subprocess_source, trans, subprocess_net)
+        petri_utils.add_arc_from_to(trans, subprocess_sink, subprocess_net)
+        stamp = net_analysis.get_version_stamp(net)
+        hammocks_replacement_algo.replace_hammock(net, im, fm, hammock, subprocess_net, subprocess_source, subprocess_sink)
+        self.assertNotEqual(stamp, net_analysis.get_version_stamp(net))
+        self.assertTrue(net_analysis.check_wfnet(net))
+        self.assertEqual((net_source, net_sink), net_analysis.get_source_and_sink(net))
+
+        # the net stops being a WF-net
+        net_helpers.remove_node(net, net_helpers.get_node_by_name(net, 'take_device_t'))
+        self.assertFalse(net_analysis.check_wfnet(net))
+        self.assertEqual(check_soundness.check_sink_place_presence(net), net_analysis.get_source_and_sink(net)[1])
+
+    def test4(self):
+        """
+        the encoded log gives the same projections for an event log and a dataframe
+        """
+        _, _, _, net, im, fm, log = test_gen.gen_sample_test(
+            bad_pairs_hammocks_covering.Variants.CASE2)
+        activities = {trans.label for trans in list(net.transitions)[:3] if trans.label is not None}
+        expected = [[event['concept:name'] for event in trace if event['concept:name'] in activities] for trace in log]
+
+        for encoded_log in [EncodedLog.from_log(log), EncodedLog.from_log(pm4py.convert_to_dataframe(log))]:
+            self.assertEqual(len(log), len(encoded_log))
+            sublog = encoded_log.project(activities)
+            self.assertEqual([subtrace for subtrace in expected if subtrace],
+                             [[event['concept:name'] for event in trace] for trace in sublog])
+            self.assertEqual(0, len(encoded_log.project({'unknown activity'})))
+
+    def test5(self):
+        """
+        the one-pass projection on several sets of activities gives the variants of the separate projections
+        """
+        _, _, _, net, im, fm, log = test_gen.gen_sample_test(
+            bad_pairs_hammocks_covering.Variants.CASE2)
+        labels = sorted(trans.label for trans in net.transitions if trans.label is not None)
+        activities_sets = [set(labels[:2]), set(labels[1:4]), set(), {'unknown activity'}, set(labels)]
+
+        encoded_log = EncodedLog.from_log(log)
+        projections = encoded_log.project_many(activities_sets)
+        self.assertEqual(len(activities_sets), len(projections))
+        for activities, (variants, empty_cases) in zip(activities_sets, projections):
+            expected_variants = {}
+            for trace in encoded_log.project(activities):
+                variant = tuple(event['concept:name'] for event in trace)
+                expected_variants[variant] = expected_variants.get(variant, 0) + 1
+            self.assertEqual(expected_variants, variants)
+            self.assertEqual(expected_variants, encoded_log.project_variants(activities))
+            self.assertEqual([i for i, trace in enumerate(log) if not any(event['concept:name'] in activities for event in trace)],
+                             list(empty_cases))
+
+    def test6(self):
+        """
+        the subprocesses discovered in worker processes give the same repaired net
+        """
+        net, im, fm, _, _, _, log = test_gen.gen_sample_test(
+            bad_pairs_hammocks_covering.Variants.CASE2)
+
+        parameters = {
+            Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+            Parameters.PREREPAIR_VARIANT: hammocks_replacement_algo.PrerepairVariants.NAIVE_LOG_ONLY,
+        }
+
+        def net_summary(net):
+            return (sorted(str(trans.label) for trans in net.transitions), len(net.places), len(net.arcs),
+                    sorted((str(arc.source.label if isinstance(arc.source, PetriNet.Transition) else None),
+                            str(arc.target.label if isinstance(arc.target, PetriNet.Transition) else None)) for arc in net.arcs))
+
+        rep_net, _, _ = hammocks_replacement_algo.apply(net, im, fm, log, parameters=parameters)
+        parameters[Parameters.SUBPROCESS_N_JOBS] = 2
+        parallel_rep_net, parallel_rep_im, parallel_rep_fm = hammocks_replacement_algo.apply(net, im, fm, log, parameters=parameters)
+
+        self.assertTrue(check_soundness.check_wfnet(parallel_rep_net))
+        self.assertEqual(net_summary(rep_net), net_summary(parallel_rep_net))
+        names = [node.name for node in list(parallel_rep_net.places) + list(parallel_rep_net.transitions)]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test7(self):
+        """
+        the subprocesses discovered in the previous run are taken from the cache
+        """
+        net, im, fm, _, _, _, log = test_gen.gen_sample_test(
+            bad_pairs_hammocks_covering.Variants.CASE2)
+
+        class CountingMiner:
+            calls = 0
+
+            @staticmethod
+            def apply_variants(variants, parameters=None):
+                CountingMiner.calls += 1
+                return inductive_miner.apply_variants(variants, parameters=parameters)
+
+        def net_summary(net):
+            return sorted(str(trans.label) for trans in net.transitions), len(net.places), len(net.arcs)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parameters = {
+                Parameters.HAMMOCK_PERMITTED_SINK_NODE_TYPE: NodeTypes.PLACE_TYPE | NodeTypes.NOT_HIDDEN_TRANS_TYPE,
+                Parameters.PREREPAIR_VARIANT: hammocks_replacement_algo.PrerepairVariants.NAIVE_LOG_ONLY,
+                Parameters.SUBPROCESS_MINER_ALGO: CountingMiner,
+                Parameters.SUBPROCESS_MINER_ALGO_VARIANT: None,
+                Parameters.SUBPROCESS_CACHE: os.path.join(cache_dir, 'subprocesses.sqlite'),
+            }
+            rep_net, _, _ = hammocks_replacement_algo.apply(net, im, fm, log, parameters=parameters)
+            mined_cnt = CountingMiner.calls
+            self.assertTrue(mined_cnt > 0)
+
+            cached_rep_net, cached_rep_im, cached_rep_fm = hammocks_replacement_algo.apply(net, im, fm, log, parameters=parameters)
+            self.assertEqual(mined_cnt, CountingMiner.calls)
+            self.assertEqual(net_summary(rep_net), net_summary(cached_rep_net))
+            self.assertTrue(check_soundness.check_wfnet(cached_rep_net))
+            fitness = fitness_alignments(log, cached_rep_net, cached_rep_im, cached_rep_fm)
+            self.assertEqual(fitness['percentage_of_fitting_traces'], 100.)
+
+    def test8(self):
+        """
+        the subprocess cache keeps the nets with their sources and sinks and evicts the least recently used ones
+        """
+        net, _, _ = test_net.create_net()
+        net_source, net_sink = net_analysis.get_source_and_sink(net)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with SubprocessCache(os.path.join(cache_dir, 'subprocesses.sqlite'), max_entries=2) as cache:
+                cache.put('a', net, net_source, net_sink)
+                cache.put('b', net, net_source, net_sink)
+                cached_net, cached_source, cached_sink = cache.get('a')
+                cache.put('c', net, net_source, net_sink)  # 'b' is the least recently used one
+
+                self.assertEqual(2, len(cache))
+                self.assertIsNone(cache.get('b'))
+                self.assertIsNotNone(cache.get('c'))
+
+            self.assertEqual((net_source.name, net_sink.name), (cached_source.name, cached_sink.name))
+            self.assertEqual(sorted((trans.name, trans.label) for trans in net.transitions),
+                             sorted((trans.name, trans.label) for trans in cached_net.transitions))
+            self.assertEqual(sorted((arc.source.name, arc.target.name) for arc in net.arcs),
+                             sorted((arc.source.name, arc.target.name) for arc in cached_net.arcs))
+
+        variants = {('a', 'b'): 3, ('b',): 1}
+        key = subprocess_cache.subprocess_key({'a', 'b'}, variants, inductive_miner, inductive_miner.Variants.IMf)
+        self.assertEqual(key, subprocess_cache.subprocess_key(['b', 'a'], dict(reversed(list(variants.items()))),
+                                                              inductive_miner, inductive_miner.Variants.IMf))
+        self.assertNotEqual(key, subprocess_cache.subprocess_key({'a', 'b'}, {('a', 'b'): 3}, inductive_miner, inductive_miner.Variants.IMf))
+        self.assertNotEqual(key, subprocess_cache.subprocess_key({'a', 'b'}, variants, inductive_miner, inductive_miner.Variants.IMd))
+
+    def test9(self):
+        """
+        the key of a subprocess depends on the parameters of the miner only, not on the ones of the repair
+        """
+        variants = {('a', 'b'): 3, ('b',): 1}
+
+        def get_key(parameters):
+            miner_parameters = hammocks_replacement_algo._get_miner_parameters(parameters)
+            return subprocess_cache.subprocess_key({'a', 'b'}, variants, inductive_miner, inductive_miner.Variants.IMf, miner_parameters)
+
+        parameters = {hammocks_replacement_algo.Parameters.SUBPROCESS_N_JOBS: 1}
+        key = get_key(parameters)
+        self.assertEqual(key, get_key({hammocks_replacement_algo.Parameters.SUBPROCESS_N_JOBS: 4}))
+        self.assertEqual(key, get_key({hammocks_replacement_algo.Parameters.SUBPROCESS_N_JOBS.value: 4,
+                                       hammocks_replacement_algo.Parameters.ALIGNMENTS_N_JOBS: 2,
+                                       hammocks_replacement_algo.Parameters.ALIGNMENTS_PREFILTER_FITTING: False,
+                                       hammocks_replacement_algo.Parameters.ALIGNMENTS_MAX_TIME_TRACE: 10,
+                                       hammocks_replacement_algo.Parameters.HAMMOCK_PERMITTED_SOURCE_NODE_TYPE: 'place'}))
+        self.assertNotEqual(key, get_key({'noiseThreshold': 0.2}))